@@ -0,0 +1,18 @@
+-- Forecasting Service: fitted SARIMAX parameters per product
+-- Lets nightly refits warm-start from last month's estimates and skip
+-- re-estimation entirely when only a few trailing months were added.
+
+CREATE TABLE IF NOT EXISTS forecast_model_params (
+    product_id TEXT NOT NULL,
+    model_spec VARCHAR(64) NOT NULL,
+    params DOUBLE PRECISION[] NOT NULL,
+    param_names TEXT[] NOT NULL,
+    series_start DATE NOT NULL,
+    series_end DATE NOT NULL,
+    series_values DOUBLE PRECISION[] NOT NULL,
+    iterations INT,
+    fitted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (product_id, model_spec)
+);
+
+CREATE INDEX IF NOT EXISTS idx_forecast_model_params_fitted_at ON forecast_model_params(fitted_at DESC);
@@ -0,0 +1,22 @@
+-- Forecasting Service: product-by-month sales rollup
+-- Maintained incrementally by SalesRollup (src/forecasting/rollup.py) so
+-- forecasts read one index probe instead of aggregating order_items.
+
+CREATE TABLE IF NOT EXISTS product_sales_monthly (
+    product_id TEXT NOT NULL,
+    month DATE NOT NULL,
+    total_quantity BIGINT NOT NULL,
+    order_lines INT NOT NULL,
+    last_order_at TIMESTAMP,
+    PRIMARY KEY (product_id, month)
+);
+
+CREATE INDEX IF NOT EXISTS idx_product_sales_monthly_month ON product_sales_monthly(month);
+
+-- Single-row refresh bookkeeping
+CREATE TABLE IF NOT EXISTS product_sales_rollup_state (
+    id INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    watermark TIMESTAMP,
+    refreshed_at TIMESTAMP WITH TIME ZONE,
+    rows_written INT
+);
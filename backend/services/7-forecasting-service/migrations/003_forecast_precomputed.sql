@@ -0,0 +1,14 @@
+-- Forecasting Service: scheduled catalog-wide forecasts
+-- Written by ForecastPrecomputer (src/forecasting/precompute.py) and
+-- served by /api/forecast/predict while still fresh.
+
+CREATE TABLE IF NOT EXISTS forecast_precomputed (
+    product_id TEXT NOT NULL,
+    periods INT NOT NULL,
+    historical_months INT NOT NULL,
+    result JSONB NOT NULL,
+    generated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (product_id, periods, historical_months)
+);
+
+CREATE INDEX IF NOT EXISTS idx_forecast_precomputed_generated_at ON forecast_precomputed(generated_at);
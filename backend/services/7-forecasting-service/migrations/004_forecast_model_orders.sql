@@ -0,0 +1,15 @@
+-- Forecasting Service: SARIMAX orders selected per product
+-- Written by OrderSelector (src/forecasting/order_selection.py) during
+-- periodic re-selection runs; interactive forecasts reuse the stored order.
+
+CREATE TABLE IF NOT EXISTS forecast_model_orders (
+    product_id TEXT PRIMARY KEY,
+    model_order INT[] NOT NULL,
+    seasonal_order INT[] NOT NULL,
+    aic DOUBLE PRECISION,
+    candidates_evaluated INT,
+    series_length INT,
+    selected_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_forecast_model_orders_selected_at ON forecast_model_orders(selected_at);
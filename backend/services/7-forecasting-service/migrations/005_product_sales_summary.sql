@@ -0,0 +1,31 @@
+-- Forecasting Service: per-product sales summary
+-- Maintained by SalesRollup (src/forecasting/rollup.py) alongside
+-- product_sales_monthly; backs the keyset-paginated /forecast/products listing.
+
+CREATE TABLE IF NOT EXISTS product_sales_summary (
+    product_id TEXT PRIMARY KEY,
+    first_month DATE NOT NULL,
+    last_month DATE NOT NULL,
+    history_months INT NOT NULL,
+    months_with_sales INT NOT NULL,
+    total_quantity BIGINT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Keyset order for "top sellers first" pages
+CREATE INDEX IF NOT EXISTS idx_product_sales_summary_volume ON product_sales_summary(total_quantity, product_id);
+
+-- One-time backfill for rollups built before this table existed
+INSERT INTO product_sales_summary (product_id, first_month, last_month, history_months, months_with_sales, total_quantity)
+SELECT
+    product_id,
+    MIN(month),
+    MAX(month),
+    ((DATE_PART('year', MAX(month)) - DATE_PART('year', MIN(month))) * 12
+        + DATE_PART('month', MAX(month)) - DATE_PART('month', MIN(month)) + 1)::int,
+    COUNT(*),
+    SUM(total_quantity)
+FROM product_sales_monthly
+WHERE NOT EXISTS (SELECT 1 FROM product_sales_summary)
+GROUP BY product_id
+ON CONFLICT (product_id) DO NOTHING;
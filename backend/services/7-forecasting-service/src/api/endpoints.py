@@ -1,7 +1,21 @@
+import json
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from typing import Optional
 from ..forecasting.model import ForecastModel
-from ..dto.forecast_dto import ForecastRequest, ForecastResponse, HistoricalDataResponse
+from ..forecasting.db_pool import db_pool
+from ..forecasting.schema import sales_schema
+from ..forecasting.executor import fit_executor, ExecutorSaturatedError
+from ..forecasting.cache import forecast_cache
+from ..forecasting.rollup import sales_rollup
+from ..forecasting.precompute import forecast_precomputer
+from ..forecasting.backtest import Backtester
+from ..forecasting.hierarchy import HierarchicalForecaster
+from ..forecasting.series_store import series_store
+from ..forecasting.singleflight import request_coalescer
+from ..forecasting.change_feed import sales_change_listener
+from ..forecasting.model_registry import model_registry
+from ..dto.forecast_dto import ForecastRequest, ForecastResponse, HistoricalDataResponse, BatchForecastRequest, ForecastEngine, Granularity, ProductSort, BacktestRequest, HierarchyForecastRequest, ReconciliationMethod, ScenarioRequest
 
 router = APIRouter()
 
@@ -11,6 +25,12 @@ def get_forecast_model():
     return ForecastModel()
 
 
+def _service_busy(e: ExecutorSaturatedError) -> HTTPException:
+    """503 for a full fit queue; clients should back off and retry."""
+    print(f"Rejecting forecast: {e}")
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
 # ============================================================================
 # LEGACY ENDPOINT (Backward Compatibility)
 # ============================================================================
@@ -31,9 +51,12 @@ async def get_forecast_legacy(
         forecast_results = await model.generate_forecast(
             product_id=request.product_id,
             periods=periods,
-            historical_months=request.historical_months or 24
+            historical_months=request.historical_months or forecast_precomputer.historical_months,
+            granularity=(request.granularity or Granularity.MONTH).value
         )
         return forecast_results
+    except ExecutorSaturatedError as e:
+        raise _service_busy(e)
     except Exception as e:
         print(f"Forecast error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -60,30 +83,191 @@ async def predict_demand(
     - trend: 'increasing', 'decreasing', or 'stable'
     - seasonality: Whether seasonal patterns were detected
     - insights: Human-readable analysis insights
+    
+    Served from the cache or the scheduled precompute when fresh; set
+    `refresh: true` to force a live fit. `engine` selects SARIMAX, vectorized
+    exponential smoothing ('ets'), Croston/SBA/TSB ('intermittent'), or
+    'auto' (intermittent engine for sparse demand, smoothing for short series).
+    `granularity` buckets sales by day, week or month (default); the
+    horizon is counted in those buckets.
+    
+    Live fits run under a latency budget (`latencyBudgetMs`): a slow
+    seasonal SARIMAX fit degrades to non-seasonal SARIMAX, exponential
+    smoothing, then (seasonal) naive. `modelTier` reports which one answered.
     """
     try:
         # Get periods from request (supports both naming conventions)
         periods = request.forecast_horizon or request.periods or 6
-        historical = request.historical_months or 24
+        # Same window as the scheduled precompute, whose rows are keyed by it
+        historical = request.historical_months or forecast_precomputer.historical_months
         
         print(f"Predict request: product_id={request.product_id}, periods={periods}, historical={historical}")
         
         forecast_results = await model.generate_forecast(
             product_id=request.product_id,
             periods=periods,
-            historical_months=historical
+            historical_months=historical,
+            refresh=bool(request.refresh),
+            engine=(request.engine or ForecastEngine.AUTO).value,
+            granularity=(request.granularity or Granularity.MONTH).value,
+            latency_budget=request.latency_budget_ms / 1000 if request.latency_budget_ms is not None else None
         )
         return forecast_results
         
+    except ExecutorSaturatedError as e:
+        raise _service_busy(e)
     except Exception as e:
         print(f"Prediction error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/forecast/batch", tags=["Forecasting"])
+async def predict_demand_batch(
+    request: BatchForecastRequest,
+    model: ForecastModel = Depends(get_forecast_model)
+):
+    """
+    Generate demand forecasts for many products in one call.
+    
+    Sales history for every product is loaded with a single query and the
+    model fits run in parallel worker processes.
+    
+    Returns a newline-delimited JSON stream (`application/x-ndjson`). Each
+    line is one product's forecast, emitted as soon as it finishes, in the
+    same shape as `/forecast/predict` plus a `productId` field.
+    """
+    periods = request.forecast_horizon or 6
+    historical = request.historical_months or 24
+    engine = (request.engine or ForecastEngine.AUTO).value
+    # Preserve request order while dropping duplicate IDs
+    product_ids = list(dict.fromkeys(request.product_ids))
+    
+    print(f"Batch request: {len(product_ids)} products, periods={periods}, historical={historical}")
+    
+    async def stream_results():
+        async for result in model.generate_batch_forecast(
+            product_ids, periods, historical, engine, use_series_store=True
+        ):
+            yield json.dumps(result) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@router.post("/forecast/backtest", response_model=dict, tags=["Forecasting"])
+async def backtest_forecasts(
+    request: BacktestRequest,
+    model: ForecastModel = Depends(get_forecast_model)
+):
+    """
+    Rolling-origin backtest of the forecasting engine.
+    
+    Each product's history is cut at `origins` points, `step` months apart;
+    the model is refitted on the data before each origin and scored on the
+    next `forecastHorizon` months. Folds run in parallel worker processes.
+    
+    Returns overall and per-product MAPE, sMAPE, MASE and 95% interval
+    coverage. For the whole catalog use `python -m src.forecasting.backtest`.
+    """
+    try:
+        return await Backtester(model).run(
+            product_ids=list(dict.fromkeys(request.product_ids)),
+            horizon=request.forecast_horizon,
+            origins=request.origins,
+            step=request.step,
+            historical_months=request.historical_months,
+            engine=(request.engine or ForecastEngine.AUTO).value,
+            metrics=[m.value for m in request.metrics] if request.metrics else None,
+            include_folds=bool(request.include_folds)
+        )
+    except Exception as e:
+        print(f"Backtest error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/forecast/hierarchy", response_model=dict, tags=["Forecasting"])
+async def forecast_hierarchy(
+    request: HierarchyForecastRequest,
+    model: ForecastModel = Depends(get_forecast_model)
+):
+    """
+    Forecast total, category and product demand so that the levels add up.
+    
+    Category and total series are aggregated from product sales in one pass
+    and forecast once each. Best-selling products get their own model;
+    long-tail products follow their category's forecast scaled by their
+    volume share. `reconciliation` is `bottom_up` or `mint`.
+    """
+    try:
+        return await HierarchicalForecaster(model).forecast(
+            categories=request.categories,
+            product_ids=list(dict.fromkeys(request.product_ids)) if request.product_ids else None,
+            periods=request.forecast_horizon or 6,
+            historical_months=request.historical_months or 24,
+            reconciliation=(request.reconciliation or ReconciliationMethod.BOTTOM_UP).value,
+            engine=(request.engine or ForecastEngine.AUTO).value,
+            include_products=request.include_products is not False
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        print(f"Hierarchy forecast error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/forecast/scenario", response_model=dict, tags=["Forecasting"])
+async def forecast_scenarios(
+    request: ScenarioRequest,
+    model: ForecastModel = Depends(get_forecast_model)
+):
+    """
+    What-if forecasts for one product without refitting.
+    
+    Each scenario is a list of shocks over forecast periods:
+    `multiplicative` (value 1.2 = +20%, 0 = outage) or `additive` (units).
+    They are applied to the same baseline `/forecast/predict` serves for
+    the product, so only the first call may fit a model. `carryover`
+    shocks also move later periods through the fitted model's dynamics;
+    when the baseline's engine has none (smoothing, intermittent demand)
+    they apply to their own periods only and `warnings` says so.
+    All scenarios are evaluated together in one vectorized pass.
+    """
+    scenarios = [
+        {
+            "name": scenario.name,
+            "shocks": [
+                {
+                    "type": shock.type.value,
+                    "value": shock.value,
+                    "startPeriod": shock.start_period,
+                    "endPeriod": shock.end_period,
+                    "carryover": bool(shock.carryover),
+                }
+                for shock in scenario.shocks
+            ],
+        }
+        for scenario in request.scenarios
+    ]
+    try:
+        return await model.generate_scenarios(
+            request.product_id,
+            scenarios,
+            periods=request.forecast_horizon or 6,
+            historical_months=request.historical_months
+        )
+    except ExecutorSaturatedError as e:
+        raise _service_busy(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Scenario forecast error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/forecast/historical/{product_id}", response_model=dict, tags=["Forecasting"])
 async def get_historical_data(
     product_id: str,
     months: Optional[int] = Query(24, description="Number of months of historical data"),
+    granularity: Granularity = Query(Granularity.MONTH, description="Bucket size: day, week or month"),
     model: ForecastModel = Depends(get_forecast_model)
 ):
     """
@@ -97,7 +281,7 @@ async def get_historical_data(
     - totalRecords: Number of data points
     """
     try:
-        data = await model.get_historical_data(product_id, months)
+        data = await model.get_historical_data(product_id, months, granularity.value)
         return data
     except Exception as e:
         print(f"Historical data error: {e}")
@@ -106,19 +290,118 @@ async def get_historical_data(
 
 @router.get("/forecast/products", response_model=dict, tags=["Forecasting"])
 async def list_forecastable_products(
-    limit: int = Query(50, description="Maximum products to return"),
+    limit: int = Query(50, ge=1, le=1000, description="Maximum products to return"),
+    min_months: int = Query(3, ge=1, alias="minMonths", description="Minimum months of sales history"),
+    sort: ProductSort = Query(ProductSort.VOLUME, description="volume (top sellers first) or product (by ID)"),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
     model: ForecastModel = Depends(get_forecast_model)
 ):
     """
     List products that have enough data for forecasting.
     
-    Returns products with at least 3 months of sales history.
+    Returns products whose sales history spans at least `minMonths`
+    months, with history length, last sale month and total volume.
+    Pages are keyset-paginated: pass `nextCursor` back as `cursor` until
+    it is null. `sort=volume` lists top sellers first, for prefetching
+    their forecasts.
     """
     try:
-        # This would need database access - returning placeholder for now
-        return {
-            "products": [],
-            "message": "Use inventory service to get product list, then forecast individual products"
-        }
+        page = await model.data_loader.get_forecastable_products(min_months, limit, sort.value, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        **page,
+        "count": len(page["products"]),
+        "minMonths": min_months,
+        "sort": sort.value,
+    }
+
+
+# ============================================================================
+# OPERATIONAL STATS
+# ============================================================================
+
+@router.get("/forecast/stats/pool", response_model=dict, tags=["Operations"])
+async def get_pool_stats():
+    """
+    Database connection pool saturation statistics.
+    
+    Use `inUse`, `waiting` and `acquireTimeouts` to size
+    `DB_POOL_MAX_SIZE` for production traffic. `salesSchema` shows the
+    order columns the prepared sales statements were built for.
+    """
+    return {**db_pool.stats(), "salesSchema": sales_schema.stats()}
+
+
+@router.get("/forecast/stats/workers", response_model=dict, tags=["Operations"])
+async def get_worker_stats():
+    """
+    Model-fitting worker pool statistics.
+    
+    `queueDepth` and `inFlight` are the autoscaling signals; `rejectedTotal`
+    counts requests answered with 503 because the queue was full.
+    """
+    return fit_executor.stats()
+
+
+@router.get("/forecast/stats/cache", response_model=dict, tags=["Operations"])
+async def get_cache_stats():
+    """
+    Forecast result cache statistics (hits, misses, evictions, memory).
+    """
+    return forecast_cache.stats()
+
+
+@router.get("/forecast/stats/rollup", response_model=dict, tags=["Operations"])
+async def get_rollup_stats():
+    """
+    Monthly sales rollup readiness and last refresh outcome.
+    """
+    return sales_rollup.stats()
+
+
+@router.get("/forecast/stats/precompute", response_model=dict, tags=["Operations"])
+async def get_precompute_stats():
+    """
+    Scheduled catalog precompute configuration and last run summary.
+    """
+    return forecast_precomputer.stats()
+
+
+@router.get("/forecast/stats/series-store", response_model=dict, tags=["Operations"])
+async def get_series_store_stats():
+    """
+    Memory-mapped series store shape and freshness.
+    """
+    return series_store.stats()
+
+
+@router.get("/forecast/stats/coalescing", response_model=dict, tags=["Operations"])
+async def get_coalescing_stats():
+    """
+    Request coalescing counters: computations started vs. requests that
+    joined an identical in-flight one.
+    """
+    return request_coalescer.stats()
+
+
+@router.get("/forecast/stats/change-feed", response_model=dict, tags=["Operations"])
+async def get_change_feed_stats():
+    """
+    Sales change listener: LISTEN connection state, notifications received
+    and the last debounced flush (rollup rows, cache invalidations,
+    re-forecasts queued).
+    """
+    return sales_change_listener.stats()
+
+
+@router.get("/forecast/stats/model-registry", response_model=dict, tags=["Operations"])
+async def get_model_registry_stats():
+    """
+    Fitted-model registry: loaded entries and memory budget, in-memory
+    hits vs. disk loads and misses.
+    """
+    return model_registry.stats()
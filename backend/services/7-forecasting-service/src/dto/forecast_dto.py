@@ -9,6 +9,24 @@ class TrendType(str, Enum):
     STABLE = "stable"
 
 
+class ForecastEngine(str, Enum):
+    AUTO = "auto"
+    SARIMAX = "sarimax"
+    ETS = "ets"
+    INTERMITTENT = "intermittent"
+
+
+class Granularity(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class ProductSort(str, Enum):
+    VOLUME = "volume"
+    PRODUCT = "product"
+
+
 class ForecastRequest(BaseModel):
     """
     Request model for demand forecasting.
@@ -16,24 +34,159 @@ class ForecastRequest(BaseModel):
     """
     product_id: str = Field(..., alias="productId", description="Product ID to forecast")
     product_name: Optional[str] = Field(None, alias="productName", description="Product name (optional)")
-    historical_months: Optional[int] = Field(12, alias="historicalMonths", description="Months of historical data to use")
+    historical_months: Optional[int] = Field(None, alias="historicalMonths", description="Months of historical data to use (default FORECAST_PRECOMPUTE_HISTORY, so default requests are served from the scheduled precompute)")
     forecast_horizon: Optional[int] = Field(6, alias="forecastHorizon", description="Number of periods to forecast")
     
     # Backward compatibility with old API
     periods: Optional[int] = Field(None, description="Legacy: Number of periods to forecast")
     
+    refresh: Optional[bool] = Field(False, description="Bypass cached/precomputed results and refit now")
+    engine: Optional[ForecastEngine] = Field(ForecastEngine.AUTO, description="Model engine: auto picks Croston/SBA/TSB for intermittent demand and exponential smoothing for short series")
+    granularity: Optional[Granularity] = Field(Granularity.MONTH, description="Bucket size: forecastHorizon counts days, weeks or months")
+    latency_budget_ms: Optional[int] = Field(None, alias="latencyBudgetMs", ge=0, le=60000, description="Time before cheaper models answer (default FORECAST_LATENCY_BUDGET, 0 = unlimited)")
+    
     class Config:
         populate_by_name = True
         json_schema_extra = {
             "example": {
                 "productId": "PROD-12345",
                 "productName": "Widget A",
-                "historicalMonths": 12,
+                "historicalMonths": 24,
                 "forecastHorizon": 6
             }
         }
 
 
+class BatchForecastRequest(BaseModel):
+    """
+    Request model for forecasting many products in one call.
+    """
+    product_ids: List[str] = Field(..., alias="productIds", min_length=1, max_length=50000, description="Product IDs to forecast")
+    historical_months: Optional[int] = Field(24, alias="historicalMonths", description="Months of historical data to use")
+    forecast_horizon: Optional[int] = Field(6, alias="forecastHorizon", description="Number of periods to forecast")
+    engine: Optional[ForecastEngine] = Field(ForecastEngine.AUTO, description="Model engine: auto picks Croston/SBA/TSB for intermittent demand and exponential smoothing for short series")
+    
+    class Config:
+        populate_by_name = True
+        json_schema_extra = {
+            "example": {
+                "productIds": ["PROD-12345", "PROD-67890"],
+                "historicalMonths": 24,
+                "forecastHorizon": 6
+            }
+        }
+
+
+class BacktestMetric(str, Enum):
+    MAPE = "mape"
+    SMAPE = "smape"
+    MASE = "mase"
+    COVERAGE = "coverage"
+
+
+class BacktestRequest(BaseModel):
+    """
+    Request model for rolling-origin backtesting.
+    """
+    product_ids: List[str] = Field(..., alias="productIds", min_length=1, max_length=5000, description="Product IDs to backtest")
+    historical_months: Optional[int] = Field(36, alias="historicalMonths", description="Months of historical data to load")
+    forecast_horizon: Optional[int] = Field(3, alias="forecastHorizon", ge=1, le=24, description="Months scored after each origin")
+    origins: Optional[int] = Field(3, ge=1, le=24, description="Number of forecast origins per product")
+    step: Optional[int] = Field(1, ge=1, le=12, description="Months between consecutive origins")
+    engine: Optional[ForecastEngine] = Field(ForecastEngine.AUTO, description="Model engine to evaluate")
+    metrics: Optional[List[BacktestMetric]] = Field(None, description="Metrics to report (default all)")
+    include_folds: Optional[bool] = Field(False, alias="includeFolds", description="Return per-fold metrics")
+    
+    class Config:
+        populate_by_name = True
+        json_schema_extra = {
+            "example": {
+                "productIds": ["PROD-12345", "PROD-67890"],
+                "forecastHorizon": 3,
+                "origins": 3,
+                "metrics": ["mape", "mase", "coverage"]
+            }
+        }
+
+
+class ShockType(str, Enum):
+    MULTIPLICATIVE = "multiplicative"
+    ADDITIVE = "additive"
+
+
+class ScenarioShock(BaseModel):
+    """
+    One shock applied to a span of forecast periods.
+    """
+    type: ShockType = Field(..., description="multiplicative (value is a factor, 1.2 = +20%) or additive (units)")
+    value: float = Field(..., description="Factor or units added per period (negative to remove)")
+    start_period: int = Field(..., alias="startPeriod", ge=1, description="First affected period (1-based)")
+    end_period: Optional[int] = Field(None, alias="endPeriod", ge=1, description="Last affected period (default startPeriod)")
+    carryover: Optional[bool] = Field(False, description="Let the fitted model carry the change into later periods")
+
+    class Config:
+        populate_by_name = True
+
+
+class Scenario(BaseModel):
+    """
+    A named set of shocks evaluated together.
+    """
+    name: Optional[str] = Field(None, description="Label echoed in the response")
+    shocks: List[ScenarioShock] = Field(..., max_length=100)
+
+
+class ScenarioRequest(BaseModel):
+    """
+    Request model for what-if forecasts on one product.
+    """
+    product_id: str = Field(..., alias="productId", description="Product ID to forecast")
+    historical_months: Optional[int] = Field(None, alias="historicalMonths", description="Months of historical data behind the baseline (default FORECAST_ETS_MAX_MONTHS, enough for a SARIMAX fit that supports carryover)")
+    forecast_horizon: Optional[int] = Field(6, alias="forecastHorizon", ge=1, le=60, description="Number of periods to forecast")
+    scenarios: List[Scenario] = Field(..., min_length=1, max_length=500)
+
+    class Config:
+        populate_by_name = True
+        json_schema_extra = {
+            "example": {
+                "productId": "PROD-12345",
+                "forecastHorizon": 6,
+                "scenarios": [
+                    {"name": "promo", "shocks": [{"type": "multiplicative", "value": 1.2, "startPeriod": 3}]},
+                    {"name": "supplier outage", "shocks": [{"type": "multiplicative", "value": 0, "startPeriod": 4, "endPeriod": 5}]}
+                ]
+            }
+        }
+
+
+class ReconciliationMethod(str, Enum):
+    BOTTOM_UP = "bottom_up"
+    MINT = "mint"
+
+
+class HierarchyForecastRequest(BaseModel):
+    """
+    Request model for category-level hierarchical forecasting.
+    """
+    categories: Optional[List[str]] = Field(None, description="Categories to forecast (default all)")
+    product_ids: Optional[List[str]] = Field(None, alias="productIds", max_length=50000, description="Restrict to these products")
+    historical_months: Optional[int] = Field(24, alias="historicalMonths", description="Months of historical data to use")
+    forecast_horizon: Optional[int] = Field(6, alias="forecastHorizon", ge=1, le=36, description="Number of periods to forecast")
+    reconciliation: Optional[ReconciliationMethod] = Field(ReconciliationMethod.BOTTOM_UP, description="How levels are made consistent")
+    engine: Optional[ForecastEngine] = Field(ForecastEngine.AUTO, description="Model engine for fitted series")
+    include_products: Optional[bool] = Field(True, alias="includeProducts", description="Return product-level forecasts")
+    
+    class Config:
+        populate_by_name = True
+        json_schema_extra = {
+            "example": {
+                "categories": ["Electronics"],
+                "forecastHorizon": 6,
+                "reconciliation": "mint"
+            }
+        }
+
+
 class ConfidenceInterval(BaseModel):
     """Confidence interval for a forecast point."""
     lower_bound: float = Field(..., alias="lowerBound")
@@ -0,0 +1,341 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .db_pool import db_pool
+from .executor import fit_executor
+from .model import ForecastModel
+from .smoothing import ExponentialSmoothingEngine, to_padded_matrix
+from .intermittent import IntermittentDemandEngine
+
+METRICS = ("mape", "smape", "mase", "coverage")
+
+# Shortest training window a fold may use
+MIN_TRAIN_MONTHS = 6
+
+# (product_id, training series, actual values for the horizon)
+Fold = Tuple[str, pd.Series, np.ndarray]
+
+
+class Backtester:
+    """
+    Rolling-origin backtesting of the forecasting engines.
+
+    For every product the history is cut at `origins` points, `step`
+    months apart, ending `horizon` months before the last observation.
+    Each fold is fitted on the data before its origin and scored on the
+    following months. SARIMAX folds run one per worker; exponential
+    smoothing and intermittent-demand folds are fitted together in
+    vectorized chunks.
+
+    Metrics:
+        mape: Mean absolute percentage error (zero actuals skipped)
+        smape: Symmetric MAPE, 0-2 scale
+        mase: MAE scaled by the in-sample (seasonal) naive MAE of each fold
+        coverage: Share of actuals inside the 95% forecast interval
+
+    Environment variables:
+        FORECAST_BACKTEST_ORIGINS: Forecast origins per product (default 3)
+        FORECAST_BACKTEST_HORIZON: Months scored after each origin (default 3)
+        FORECAST_BACKTEST_STEP: Months between origins (default 1)
+        FORECAST_BACKTEST_HISTORY: Months of history to load (default 36)
+    """
+
+    def __init__(self, model: Optional[ForecastModel] = None):
+        self.model = model or ForecastModel()
+        self.origins = int(os.getenv("FORECAST_BACKTEST_ORIGINS", 3))
+        self.horizon = int(os.getenv("FORECAST_BACKTEST_HORIZON", 3))
+        self.step = int(os.getenv("FORECAST_BACKTEST_STEP", 1))
+        self.historical_months = int(os.getenv("FORECAST_BACKTEST_HISTORY", 36))
+        self.chunk_size = 500
+        self.smoothing_chunk_size = 5000
+
+    async def run(
+        self,
+        product_ids: Optional[List[str]] = None,
+        horizon: Optional[int] = None,
+        origins: Optional[int] = None,
+        step: Optional[int] = None,
+        historical_months: Optional[int] = None,
+        engine: str = "auto",
+        metrics: Optional[Sequence[str]] = None,
+        include_folds: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Backtest products and summarize accuracy.
+
+        Args:
+            product_ids: Products to evaluate; default is every product
+                with sales in the history window
+            horizon: Months scored after each origin
+            origins: Number of forecast origins per product
+            step: Months between consecutive origins
+            historical_months: Months of history to load
+            engine: 'auto', 'sarimax', 'ets' or 'intermittent'
+            metrics: Subset of METRICS to report (default all)
+            include_folds: Also return per-fold metrics for each product
+
+        Returns:
+            Dict with the config, overall metrics and per-product metrics
+        """
+        started = time.perf_counter()
+        horizon = horizon or self.horizon
+        origins = origins or self.origins
+        step = step or self.step
+        historical_months = historical_months or self.historical_months
+        metrics = list(metrics or METRICS)
+        unknown = [m for m in metrics if m not in METRICS]
+        if unknown:
+            raise ValueError(f"Unknown backtest metrics: {', '.join(unknown)}")
+
+        if product_ids is None:
+            product_ids = await self.model.data_loader.get_products_with_sales(historical_months)
+        print(f"Backtesting {len(product_ids)} products: horizon={horizon}, origins={origins}, step={step}")
+
+        fold_results: List[Dict[str, Any]] = []
+        skipped: List[str] = []
+        for offset in range(0, len(product_ids), self.chunk_size):
+            chunk = product_ids[offset:offset + self.chunk_size]
+            series_by_product = self.model.series_from_matrix(
+                chunk, *await self.model.data_loader.get_sales_matrix(chunk, historical_months, use_store=True)
+            )
+
+            folds: List[Fold] = []
+            for product_id in chunk:
+                time_series = series_by_product[product_id]
+                product_folds = [] if time_series is None else make_folds(
+                    product_id, time_series, horizon, origins, step
+                )
+                if not product_folds:
+                    skipped.append(product_id)
+                folds.extend(product_folds)
+
+            fold_results.extend(await self._evaluate(folds, horizon, engine))
+            print(f"Backtested {min(offset + self.chunk_size, len(product_ids))}/{len(product_ids)} products")
+
+        by_product: Dict[str, List[Dict[str, Any]]] = {}
+        for fold in fold_results:
+            by_product.setdefault(fold["productId"], []).append(fold)
+
+        products = []
+        for product_id, folds in by_product.items():
+            entry = {
+                "productId": product_id,
+                "folds": len(folds),
+                "engines": sorted({f["engine"] for f in folds}),
+                **score_folds(folds, metrics),
+            }
+            if include_folds:
+                entry["foldMetrics"] = [
+                    {"origin": f["origin"], "engine": f["engine"], **score_folds([f], metrics)}
+                    for f in folds
+                ]
+            products.append(entry)
+
+        return {
+            "config": {
+                "horizon": horizon,
+                "origins": origins,
+                "step": step,
+                "historicalMonths": historical_months,
+                "engine": engine,
+                "metrics": metrics,
+            },
+            "summary": {
+                "products": len(products),
+                "folds": len(fold_results),
+                "skippedProducts": len(skipped),
+                "durationSeconds": round(time.perf_counter() - started, 3),
+                **score_folds(fold_results, metrics),
+            },
+            "products": products,
+            "skipped": skipped,
+        }
+
+    async def _evaluate(self, folds: List[Fold], horizon: int, engine: str) -> List[Dict[str, Any]]:
+        """Fit and forecast every fold in the worker pool."""
+        vectorized_folds: Dict[str, List[Fold]] = {"ets": [], "intermittent": []}
+        jobs = []
+        sparse = self.model.intermittent_mask([train for _, train, _ in folds])
+        for fold, intermittent in zip(folds, sparse):
+            selected = self.model.select_engine(len(fold[1]), engine, intermittent)
+            if selected != "sarimax":
+                vectorized_folds[selected].append(fold)
+            else:
+                jobs.append(fit_executor.run(run_backtest_job, [fold], horizon, "sarimax", wait=True))
+
+        for selected, engine_folds in vectorized_folds.items():
+            for offset in range(0, len(engine_folds), self.smoothing_chunk_size):
+                chunk = engine_folds[offset:offset + self.smoothing_chunk_size]
+                jobs.append(fit_executor.run(run_backtest_job, chunk, horizon, selected, wait=True))
+
+        results: List[Dict[str, Any]] = []
+        for outcome in await asyncio.gather(*jobs, return_exceptions=True):
+            if isinstance(outcome, Exception):
+                print(f"Backtest job failed: {outcome}")
+                continue
+            results.extend(outcome)
+        return results
+
+
+def make_folds(
+    product_id: str,
+    time_series: pd.Series,
+    horizon: int,
+    origins: int,
+    step: int
+) -> List[Fold]:
+    """
+    Rolling-origin splits of one series, oldest origin first.
+
+    The last origin leaves exactly `horizon` months to score; origins that
+    would leave fewer than MIN_TRAIN_MONTHS of training data are dropped.
+    """
+    n = len(time_series)
+    folds = []
+    for i in reversed(range(origins)):
+        origin = n - horizon - i * step
+        if origin < MIN_TRAIN_MONTHS:
+            continue
+        folds.append((
+            product_id,
+            time_series.iloc[:origin],
+            time_series.values[origin:origin + horizon].astype(float),
+        ))
+    return folds
+
+
+def naive_scale(values: np.ndarray) -> float:
+    """
+    In-sample MAE of the naive forecast (seasonal naive with two years of data).
+
+    Returns:
+        The MASE denominator, or NaN when it is zero or undefined
+    """
+    lag = 12 if len(values) >= 24 else 1
+    if len(values) <= lag:
+        return float("nan")
+    scale = float(np.mean(np.abs(values[lag:] - values[:-lag])))
+    return scale if scale > 0 else float("nan")
+
+
+def run_backtest_job(folds: List[Fold], horizon: int, engine: str) -> List[Dict[str, Any]]:
+    """
+    Process-pool entry point: forecast a list of folds with one engine.
+
+    Returns:
+        One dict per fold with the forecast, bounds, actuals and MASE scale
+    """
+    if engine in ("ets", "intermittent"):
+        matrix = to_padded_matrix([train.values.astype(float) for _, train, _ in folds])
+        fitter = ExponentialSmoothingEngine() if engine == "ets" else IntermittentDemandEngine()
+        fit = fitter.fit_forecast(matrix, horizon)
+        forecasts = [(fit["mean"][i], fit["lower"][i], fit["upper"][i]) for i in range(len(folds))]
+    else:
+        model = ForecastModel()
+        forecasts = []
+        for product_id, train, _ in folds:
+            try:
+                forecasts.append(model.sarimax_interval_forecast(train, horizon))
+            except Exception as e:
+                print(f"Backtest fit failed for {product_id}: {e}")
+                forecasts.append(None)
+
+    results = []
+    for (product_id, train, actual), forecast in zip(folds, forecasts):
+        if forecast is None:
+            continue
+        mean, lower, upper = forecast
+        results.append({
+            "productId": product_id,
+            "origin": (train.index[-1] + pd.offsets.MonthBegin(1)).strftime('%Y-%m-%d'),
+            "engine": engine,
+            "actual": actual,
+            "forecast": np.asarray(mean, dtype=float)[:len(actual)],
+            "lower": np.asarray(lower, dtype=float)[:len(actual)],
+            "upper": np.asarray(upper, dtype=float)[:len(actual)],
+            "scale": naive_scale(train.values.astype(float)),
+        })
+    return results
+
+
+def score_folds(folds: List[Dict[str, Any]], metrics: Sequence[str] = METRICS) -> Dict[str, Optional[float]]:
+    """
+    Pool the forecast errors of many folds and compute the requested metrics.
+
+    Returns:
+        Dict of metric -> value (None when undefined, e.g. all-zero actuals)
+    """
+    if not folds:
+        return {metric: None for metric in metrics}
+
+    actual = np.concatenate([f["actual"] for f in folds])
+    forecast = np.concatenate([f["forecast"] for f in folds])
+    lower = np.concatenate([f["lower"] for f in folds])
+    upper = np.concatenate([f["upper"] for f in folds])
+    scale = np.concatenate([np.full(len(f["actual"]), f["scale"]) for f in folds])
+    abs_error = np.abs(actual - forecast)
+
+    def mean_or_none(values: np.ndarray) -> Optional[float]:
+        values = values[np.isfinite(values)]
+        return round(float(values.mean()), 4) if len(values) else None
+
+    scores: Dict[str, Optional[float]] = {}
+    for metric in metrics:
+        if metric == "mape":
+            nonzero = actual != 0
+            scores[metric] = mean_or_none(abs_error[nonzero] / np.abs(actual[nonzero]))
+        elif metric == "smape":
+            denominator = (np.abs(actual) + np.abs(forecast)) / 2
+            defined = denominator > 0
+            scores[metric] = mean_or_none(abs_error[defined] / denominator[defined])
+        elif metric == "mase":
+            scores[metric] = mean_or_none(abs_error / scale)
+        elif metric == "coverage":
+            scores[metric] = mean_or_none(((actual >= lower) & (actual <= upper)).astype(float))
+    return scores
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest over the catalog")
+    parser.add_argument("--products", nargs="*", help="Only these product IDs")
+    parser.add_argument("--horizon", type=int, help="Months scored after each origin")
+    parser.add_argument("--origins", type=int, help="Forecast origins per product")
+    parser.add_argument("--step", type=int, help="Months between origins")
+    parser.add_argument("--history", type=int, help="Months of history to load")
+    parser.add_argument("--engine", default="auto", choices=["auto", "sarimax", "ets", "intermittent"])
+    parser.add_argument("--metrics", nargs="*", choices=list(METRICS), help="Metrics to report")
+    parser.add_argument("--folds", action="store_true", help="Include per-fold metrics")
+    parser.add_argument("--output", help="Write the full JSON report to this file")
+    args = parser.parse_args()
+
+    from .rollup import sales_rollup
+
+    try:
+        await sales_rollup.ensure_ready()
+        report = await Backtester().run(
+            product_ids=args.products or None,
+            horizon=args.horizon,
+            origins=args.origins,
+            step=args.step,
+            historical_months=args.history,
+            engine=args.engine,
+            metrics=args.metrics,
+            include_folds=args.folds,
+        )
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"Backtest report written to {args.output}")
+        print(json.dumps({"config": report["config"], "summary": report["summary"]}, indent=2))
+    finally:
+        fit_executor.shutdown()
+        await db_pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,414 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+import contextlib
+import numpy as np
+import pandas as pd
+import statsmodels
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from .cache import ForecastCache
+from .data_loader import DataLoader
+from .executor import fit_executor, ExecutorSaturatedError
+from .model import ForecastModel
+from .preprocessor import Preprocessor
+
+MODES = ("single", "batch", "concurrent")
+
+# Shapes mixed into the synthetic catalog, in rotation
+SHAPES = ("trend", "seasonal", "trend_seasonal", "intermittent", "flat")
+
+
+def make_series(length: int, shape: str, seed: int, end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Reproducible synthetic monthly sales in DataLoader's row format.
+
+    Args:
+        length: Months from the first to the last generated month
+        shape: One of SHAPES
+        seed: RNG seed; the same (length, shape, seed) always gives the same rows
+        end: Last month (default: current month)
+
+    Returns:
+        DataFrame with columns sale_date, total_quantity; zero months are
+        omitted, as they are in the database aggregates
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(length, dtype=float)
+    level = rng.uniform(20, 400)
+
+    values = np.full(length, level)
+    if shape in ("trend", "trend_seasonal"):
+        values += level * rng.uniform(-0.02, 0.04) * t
+    if shape in ("seasonal", "trend_seasonal"):
+        values *= 1 + rng.uniform(0.2, 0.5) * np.sin(2 * np.pi * (t + rng.integers(12)) / 12)
+    values *= rng.normal(1.0, 0.12, length)
+
+    if shape == "intermittent":
+        # Croston-style demand: most months empty, lumpy sizes otherwise
+        values = np.where(rng.random(length) < 0.35, rng.gamma(2.0, level / 4, length), 0.0)
+        # Keep the generated span: first and last month always sell
+        values[0] = max(values[0], 1.0)
+        values[-1] = max(values[-1], 1.0)
+
+    quantities = np.maximum(np.round(values), 1 if shape != "intermittent" else 0).astype(int)
+
+    end = end if end is not None else pd.Timestamp.now().to_period("M").to_timestamp()
+    months = pd.date_range(end=end, periods=length, freq="MS")
+    sold = quantities > 0
+    return pd.DataFrame({"sale_date": months[sold], "total_quantity": quantities[sold]})
+
+
+def make_catalog(products: int, min_length: int = 3, max_length: int = 120, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """
+    Synthetic catalog with lengths spread evenly over [min_length, max_length]
+    and shapes assigned in rotation.
+
+    Returns:
+        Dict of product_id -> sales rows (see make_series)
+    """
+    lengths = np.linspace(min_length, max_length, products).round().astype(int)
+    end = pd.Timestamp.now().to_period("M").to_timestamp()
+    return {
+        f"BENCH{i:05d}": make_series(int(length), SHAPES[i % len(SHAPES)], seed + i, end)
+        for i, length in enumerate(lengths)
+    }
+
+
+class SyntheticDataLoader(DataLoader):
+    """
+    DataLoader serving a synthetic catalog from memory.
+
+    Sales watermarks are not reported, so the forecast cache is bypassed
+    and every request measures the full pipeline.
+    """
+
+    def __init__(self, catalog: Dict[str, pd.DataFrame]):
+        super().__init__()
+        self.catalog = catalog
+
+    def _window(self, df: pd.DataFrame, months: int) -> pd.DataFrame:
+        start = (pd.Timestamp.now().to_period("M") - months).to_timestamp()
+        return df[df["sale_date"] >= start].reset_index(drop=True)
+
+    async def get_sales_data(self, product_id: str, months: int = 24) -> pd.DataFrame:
+        df = self.catalog.get(product_id)
+        return self._window(df, months) if df is not None else pd.DataFrame()
+
+    async def get_sales_series(self, product_id: str, months: int = 24, granularity: str = "month") -> pd.DataFrame:
+        if granularity != "month":
+            raise ValueError("The synthetic catalog is monthly")
+        df = await self.get_sales_data(product_id, months)
+        if df.empty:
+            return df
+        # Dense rows, as the SQL gap filling returns them
+        months_index = pd.date_range(df["sale_date"].iloc[0], df["sale_date"].iloc[-1], freq="MS")
+        quantities = df.set_index("sale_date")["total_quantity"].reindex(months_index, fill_value=0)
+        return pd.DataFrame({"sale_date": months_index, "total_quantity": quantities.to_numpy()})
+
+    async def get_sales_data_batch(
+        self,
+        product_ids: List[str],
+        months: int = 24,
+        use_store: bool = False
+    ) -> Dict[str, pd.DataFrame]:
+        return {
+            product_id: self._window(self.catalog[product_id], months)
+            for product_id in product_ids
+            if product_id in self.catalog
+        }
+
+    async def get_sales_matrix(
+        self,
+        product_ids: List[str],
+        months: int = 24,
+        use_store: bool = False
+    ) -> Tuple[List[str], pd.DatetimeIndex, np.ndarray, np.ndarray]:
+        frames = [
+            df.assign(product_id=product_id)
+            for product_id, df in sorted((await self.get_sales_data_batch(product_ids, months)).items())
+            if not df.empty
+        ]
+        return Preprocessor().prepare_matrix(pd.concat(frames, ignore_index=True) if frames else pd.DataFrame())
+
+    async def get_sales_watermark(self, product_id: str) -> Optional[str]:
+        return None
+
+    async def get_products_with_sales(self, months: int = 24) -> List[str]:
+        return list(self.catalog)
+
+
+class _MemoryParamStore:
+    """In-process stand-in for ParameterStore (enables the warm-start path)."""
+
+    def __init__(self):
+        self.states: Dict[str, Dict[str, Any]] = {}
+
+    async def get(self, product_id: str, model_spec: str) -> Optional[Dict[str, Any]]:
+        state = self.states.get(product_id)
+        return state if state is not None and state["modelSpec"] == model_spec else None
+
+    async def get_many(self, product_ids: List[str], model_spec: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        return {
+            f"{pid}|{self.states[pid]['modelSpec']}": self.states[pid]
+            for pid in product_ids if pid in self.states
+        }
+
+    async def save(self, product_id: str, state: Dict[str, Any]) -> None:
+        self.states[product_id] = state
+
+    async def save_many(self, states: Dict[str, Dict[str, Any]]) -> None:
+        self.states.update(states)
+
+
+class _NoStore:
+    """Stand-in for the precomputed-forecast and model-order stores."""
+
+    async def get(self, *args, **kwargs):
+        return None
+
+    async def get_many(self, *args, **kwargs):
+        return {}
+
+    async def save_many(self, *args, **kwargs):
+        return None
+
+
+class ForecastBenchmark:
+    """
+    Latency and throughput benchmark for ForecastModel.
+
+    Runs the real model and worker pool against a synthetic catalog
+    injected through SyntheticDataLoader, so no database is needed and
+    runs are reproducible for a given seed. Parameter persistence is kept
+    in memory: with warm=True every product is fitted once before timing,
+    so the measured requests take the stored-parameter path.
+
+    Modes:
+        single: Sequential generate_forecast calls
+        batch: One generate_batch_forecast over the catalog; latency is the
+            time until each product's result is yielded
+        concurrent: generate_forecast calls with `concurrency` in flight
+    """
+
+    def __init__(
+        self,
+        products: int = 200,
+        min_length: int = 3,
+        max_length: int = 120,
+        periods: int = 6,
+        engine: str = "auto",
+        concurrency: int = 16,
+        warm: bool = False,
+        seed: int = 0
+    ):
+        self.catalog = make_catalog(products, min_length, max_length, seed)
+        self.periods = periods
+        self.engine = engine
+        self.concurrency = concurrency
+        self.warm = warm
+        self.seed = seed
+        self.min_length = min_length
+        self.max_length = max_length
+        # Longest synthetic series always fits in the loaded window
+        self.historical_months = max_length + 1
+        self.model = ForecastModel(
+            data_loader=SyntheticDataLoader(self.catalog),
+            cache=ForecastCache(),
+            params=_MemoryParamStore(),
+            precomputed=_NoStore(),
+            orders=_NoStore()
+        )
+
+    async def run(self, modes: List[str]) -> Dict[str, Any]:
+        """
+        Run the requested modes in order.
+
+        Returns:
+            Report with the configuration, environment and one entry per mode
+        """
+        product_ids = list(self.catalog)
+
+        # Start the worker pool and import statsmodels in the workers before timing
+        await self._forecast_all(product_ids[-min(len(product_ids), fit_executor.max_workers):])
+        if self.warm:
+            await self._forecast_all(product_ids)
+
+        results = {}
+        for mode in modes:
+            runner = getattr(self, f"_run_{mode}")
+            started = time.perf_counter()
+            latencies = await runner(product_ids)
+            elapsed = time.perf_counter() - started
+            results[mode] = summarize(latencies, elapsed)
+            print(f"{mode}: {json.dumps(results[mode])}", file=sys.stderr)
+
+        return {
+            "startedAt": datetime.now(timezone.utc).isoformat(),
+            "config": {
+                "products": len(product_ids),
+                "minLength": self.min_length,
+                "maxLength": self.max_length,
+                "periods": self.periods,
+                "engine": self.engine,
+                "concurrency": self.concurrency,
+                "warm": self.warm,
+                "seed": self.seed,
+            },
+            "environment": environment(),
+            "modes": results,
+        }
+
+    async def _forecast_all(self, product_ids: List[str]) -> None:
+        async for _ in self.model.generate_batch_forecast(product_ids, self.periods, self.historical_months, self.engine):
+            pass
+
+    async def _timed_forecast(self, product_id: str) -> float:
+        started = time.perf_counter()
+        await self.model.generate_forecast(
+            product_id, self.periods, self.historical_months, engine=self.engine
+        )
+        return time.perf_counter() - started
+
+    async def _run_single(self, product_ids: List[str]) -> List[float]:
+        return [await self._timed_forecast(product_id) for product_id in product_ids]
+
+    async def _run_batch(self, product_ids: List[str]) -> List[float]:
+        started = time.perf_counter()
+        latencies = []
+        async for _ in self.model.generate_batch_forecast(product_ids, self.periods, self.historical_months, self.engine):
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    async def _run_concurrent(self, product_ids: List[str]) -> List[float]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(product_id: str) -> float:
+            async with semaphore:
+                # Like the API, wait for pool capacity instead of failing with 503
+                while True:
+                    try:
+                        return await self._timed_forecast(product_id)
+                    except ExecutorSaturatedError:
+                        await asyncio.sleep(0.01)
+
+        return list(await asyncio.gather(*[limited(product_id) for product_id in product_ids]))
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, Any]:
+    """Latency percentiles (ms), throughput and peak memory for one mode."""
+    values = np.asarray(latencies, dtype=float) * 1000
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        "requests": len(values),
+        "elapsedSeconds": round(elapsed, 3),
+        "fitsPerSecond": round(len(values) / elapsed, 2) if elapsed > 0 else None,
+        "p50Ms": round(float(np.percentile(values, 50)), 3) if len(values) else None,
+        "p90Ms": round(float(np.percentile(values, 90)), 3) if len(values) else None,
+        "p99Ms": round(float(np.percentile(values, 99)), 3) if len(values) else None,
+        "maxMs": round(float(values.max()), 3) if len(values) else None,
+        # ru_maxrss is in KiB on Linux; peaks are process-lifetime, so later modes include earlier ones
+        "peakRssMb": round(usage.ru_maxrss / 1024, 1),
+        "peakWorkerRssMb": worker_peak_rss_mb(),
+    }
+
+
+def worker_peak_rss_mb() -> Optional[float]:
+    """
+    Largest peak RSS among the live worker processes (Linux /proc VmHWM).
+
+    getrusage(RUSAGE_CHILDREN) only covers exited children, and pool
+    workers stay alive for the whole run.
+    """
+    processes = getattr(fit_executor._executor, "_processes", None) or {}
+    peaks = []
+    for pid in list(processes):
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        peaks.append(int(line.split()[1]) / 1024)
+        except OSError:
+            continue
+    return round(max(peaks), 1) if peaks else None
+
+
+def environment() -> Dict[str, Any]:
+    """Versions and worker settings that affect results."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpuCount": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "statsmodels": statsmodels.__version__,
+        "workerKind": fit_executor.kind,
+        "maxWorkers": fit_executor.max_workers,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Relative change of each mode's p50/p99 and throughput against a baseline report.
+
+    Returns:
+        Dict of mode -> {metric: change as a fraction, e.g. -0.12 for 12% lower}
+    """
+    changes = {}
+    for mode, current in report["modes"].items():
+        previous = baseline.get("modes", {}).get(mode)
+        if not previous:
+            continue
+        changes[mode] = {
+            metric: round(current[metric] / previous[metric] - 1, 4)
+            if current.get(metric) is not None and previous.get(metric) else None
+            for metric in ("p50Ms", "p99Ms", "fitsPerSecond")
+        }
+    return changes
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ForecastModel on synthetic series")
+    parser.add_argument("--modes", nargs="*", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--products", type=int, default=200, help="Synthetic products")
+    parser.add_argument("--min-length", type=int, default=3, help="Shortest series (months)")
+    parser.add_argument("--max-length", type=int, default=120, help="Longest series (months)")
+    parser.add_argument("--periods", type=int, default=6, help="Forecast horizon")
+    parser.add_argument("--engine", default="auto", choices=["auto", "sarimax", "ets", "intermittent"])
+    parser.add_argument("--concurrency", type=int, default=16, help="In-flight requests in concurrent mode")
+    parser.add_argument("--warm", action="store_true", help="Fit once first so timed runs reuse stored params")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Keep the model's per-forecast logging")
+    args = parser.parse_args()
+
+    benchmark = ForecastBenchmark(
+        args.products, args.min_length, args.max_length, args.periods,
+        args.engine, args.concurrency, args.warm, args.seed
+    )
+    try:
+        with open(os.devnull, "w") as devnull:
+            with contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+                report = await benchmark.run(args.modes)
+    finally:
+        fit_executor.shutdown()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,174 @@
+import os
+import copy
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+
+class ForecastCache:
+    """
+    In-process LRU + TTL cache for forecast results.
+
+    Keys are (product_id, periods, historical_months, variant, watermark),
+    where variant captures request options such as the engine. The
+    watermark changes whenever new sales land for the product, so stale
+    entries are never served; they simply age out.
+
+    Entry sizes are estimated from their JSON encoding and the cache evicts
+    least-recently-used entries to stay under the memory budget.
+
+    Environment variables:
+        FORECAST_CACHE_TTL: Seconds a forecast stays valid (default 900)
+        FORECAST_CACHE_MAX_BYTES: Memory budget in bytes (default 64 MiB)
+        FORECAST_WATERMARK_TTL: Seconds a product's watermark is trusted
+            without asking the database again (default 60)
+    """
+
+    def __init__(self):
+        self.ttl = float(os.getenv("FORECAST_CACHE_TTL", 900))
+        self.max_bytes = int(os.getenv("FORECAST_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+        self.watermark_ttl = float(os.getenv("FORECAST_WATERMARK_TTL", 60))
+
+        # key -> (expires_at, size_bytes, value)
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._keys_by_product: Dict[str, Set[Hashable]] = {}
+        self._watermarks: Dict[str, Tuple[float, Any]] = {}
+        self._bytes = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @staticmethod
+    def make_key(
+        product_id: str,
+        periods: int,
+        historical_months: int,
+        watermark: Any,
+        variant: str = "auto"
+    ) -> Tuple:
+        """Build the cache key for a forecast request."""
+        return (product_id, periods, historical_months, variant, watermark)
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """
+        Look up a cached forecast.
+
+        Returns:
+            A copy of the cached value, or None on miss/expiry
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self._expirations += 1
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return copy.deepcopy(value)
+
+    def set(self, key: Tuple, value: Any) -> None:
+        """
+        Store a forecast, replacing entries for older watermarks of the
+        same product/horizon/variant and evicting LRU entries over budget.
+        """
+        product_id = key[0]
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+
+        # An entry for a newer watermark supersedes the old one
+        for old_key in list(self._keys_by_product.get(product_id, ())):
+            if old_key[:4] == key[:4] and old_key != key:
+                self._remove(old_key)
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic() + self.ttl, size, copy.deepcopy(value))
+        self._keys_by_product.setdefault(product_id, set()).add(key)
+        self._bytes += size
+
+        while self._bytes > self.max_bytes and self._entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self._evictions += 1
+
+    def get_watermark(self, product_id: str) -> Optional[Any]:
+        """Return the memoized data watermark for a product, if still fresh."""
+        entry = self._watermarks.get(product_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set_watermark(self, product_id: str, watermark: Any) -> None:
+        """Memoize a product's data watermark for FORECAST_WATERMARK_TTL seconds."""
+        self._watermarks[product_id] = (time.monotonic() + self.watermark_ttl, watermark)
+
+    def keys_for_product(self, product_id: str) -> List[Tuple]:
+        """Keys of every forecast currently cached for a product."""
+        return list(self._keys_by_product.get(product_id, ()))
+
+    def invalidate_product(self, product_id: str) -> int:
+        """
+        Drop every cached forecast and the watermark for a product.
+
+        Returns:
+            Number of forecast entries removed
+        """
+        self._watermarks.pop(product_id, None)
+        keys = list(self._keys_by_product.get(product_id, ()))
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop all cached forecasts and watermarks."""
+        self._entries.clear()
+        self._keys_by_product.clear()
+        self._watermarks.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry[1]
+        product_keys = self._keys_by_product.get(key[0])
+        if product_keys is not None:
+            product_keys.discard(key)
+            if not product_keys:
+                del self._keys_by_product[key[0]]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss/eviction counters and memory usage.
+
+        Returns:
+            Dict of cache statistics
+        """
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "ttlSeconds": self.ttl,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hitRatio": round(self._hits / lookups, 3) if lookups else 0.0,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "trackedWatermarks": len(self._watermarks),
+        }
+
+
+# Process-wide cache shared by every ForecastModel
+forecast_cache = ForecastCache()
@@ -0,0 +1,356 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from .db_pool import DatabasePool, db_pool
+from .schema import SalesSchema, sales_schema
+from .migrations import TRIGGER_LOCK_ID
+from .cache import ForecastCache, forecast_cache
+from .rollup import SalesRollup, sales_rollup
+from .forecast_store import PrecomputedForecastStore, precomputed_store
+from .executor import ExecutorSaturatedError
+from .model import ForecastModel
+
+# Notified by the order_items trigger installed by SalesChangeListener.sync_trigger
+CHANNEL = "forecast_sales_changed"
+
+# Rendered with the product column SalesSchema detected, so each write
+# reads one column instead of converting the whole row to JSON.
+# Notifications are sent on commit and Postgres folds duplicates within
+# a transaction, so bulk loads of one product notify once.
+TRIGGER_FUNCTION_SQL = """
+    CREATE OR REPLACE FUNCTION forecast_notify_sales_change() RETURNS trigger AS $$
+    DECLARE
+        new_product TEXT;
+        old_product TEXT;
+    BEGIN
+        IF TG_OP <> 'DELETE' THEN
+            new_product := {new_product};
+            IF new_product IS NOT NULL THEN
+                PERFORM pg_notify('forecast_sales_changed', new_product);
+            END IF;
+        END IF;
+        IF TG_OP <> 'INSERT' THEN
+            old_product := {old_product};
+            IF old_product IS NOT NULL AND old_product IS DISTINCT FROM new_product THEN
+                PERFORM pg_notify('forecast_sales_changed', old_product);
+            END IF;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+CREATE_TRIGGER_SQL = """
+    DO $$
+    BEGIN
+        IF to_regclass('order_items') IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM pg_trigger
+            WHERE tgname = 'forecast_sales_changed' AND tgrelid = to_regclass('order_items')
+        ) THEN
+            CREATE TRIGGER forecast_sales_changed
+                AFTER INSERT OR UPDATE OR DELETE ON order_items
+                FOR EACH ROW EXECUTE FUNCTION forecast_notify_sales_change();
+        END IF;
+    END;
+    $$;
+"""
+
+DROP_TRIGGER_SQL = """
+    DO $$
+    BEGIN
+        IF to_regclass('order_items') IS NOT NULL THEN
+            DROP TRIGGER IF EXISTS forecast_sales_changed ON order_items;
+        END IF;
+    END;
+    $$;
+    DROP FUNCTION IF EXISTS forecast_notify_sales_change();
+"""
+
+# Seconds between liveness probes of the idle LISTEN connection
+_PROBE_INTERVAL = 30.0
+
+
+class SalesChangeListener:
+    """
+    Turns order_items change notifications into targeted refreshes.
+
+    Holds one dedicated LISTEN connection on forecast_sales_changed, where
+    the order_items trigger publishes the affected product IDs. IDs are
+    collected and flushed once notifications have been quiet for the
+    debounce window, or at the latest max-delay seconds after the first
+    one, so a bulk import costs one flush. A flush:
+        1. re-aggregates the products' recent months in the rollup
+        2. drops their cached and precomputed forecasts
+        3. optionally re-forecasts, in the background, every request shape
+           that was cached for them (the hot products), warming the cache
+
+    The feed is opt-in because the trigger runs on every order_items write
+    (one plpgsql call and a pg_notify, whose queue lock serializes
+    commits). sync_trigger() installs it when the feed is enabled and
+    drops it otherwise, so turning the feed off removes that write cost.
+
+    The connection is re-opened after failures. Changes made while it is
+    down are still picked up by the scheduled rollup refresh and the
+    cache's watermark check, just later.
+
+    Environment variables:
+        FORECAST_CHANGE_FEED: Set to 'true' to install the order_items trigger
+            and listen (default false)
+        FORECAST_CHANGE_DEBOUNCE: Quiet seconds before a flush (default 2)
+        FORECAST_CHANGE_MAX_DELAY: Longest a change waits for its flush, in
+            seconds (default 10)
+        FORECAST_CHANGE_REFORECAST: Re-forecast hot products after a flush
+            (default false)
+        FORECAST_CHANGE_REFORECAST_MAX: Most re-forecasts queued per flush
+            (default 100)
+    """
+
+    def __init__(
+        self,
+        pool: Optional[DatabasePool] = None,
+        rollup: Optional[SalesRollup] = None,
+        cache: Optional[ForecastCache] = None,
+        precomputed: Optional[PrecomputedForecastStore] = None,
+        model: Optional[ForecastModel] = None,
+        schema: Optional[SalesSchema] = None
+    ):
+        self.pool = pool or db_pool
+        self.schema = schema or sales_schema
+        self.rollup = rollup or sales_rollup
+        self.cache = cache or forecast_cache
+        self.precomputed = precomputed or precomputed_store
+        self.model = model or ForecastModel()
+        self.enabled = os.getenv("FORECAST_CHANGE_FEED", "false").lower() == "true"
+        self.debounce = float(os.getenv("FORECAST_CHANGE_DEBOUNCE", 2))
+        self.max_delay = float(os.getenv("FORECAST_CHANGE_MAX_DELAY", 10))
+        self.reforecast = os.getenv("FORECAST_CHANGE_REFORECAST", "false").lower() == "true"
+        self.reforecast_max = int(os.getenv("FORECAST_CHANGE_REFORECAST_MAX", 100))
+
+        self.connected = False
+        self.trigger_installed: Optional[bool] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._pending: Set[str] = set()
+        self._first_pending_at: Optional[float] = None
+        self._last_notify_at = 0.0
+        # (product_id, periods, historical_months, engine, granularity) -> None, in queue order
+        self._reforecast_queue: "OrderedDict[Tuple, None]" = OrderedDict()
+        self._reforecast_task: Optional[asyncio.Task] = None
+
+        self._notifications = 0
+        self._flushes = 0
+        self._reforecasts = 0
+        self._last_flush: Dict[str, Any] = {}
+
+    async def sync_trigger(self) -> Optional[bool]:
+        """
+        Install or drop the order_items trigger to match FORECAST_CHANGE_FEED.
+
+        Runs with the migrations at startup (and is skipped with them when
+        FORECAST_AUTO_MIGRATE=false). The trigger function is rendered with
+        the detected product column and replaced on every run, so a schema
+        change is picked up on restart.
+
+        Returns:
+            True if the trigger is installed, False if dropped, None if skipped
+        """
+        if os.getenv("FORECAST_AUTO_MIGRATE", "true").lower() in ("0", "false", "no"):
+            return None
+
+        statements = [DROP_TRIGGER_SQL]
+        if self.enabled:
+            await self.schema.ensure_detected(self.pool)
+            statements = [
+                TRIGGER_FUNCTION_SQL.format(
+                    new_product=self.schema.column_expression("product", "NEW"),
+                    old_product=self.schema.column_expression("product", "OLD"),
+                ),
+                CREATE_TRIGGER_SQL,
+            ]
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock($1)", TRIGGER_LOCK_ID)
+                for statement in statements:
+                    await conn.execute(statement)
+
+        self.trigger_installed = self.enabled
+        print(f"Sales change trigger {'installed' if self.enabled else 'dropped'}")
+        return self.trigger_installed
+
+    def start(self) -> None:
+        """Start listening and flushing (called from the app lifespan)."""
+        if self._tasks or not self.enabled:
+            return
+        self._wake = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._listen_forever()),
+            asyncio.create_task(self._flush_forever()),
+        ]
+
+    async def stop(self) -> None:
+        """Stop listening; pending changes are left to the scheduled refresh."""
+        tasks, self._tasks = self._tasks, []
+        if self._reforecast_task is not None:
+            tasks.append(self._reforecast_task)
+            self._reforecast_task = None
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _on_notify(self, conn, pid: int, channel: str, payload: str) -> None:
+        self._notifications += 1
+        if not payload:
+            return
+        now = time.monotonic()
+        if self._first_pending_at is None:
+            self._first_pending_at = now
+        self._last_notify_at = now
+        self._pending.add(payload)
+        self._wake.set()
+
+    async def _listen_forever(self) -> None:
+        backoff = 1.0
+        while True:
+            conn = None
+            try:
+                conn = await self.pool.connect()
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _: closed.set())
+                await conn.add_listener(CHANNEL, self._on_notify)
+                self.connected = True
+                backoff = 1.0
+                print(f"Listening for sales changes on {CHANNEL}")
+
+                # An idle socket would not notice a dead server; probe it
+                while not closed.is_set():
+                    try:
+                        await asyncio.wait_for(closed.wait(), _PROBE_INTERVAL)
+                    except asyncio.TimeoutError:
+                        await conn.execute("SELECT 1")
+                print("Sales change listener connection closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Sales change listener failed: {e}")
+            finally:
+                self.connected = False
+                if conn is not None and not conn.is_closed():
+                    conn.terminate()
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    async def _flush_forever(self) -> None:
+        while True:
+            await self._wake.wait()
+            # Debounce: wait for a quiet window, bounded by the max delay
+            while True:
+                flush_at = min(self._last_notify_at + self.debounce, self._first_pending_at + self.max_delay)
+                remaining = flush_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(remaining)
+
+            self._wake.clear()
+            product_ids = sorted(self._pending)
+            self._pending.clear()
+            self._first_pending_at = None
+            try:
+                await self.flush(product_ids)
+            except Exception as e:
+                print(f"Sales change flush failed: {e}")
+
+    async def flush(self, product_ids: List[str]) -> Dict[str, Any]:
+        """
+        Apply a batch of changed products.
+
+        Args:
+            product_ids: Products whose order lines changed
+
+        Returns:
+            Flush summary (products, rollup refresh, invalidations, re-forecasts queued)
+        """
+        started = time.perf_counter()
+
+        # Rollup first: invalidated entries must not be recomputed from the old months
+        rollup_result = None
+        if self.rollup.ready:
+            rollup_result = await self.rollup.refresh_products(product_ids)
+
+        hot: List[Tuple] = []
+        invalidated = 0
+        for product_id in product_ids:
+            for key in self.cache.keys_for_product(product_id):
+                if key[3].startswith("irf:"):
+                    # Scenario impulse responses are rebuilt on demand
+                    continue
+                engine, _, granularity = key[3].partition(":")
+                hot.append((product_id, key[1], key[2], engine, granularity or "month"))
+            invalidated += self.cache.invalidate_product(product_id)
+        precomputed_deleted = await self.precomputed.delete(product_ids)
+
+        queued = 0
+        if self.reforecast and hot:
+            for request in hot[:self.reforecast_max]:
+                self._reforecast_queue[request] = None
+            queued = min(len(hot), self.reforecast_max)
+            if self._reforecast_task is None or self._reforecast_task.done():
+                self._reforecast_task = asyncio.create_task(self._drain_reforecasts())
+
+        self._flushes += 1
+        self._last_flush = {
+            "products": len(product_ids),
+            "rollup": rollup_result,
+            "cacheEntriesInvalidated": invalidated,
+            "precomputedDeleted": precomputed_deleted,
+            "reforecastsQueued": queued,
+            "durationSeconds": round(time.perf_counter() - started, 3),
+        }
+        print(f"Sales changes applied: {self._last_flush}")
+        return self._last_flush
+
+    async def _drain_reforecasts(self) -> None:
+        """Re-run queued hot requests one at a time, refilling the cache."""
+        while self._reforecast_queue:
+            request, _ = self._reforecast_queue.popitem(last=False)
+            product_id, periods, historical_months, engine, granularity = request
+            try:
+                await self.model.generate_forecast(
+                    product_id, periods, historical_months,
+                    engine=engine, granularity=granularity, latency_budget=0
+                )
+                self._reforecasts += 1
+            except ExecutorSaturatedError:
+                # Interactive traffic has priority; the next request refits on demand
+                print(f"Fit queue full, skipping re-forecast of product {product_id}")
+            except Exception as e:
+                print(f"Re-forecast of product {product_id} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Listener state, debounce settings and the last flush."""
+        return {
+            "enabled": self.enabled,
+            "connected": self.connected,
+            "triggerInstalled": self.trigger_installed,
+            "channel": CHANNEL,
+            "debounceSeconds": self.debounce,
+            "maxDelaySeconds": self.max_delay,
+            "notifications": self._notifications,
+            "pendingProducts": len(self._pending),
+            "flushes": self._flushes,
+            "reforecast": self.reforecast,
+            "reforecastsQueued": len(self._reforecast_queue),
+            "reforecastsCompleted": self._reforecasts,
+            "lastFlush": self._last_flush or None,
+        }
+
+
+# Process-wide listener started by the app lifespan
+sales_change_listener = SalesChangeListener()
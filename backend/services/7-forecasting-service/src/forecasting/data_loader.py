@@ -1,38 +1,176 @@
 import os
+import io
+import json
+import base64
+import struct
+import numpy as np
 import pandas as pd
-import asyncpg
-from dotenv import load_dotenv
-from typing import Optional
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from .db_pool import DatabasePool, db_pool
+from .rollup import SalesRollup, sales_rollup
+from .schema import sales_schema
+from .series_store import SeriesStore, series_store
 
-load_dotenv()
+# Forecast granularity -> pandas frequency of the bucketed series (Postgres
+# DATE_TRUNC('week') starts weeks on Monday)
+GRANULARITY_FREQ = {"day": "D", "week": "W-MON", "month": "MS"}
+
+# Gap-filled monthly matrix over a `sales` CTE (product_id, month,
+# total_quantity): the shared month axis runs from the first to the last
+# month with sales, and each product gets one int[] with a value per
+# month, shipped in its binary send format for _decode_quantity_arrays
+MATRIX_TAIL = """
+        axis AS (
+            SELECT generate_series(
+                (SELECT MIN(month) FROM sales),
+                (SELECT MAX(month) FROM sales),
+                INTERVAL '1 month'
+            )::date AS month
+        )
+        SELECT
+            p.product_id,
+            (SELECT MIN(month) FROM axis) AS first_month,
+            array_send(array_agg(COALESCE(s.total_quantity, 0)::int ORDER BY a.month)) AS quantities
+        FROM (SELECT DISTINCT product_id FROM sales) p
+        CROSS JOIN axis a
+        LEFT JOIN sales s ON s.product_id = p.product_id AND s.month = a.month
+        GROUP BY p.product_id
+        ORDER BY p.product_id
+"""
+
+ROLLUP_MATRIX_SQL = """
+        WITH sales AS (
+            SELECT product_id, month, total_quantity
+            FROM product_sales_monthly
+            WHERE product_id = ANY($1::text[])
+              AND month >= DATE_TRUNC('month', NOW() - make_interval(months => $2))::date
+        ),""" + MATRIX_TAIL
+
+# Binary COPY stream signature (followed by flags and header-extension length)
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+
+# pg_type OID of int4, the element type array_send reports for int[]
+INT4_OID = 23
+
+# Live order_items queries, keyed by prepared-statement name. {join},
+# {product}, {quantity} and {order_date} are filled in by SalesSchema.render
+# for the columns detected at startup.
+LIVE_QUERIES = {
+    "sales_rows": """
+        SELECT
+            DATE_TRUNC('month', {order_date})::date as sale_date,
+            SUM({quantity}) as total_quantity
+        FROM order_items oi
+        {join}
+        WHERE {product} = $1
+          AND {order_date} >= NOW() - make_interval(months => $2)
+        GROUP BY sale_date
+        ORDER BY sale_date ASC;
+    """,
+    "sales_rows_batch": """
+        SELECT
+            {product}::text as product_id,
+            DATE_TRUNC('month', {order_date})::date as sale_date,
+            SUM({quantity}) as total_quantity
+        FROM order_items oi
+        {join}
+        WHERE {product} = ANY($1)
+          AND {order_date} >= NOW() - make_interval(months => $2)
+        GROUP BY 1, 2
+        ORDER BY 1, 2 ASC;
+    """,
+    "sales_series": """
+        WITH sales AS (
+            SELECT
+                DATE_TRUNC($3, {order_date})::date as bucket,
+                SUM({quantity}) as total_quantity
+            FROM order_items oi
+            {join}
+            WHERE {product} = $1
+              AND {order_date} >= NOW() - make_interval(months => $2)
+            GROUP BY 1
+        )
+        SELECT b::date as sale_date, COALESCE(s.total_quantity, 0) as total_quantity
+        FROM generate_series(
+            (SELECT MIN(bucket) FROM sales),
+            (SELECT MAX(bucket) FROM sales),
+            ('1 ' || $3)::interval
+        ) b
+        LEFT JOIN sales s ON s.bucket = b::date
+        ORDER BY 1;
+    """,
+    "sales_matrix": """
+        WITH sales AS (
+            SELECT
+                {product}::text as product_id,
+                DATE_TRUNC('month', {order_date})::date as month,
+                SUM({quantity}) as total_quantity
+            FROM order_items oi
+            {join}
+            WHERE {product} = ANY($1)
+              AND {order_date} >= NOW() - make_interval(months => $2)
+            GROUP BY 1, 2
+        ),""" + MATRIX_TAIL,
+    "sales_watermark": """
+        SELECT
+            COUNT(*) as row_count,
+            COALESCE(SUM({quantity}), 0) as total_quantity,
+            MAX({order_date}) as latest_order
+        FROM order_items oi
+        {join}
+        WHERE {product} = $1;
+    """,
+    "products_with_sales": """
+        SELECT DISTINCT {product}::text as product_id
+        FROM order_items oi
+        {join}
+        WHERE {order_date} >= NOW() - make_interval(months => $1)
+          AND {product} IS NOT NULL
+        ORDER BY 1;
+    """,
+}
 
 
 class DataLoader:
     """
     Loads sales data from the database for forecasting.
+
+    Environment variables:
+        FORECAST_COPY_MIN_PRODUCTS: Sales matrices for at least this many
+            products are streamed with binary COPY (default 5000)
     """
     
-    def __init__(self):
-        self.database_url = os.getenv("DATABASE_URL")
-        
-        # Fallback to individual connection params if DATABASE_URL not set
-        if not self.database_url:
-            self.db_config = {
-                "user": os.getenv("DB_USERNAME", "postgres"),
-                "password": os.getenv("DB_PASSWORD", ""),
-                "database": os.getenv("DB_NAME", "supplychain"),
-                "host": os.getenv("DB_HOST", "localhost"),
-                "port": int(os.getenv("DB_PORT", 5432))
-            }
-        else:
-            self.db_config = None
+    def __init__(
+        self,
+        pool: Optional[DatabasePool] = None,
+        rollup: Optional[SalesRollup] = None,
+        store: Optional[SeriesStore] = None
+    ):
+        # Connections come from the process-wide pool unless one is injected
+        self.pool = pool or db_pool
+        # Monthly rollup; used once built, live aggregation until then
+        self.rollup = rollup or sales_rollup
+        # Memory-mapped snapshot for batch reads that opt in, when configured and fresh
+        self.series_store = store or series_store
+        self.copy_min_products = int(os.getenv("FORECAST_COPY_MIN_PRODUCTS", 5000))
 
-    async def _get_connection(self):
-        """Get database connection."""
-        if self.database_url:
-            return await asyncpg.connect(self.database_url)
-        else:
-            return await asyncpg.connect(**self.db_config)
+    def _store_usable(self) -> bool:
+        """True when the series store is fresh and not older than this process's last rollup refresh."""
+        if not self.series_store.available:
+            return False
+        rollup_refreshed_at = self.rollup.refreshed_at
+        return rollup_refreshed_at is None or self.series_store.refreshed_at >= rollup_refreshed_at
+
+    def register_live_statements(self) -> None:
+        """Register every live query as a per-connection prepared statement (after schema detection)."""
+        for name, template in LIVE_QUERIES.items():
+            self.pool.prepared(name, sales_schema.render(template))
+
+    async def _live_sql(self, name: str) -> str:
+        """SQL of a live order_items query rendered for the detected columns."""
+        await sales_schema.ensure_detected(self.pool)
+        return self.pool.prepared(name, sales_schema.render(LIVE_QUERIES[name]))
 
     async def get_sales_data(self, product_id: str, months: int = 24) -> pd.DataFrame:
         """
@@ -46,40 +184,10 @@ class DataLoader:
             DataFrame with columns: sale_date, total_quantity
         """
         try:
-            conn = await self._get_connection()
-            
-            # Query with flexible column naming (handles different schemas)
-            query = """
-                SELECT
-                    DATE_TRUNC('month', COALESCE(o.order_date, o."orderDate", o.created_at))::date as sale_date,
-                    SUM(COALESCE(oi.quantity, 1)) as total_quantity
-                FROM order_items oi
-                JOIN orders o ON oi.order_id = o.id OR oi."orderId" = o.id
-                WHERE (oi.product_id = $1 OR oi."productId" = $1)
-                  AND COALESCE(o.order_date, o."orderDate", o.created_at) >= NOW() - INTERVAL '%s months'
-                GROUP BY sale_date
-                ORDER BY sale_date ASC;
-            """ % months
-            
-            try:
-                rows = await conn.fetch(query, product_id)
-            except Exception as e:
-                # Try alternative query structure
-                print(f"Primary query failed: {e}, trying alternative...")
-                query_alt = """
-                    SELECT
-                        DATE_TRUNC('month', o.created_at)::date as sale_date,
-                        SUM(oi.quantity) as total_quantity
-                    FROM order_items oi
-                    JOIN orders o ON oi.order_id = o.id
-                    WHERE oi.product_id = $1
-                      AND o.created_at >= NOW() - INTERVAL '%s months'
-                    GROUP BY sale_date
-                    ORDER BY sale_date ASC;
-                """ % months
-                rows = await conn.fetch(query_alt, product_id)
-            
-            await conn.close()
+            if self.rollup.ready:
+                rows = await self._fetch_rollup_rows(product_id, months)
+            else:
+                rows = await self._fetch_live_rows(product_id, months)
             
             if not rows:
                 print(f"No sales data found for product {product_id}")
@@ -96,13 +204,421 @@ class DataLoader:
             print(f"Error fetching sales data: {e}")
             return pd.DataFrame()
 
+    async def _fetch_rollup_rows(self, product_id: str, months: int):
+        """Monthly rows for one product from product_sales_monthly (index probe)."""
+        query = """
+            SELECT month as sale_date, total_quantity
+            FROM product_sales_monthly
+            WHERE product_id = $1
+              AND month >= DATE_TRUNC('month', NOW() - make_interval(months => $2))::date
+            ORDER BY month ASC;
+        """
+        async with self.pool.acquire() as conn:
+            return await conn.fetch(query, product_id, months)
+
+    async def _fetch_live_rows(self, product_id: str, months: int):
+        """Monthly rows for one product aggregated directly from order_items."""
+        query = await self._live_sql("sales_rows")
+        async with self.pool.acquire() as conn:
+            return await conn.fetch(query, product_id, months)
+
+    async def get_sales_series(self, product_id: str, months: int = 24, granularity: str = "month") -> pd.DataFrame:
+        """
+        Fetches a product's sales bucketed by day, week or month.
+        
+        Bucketing and gap filling happen in SQL (DATE_TRUNC plus
+        generate_series), so the result is dense: one row per bucket from
+        the first to the last bucket with sales, zeros included.
+        
+        Args:
+            product_id: The product ID to fetch data for
+            months: Months of history to fetch (for every granularity)
+            granularity: 'day', 'week' or 'month'
+            
+        Returns:
+            DataFrame with columns: sale_date, total_quantity
+        """
+        if granularity not in GRANULARITY_FREQ:
+            raise ValueError(f"Unknown granularity: {granularity}")
+
+        try:
+            if granularity == "month" and self.rollup.ready:
+                rows = await self._fetch_rollup_series(product_id, months)
+            else:
+                rows = await self._fetch_live_series(product_id, months, granularity)
+
+            if not rows:
+                print(f"No sales data found for product {product_id}")
+                return pd.DataFrame()
+
+            df = pd.DataFrame(rows, columns=['sale_date', 'total_quantity'])
+            df['sale_date'] = pd.to_datetime(df['sale_date'])
+            df['total_quantity'] = df['total_quantity'].astype(int)
+
+            print(f"Loaded {len(df)} {granularity} buckets of data for product {product_id}")
+            return df
+
+        except Exception as e:
+            print(f"Error fetching sales series: {e}")
+            return pd.DataFrame()
+
+    async def _fetch_rollup_series(self, product_id: str, months: int):
+        """Dense monthly rows for one product from product_sales_monthly."""
+        query = """
+            WITH sales AS (
+                SELECT month, total_quantity
+                FROM product_sales_monthly
+                WHERE product_id = $1
+                  AND month >= DATE_TRUNC('month', NOW() - make_interval(months => $2))::date
+            )
+            SELECT bucket::date as sale_date, COALESCE(s.total_quantity, 0) as total_quantity
+            FROM generate_series(
+                (SELECT MIN(month) FROM sales),
+                (SELECT MAX(month) FROM sales),
+                INTERVAL '1 month'
+            ) bucket
+            LEFT JOIN sales s ON s.month = bucket::date
+            ORDER BY 1;
+        """
+        async with self.pool.acquire() as conn:
+            return await conn.fetch(query, product_id, months)
+
+    async def _fetch_live_series(self, product_id: str, months: int, granularity: str):
+        """Dense day/week/month rows for one product aggregated from order_items."""
+        # $3 is the DATE_TRUNC field ('day', 'week' or 'month'), also the step unit
+        query = await self._live_sql("sales_series")
+        async with self.pool.acquire() as conn:
+            return await conn.fetch(query, product_id, months, granularity)
+
+    async def get_sales_watermark(self, product_id: str) -> Optional[str]:
+        """
+        Returns a cheap fingerprint of a product's sales data.
+        
+        The watermark changes whenever order lines for the product are
+        added, removed or change quantity, so it can key forecast caches.
+        
+        Returns:
+            Watermark string, or None if it could not be determined
+        """
+        try:
+            if self.rollup.ready:
+                query = """
+                    SELECT
+                        COALESCE(SUM(order_lines), 0) as row_count,
+                        COALESCE(SUM(total_quantity), 0) as total_quantity,
+                        MAX(last_order_at) as latest_order
+                    FROM product_sales_monthly
+                    WHERE product_id = $1;
+                """
+                async with self.pool.acquire() as conn:
+                    row = await conn.fetchrow(query, product_id)
+                latest = row['latest_order'].isoformat() if row['latest_order'] else "none"
+                return f"{row['row_count']}:{row['total_quantity']}:{latest}"
+
+            query = await self._live_sql("sales_watermark")
+            async with self.pool.acquire() as conn:
+                row = await conn.fetchrow(query, product_id)
+
+            latest = row['latest_order'].isoformat() if row['latest_order'] else "none"
+            return f"{row['row_count']}:{row['total_quantity']}:{latest}"
+            
+        except Exception as e:
+            print(f"Error fetching sales watermark: {e}")
+            return None
+
+    async def get_sales_data_batch(
+        self,
+        product_ids: List[str],
+        months: int = 24,
+        use_store: bool = False
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Fetches monthly sales for many products in a single query.
+        
+        With use_store, served from the memory-mapped series store when it is
+        configured, fresh and not older than the rollup, so the read does not
+        query Postgres. Only for callers that accept a snapshot up to one
+        rollup interval old.
+        
+        Args:
+            product_ids: Product IDs to fetch data for
+            months: Number of months of historical data to fetch
+            use_store: Allow reading from the series store
+            
+        Returns:
+            Dict of product_id -> DataFrame with columns: sale_date, total_quantity.
+            Products without sales are omitted.
+        """
+        if not product_ids:
+            return {}
+
+        if use_store and self._store_usable():
+            result = self.series_store.get_sales_data_batch(product_ids, months)
+            print(f"Loaded sales data for {len(result)}/{len(product_ids)} products from the series store")
+            return result
+
+        try:
+            if self.rollup.ready:
+                rows = await self._fetch_rollup_rows_batch(product_ids, months)
+            else:
+                rows = await self._fetch_live_rows_batch(product_ids, months)
+
+            if not rows:
+                print(f"No sales data found for {len(product_ids)} products")
+                return {}
+
+            df = pd.DataFrame(rows, columns=['product_id', 'sale_date', 'total_quantity'])
+            df['sale_date'] = pd.to_datetime(df['sale_date'])
+            df['total_quantity'] = df['total_quantity'].astype(int)
+
+            result = {
+                product_id: group[['sale_date', 'total_quantity']].reset_index(drop=True)
+                for product_id, group in df.groupby('product_id', sort=False)
+            }
+            print(f"Loaded sales data for {len(result)}/{len(product_ids)} products")
+            return result
+
+        except Exception as e:
+            print(f"Error fetching batch sales data: {e}")
+            return {}
+
+    async def _fetch_rollup_rows_batch(self, product_ids: List[str], months: int):
+        """Monthly rows for many products from product_sales_monthly."""
+        query = """
+            SELECT product_id, month as sale_date, total_quantity
+            FROM product_sales_monthly
+            WHERE product_id = ANY($1::text[])
+              AND month >= DATE_TRUNC('month', NOW() - make_interval(months => $2))::date
+            ORDER BY product_id, month ASC;
+        """
+        async with self.pool.acquire() as conn:
+            return await conn.fetch(query, product_ids, months)
+
+    async def _fetch_live_rows_batch(self, product_ids: List[str], months: int):
+        """Monthly rows for many products aggregated directly from order_items."""
+        query = await self._live_sql("sales_rows_batch")
+        async with self.pool.acquire() as conn:
+            return await conn.fetch(query, product_ids, months)
+
+    async def get_sales_matrix(
+        self,
+        product_ids: List[str],
+        months: int = 24,
+        use_store: bool = False
+    ) -> Tuple[List[str], pd.DatetimeIndex, np.ndarray, np.ndarray]:
+        """
+        Fetches monthly sales for many products as one dense matrix.
+
+        Gap filling happens in SQL: the query builds the month axis, left
+        joins the monthly totals onto it and returns one row per product
+        with an int[] of quantities, which is decoded straight into a NumPy
+        matrix. Requests for FORECAST_COPY_MIN_PRODUCTS or more products
+        stream the rows with binary COPY. With use_store, served from the
+        memory-mapped series store instead, as in get_sales_data_batch.
+
+        Args:
+            product_ids: Product IDs to fetch data for
+            months: Number of months of historical data to fetch
+            use_store: Allow reading from the series store
+
+        Returns:
+            Same contract as Preprocessor.prepare_matrix: (product IDs
+            sorted, shared month index, products x months float matrix,
+            bounds of each product's first and one-past-last month with
+            sales). Products without sales are omitted.
+        """
+        if not product_ids:
+            return _trim_matrix([], pd.DatetimeIndex([]), np.zeros((0, 0)))
+
+        if use_store and self._store_usable():
+            found, month_index, matrix = self.series_store.get_matrix(product_ids, months)
+            print(f"Loaded sales matrix for {len(found)}/{len(product_ids)} products from the series store")
+            return _trim_matrix(found, month_index, matrix)
+
+        try:
+            query = ROLLUP_MATRIX_SQL if self.rollup.ready else await self._live_sql("sales_matrix")
+            if len(product_ids) >= self.copy_min_products:
+                ids, first_month, blobs = await self._copy_matrix_rows(query, product_ids, months)
+            else:
+                async with self.pool.acquire() as conn:
+                    rows = await conn.fetch(query, product_ids, months)
+                ids = [row['product_id'] for row in rows]
+                first_month = rows[0]['first_month'] if rows else None
+                blobs = [row['quantities'] for row in rows]
+
+            if not ids:
+                print(f"No sales data found for {len(product_ids)} products")
+                return _trim_matrix([], pd.DatetimeIndex([]), np.zeros((0, 0)))
+
+            matrix = _decode_quantity_arrays(blobs)
+            month_index = pd.date_range(first_month, periods=matrix.shape[1], freq="MS")
+            print(f"Loaded sales matrix for {len(ids)}/{len(product_ids)} products x {len(month_index)} months")
+            return _trim_matrix(ids, month_index, matrix)
+
+        except Exception as e:
+            print(f"Error fetching sales matrix: {e}")
+            return _trim_matrix([], pd.DatetimeIndex([]), np.zeros((0, 0)))
+
+    async def _copy_matrix_rows(
+        self,
+        query: str,
+        product_ids: List[str],
+        months: int
+    ) -> Tuple[List[str], Optional[date], List[bytes]]:
+        """Stream the matrix query with binary COPY instead of a row fetch."""
+        buffer = io.BytesIO()
+        async with self.pool.acquire() as conn:
+            await conn.copy_from_query(query, product_ids, months, output=buffer, format="binary")
+        return _parse_copy_rows(buffer.getbuffer())
+
+    async def get_products_with_sales(self, months: int = 24) -> List[str]:
+        """
+        Lists every product with at least one sale in the window.
+        
+        Args:
+            months: Number of months of history to consider
+            
+        Returns:
+            Product IDs, sorted
+        """
+        try:
+            if self.rollup.ready:
+                query = """
+                    SELECT DISTINCT product_id
+                    FROM product_sales_monthly
+                    WHERE month >= DATE_TRUNC('month', NOW() - make_interval(months => $1))::date
+                    ORDER BY product_id;
+                """
+                async with self.pool.acquire() as conn:
+                    rows = await conn.fetch(query, months)
+            else:
+                query = await self._live_sql("products_with_sales")
+                async with self.pool.acquire() as conn:
+                    rows = await conn.fetch(query, months)
+
+            return [row['product_id'] for row in rows]
+
+        except Exception as e:
+            print(f"Error listing products with sales: {e}")
+            return []
+
+    async def get_forecastable_products(
+        self,
+        min_months: int = 3,
+        limit: int = 50,
+        sort: str = "volume",
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Lists products with enough history to forecast, one keyset page at a time.
+        
+        Reads product_sales_summary (kept current by the rollup). Pages
+        continue from the last row's sort key rather than an OFFSET, so each
+        page is one index range scan however deep the client pages.
+        
+        Args:
+            min_months: Minimum history span in months (first to last sale)
+            limit: Page size
+            sort: 'volume' (total quantity, highest first) or 'product' (by ID)
+            cursor: nextCursor from the previous page
+            
+        Returns:
+            Dict with products (productId, historyMonths, monthsWithSales,
+            firstSaleMonth, lastSaleMonth, totalQuantity) and nextCursor
+            (None on the last page)
+            
+        Raises:
+            ValueError: if sort or cursor is invalid
+        """
+        if sort not in ("volume", "product"):
+            raise ValueError(f"Unknown sort: {sort}")
+        after = _decode_cursor(cursor, sort) if cursor else None
+
+        columns = """
+            SELECT product_id, first_month, last_month, history_months, months_with_sales, total_quantity
+            FROM product_sales_summary
+            WHERE history_months >= $1
+        """
+        # One extra row tells whether another page exists
+        args: List[Any] = [min_months, limit + 1]
+        if sort == "volume":
+            # Backward scan of idx_product_sales_summary_volume
+            if after is not None:
+                columns += " AND (total_quantity, product_id) < ($3::bigint, $4::text)"
+                args += after
+            query = columns + " ORDER BY total_quantity DESC, product_id DESC LIMIT $2;"
+        else:
+            if after is not None:
+                columns += " AND product_id > $3::text"
+                args += after
+            query = columns + " ORDER BY product_id LIMIT $2;"
+
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query, *args)
+
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            key = [last['total_quantity'], last['product_id']] if sort == "volume" else [last['product_id']]
+            next_cursor = _encode_cursor(sort, key)
+
+        return {
+            "products": [
+                {
+                    "productId": row['product_id'],
+                    "historyMonths": row['history_months'],
+                    "monthsWithSales": row['months_with_sales'],
+                    "firstSaleMonth": row['first_month'].strftime("%Y-%m"),
+                    "lastSaleMonth": row['last_month'].strftime("%Y-%m"),
+                    "totalQuantity": row['total_quantity'],
+                }
+                for row in page
+            ],
+            "nextCursor": next_cursor,
+        }
+
+    async def get_product_categories(
+        self,
+        product_ids: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None
+    ) -> Dict[str, str]:
+        """
+        Maps products to their category.
+
+        Unlike the sales readers this does not swallow database errors: an
+        empty mapping would silently put every product in 'uncategorized'.
+        
+        Args:
+            product_ids: Restrict to these products
+            categories: Restrict to these categories ('uncategorized' matches
+                products without one)
+            
+        Returns:
+            Dict of product_id -> category ('uncategorized' when unset)
+
+        Raises:
+            asyncpg.PostgresError: If the lookup fails
+        """
+        query = """
+            SELECT product_id, category
+            FROM (
+                SELECT id::text as product_id, COALESCE(NULLIF(category, ''), 'uncategorized') as category
+                FROM products
+                WHERE ($1::text[] IS NULL OR id::text = ANY($1::text[]))
+            ) p
+            WHERE $2::text[] IS NULL OR category = ANY($2::text[]);
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query, product_ids, categories)
+
+        return {row['product_id']: row['category'] for row in rows}
+
     async def get_product_info(self, product_id: str) -> Optional[dict]:
         """
         Get product information.
         """
         try:
-            conn = await self._get_connection()
-            
             query = """
                 SELECT id, name, sku, category, quantity_in_stock
                 FROM products
@@ -110,8 +626,8 @@ class DataLoader:
                 LIMIT 1;
             """
             
-            row = await conn.fetchrow(query, product_id)
-            await conn.close()
+            async with self.pool.acquire() as conn:
+                row = await conn.fetchrow(query, product_id)
             
             if row:
                 return dict(row)
@@ -119,4 +635,161 @@ class DataLoader:
             
         except Exception as e:
             print(f"Error fetching product info: {e}")
-            return None
\ No newline at end of file
+            return None
+
+
+def _decode_quantity_arrays(blobs: List[bytes]) -> np.ndarray:
+    """
+    Stack int4[] values in binary send format into an int32 matrix.
+
+    Each value is a 20-byte header (ndim, flags, element type, length,
+    lower bound) and a (byte length, value) pair per element; an empty
+    array is just the first three header words. All arrays share the
+    month axis, so the blobs are joined and viewed as one big-endian
+    int32 block, with no Python object per element.
+
+    Raises:
+        ValueError: if the arrays are not equal-length, NULL-free,
+            one-dimensional int4[]
+    """
+    if not blobs:
+        return np.zeros((0, 0), dtype=np.int32)
+    size = len(blobs[0])
+    if size < 12 or size % 4 or any(len(blob) != size for blob in blobs):
+        raise ValueError("quantity arrays are not equal-length int4[] values")
+
+    raw = np.frombuffer(b"".join(blobs), dtype=">i4").reshape(len(blobs), -1)
+    if (raw[:, 2] != INT4_OID).any():
+        raise ValueError("quantity arrays are not int4[]")
+    if (raw[:, 1] != 0).any():
+        raise ValueError("quantity arrays contain NULL elements")
+    if raw.shape[1] == 3 and (raw[:, 0] == 0).all():
+        return np.zeros((len(blobs), 0), dtype=np.int32)
+    if (raw[:, 0] != 1).any() or raw.shape[1] < 5:
+        raise ValueError("quantity arrays are not one-dimensional")
+    length = int(raw[0, 3])
+    if raw.shape[1] != 5 + 2 * length or (raw[:, 3] != length).any() or (raw[:, 5::2] != 4).any():
+        raise ValueError("quantity arrays are not equal-length int4[] values")
+    return raw[:, 6::2].astype(np.int32)
+
+
+def _parse_copy_rows(buffer: memoryview) -> Tuple[List[str], Optional[date], List[bytes]]:
+    """
+    Split a binary COPY stream of (product_id, first_month, quantities) rows.
+
+    Returns:
+        (product IDs, first month of the axis, quantity blobs)
+
+    Raises:
+        ValueError: if the stream is not a complete binary COPY of such rows
+    """
+    if bytes(buffer[:len(COPY_SIGNATURE)]) != COPY_SIGNATURE:
+        raise ValueError("not a binary COPY stream")
+    try:
+        offset = len(COPY_SIGNATURE)
+        flags, extension = struct.unpack_from("!ii", buffer, offset)
+        # Bits 0-15 are incompatible format changes, bit 16 adds an OID field
+        if flags & 0x1FFFF:
+            raise ValueError(f"unsupported binary COPY flags {flags:#x}")
+        if extension < 0:
+            raise ValueError("malformed binary COPY header extension")
+        offset += 8 + extension
+
+        ids: List[str] = []
+        blobs: List[bytes] = []
+        first_month = None
+        while True:
+            (fields,) = struct.unpack_from("!h", buffer, offset)
+            offset += 2
+            if fields == -1:
+                break
+            if fields != 3:
+                raise ValueError(f"expected 3 fields per COPY row, got {fields}")
+            values = []
+            for _ in range(fields):
+                (size,) = struct.unpack_from("!i", buffer, offset)
+                offset += 4
+                if size < 0:
+                    raise ValueError("unexpected NULL in sales matrix COPY row")
+                if offset + size > len(buffer):
+                    raise ValueError("truncated binary COPY stream")
+                values.append(bytes(buffer[offset:offset + size]))
+                offset += size
+            ids.append(values[0].decode())
+            if first_month is None:
+                # Binary dates count days from 2000-01-01
+                first_month = date(2000, 1, 1) + timedelta(days=struct.unpack("!i", values[1])[0])
+            blobs.append(values[2])
+    except struct.error:
+        raise ValueError("truncated binary COPY stream")
+    if offset != len(buffer):
+        raise ValueError("trailing data after binary COPY trailer")
+    return ids, first_month, blobs
+
+
+def _trim_matrix(
+    product_ids: List[str],
+    month_index: pd.DatetimeIndex,
+    matrix: np.ndarray
+) -> Tuple[List[str], pd.DatetimeIndex, np.ndarray, np.ndarray]:
+    """
+    Sort products, drop those without sales and narrow the month axis to
+    the months with any sales, as Preprocessor.prepare_matrix lays it out.
+
+    Returns:
+        (product IDs, month index, float matrix, bounds)
+    """
+    has_sales = matrix != 0
+    keep = np.flatnonzero(has_sales.any(axis=1))
+    keep = keep[np.argsort(np.asarray(product_ids, dtype=object)[keep], kind="stable")] if len(keep) else keep
+    if not len(keep):
+        return [], pd.DatetimeIndex([]), np.zeros((0, 0)), np.zeros((0, 2), dtype=int)
+
+    active = np.flatnonzero(has_sales[keep].any(axis=0))
+    columns = slice(active[0], active[-1] + 1)
+    trimmed = matrix[keep, columns].astype(float)
+    nonzero = has_sales[keep, columns]
+
+    bounds = np.empty((len(keep), 2), dtype=int)
+    bounds[:, 0] = np.argmax(nonzero, axis=1)
+    bounds[:, 1] = nonzero.shape[1] - np.argmax(nonzero[:, ::-1], axis=1)
+    return [str(product_ids[i]) for i in keep], month_index[columns], trimmed, bounds
+
+
+def _encode_cursor(sort: str, key: List[Any]) -> str:
+    """Opaque page cursor: the sort it belongs to plus the last row's key."""
+    return base64.urlsafe_b64encode(json.dumps([sort] + key).encode()).decode()
+
+
+def _decode_cursor(cursor: str, sort: str) -> List[Any]:
+    """
+    The last row's key from a cursor made by _encode_cursor for `sort`.
+
+    Cursors come from clients, so everything is checked before it reaches
+    the query: a key that would fail there (a bool, an integer outside
+    bigint, a string with NUL) is rejected like a malformed cursor.
+
+    Raises:
+        ValueError: if the cursor is malformed or belongs to another sort
+    """
+    try:
+        value = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(value, list) or not value or value[0] not in ("volume", "product"):
+        raise ValueError("Invalid cursor")
+    if value[0] != sort:
+        raise ValueError("Cursor does not belong to this sort order")
+    key = value[1:]
+    shape = (_is_bigint, _is_text) if sort == "volume" else (_is_text,)
+    if len(key) != len(shape) or not all(check(part) for check, part in zip(shape, key)):
+        raise ValueError("Invalid cursor")
+    return key
+
+
+def _is_bigint(value: Any) -> bool:
+    return type(value) is int and -2 ** 63 <= value < 2 ** 63
+
+
+def _is_text(value: Any) -> bool:
+    return isinstance(value, str) and "\x00" not in value
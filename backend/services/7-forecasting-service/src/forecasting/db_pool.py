@@ -0,0 +1,238 @@
+import os
+import time
+import asyncio
+import asyncpg
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+from typing import Any, Dict, Optional
+
+load_dotenv()
+
+
+class DatabasePool:
+    """
+    Shared asyncpg connection pool for the forecasting service.
+
+    Created once in the FastAPI lifespan and reused by every DataLoader, so
+    requests no longer pay a connection handshake per query.
+
+    Hot queries can be registered as prepared statements (see prepared()).
+    Each one is prepared when a connection opens, or on the connection's
+    first use if it opened before the registration, so requests skip
+    parse/plan and reuse one server-side statement.
+
+    Environment variables:
+        DB_POOL_MIN_SIZE: Connections kept open when idle (default 2)
+        DB_POOL_MAX_SIZE: Upper bound on open connections (default 10)
+        DB_POOL_ACQUIRE_TIMEOUT: Seconds to wait for a free connection (default 5)
+        DB_STATEMENT_TIMEOUT: Seconds before a single statement is cancelled (default 30)
+        DB_MAINTENANCE_TIMEOUT: Statement timeout in seconds for migrations and rollup builds (default 3600)
+    """
+
+    def __init__(self):
+        self.database_url = os.getenv("DATABASE_URL")
+
+        # Fallback to individual connection params if DATABASE_URL not set
+        if not self.database_url:
+            self.db_config = {
+                "user": os.getenv("DB_USERNAME", "postgres"),
+                "password": os.getenv("DB_PASSWORD", ""),
+                "database": os.getenv("DB_NAME", "supplychain"),
+                "host": os.getenv("DB_HOST", "localhost"),
+                "port": int(os.getenv("DB_PORT", 5432))
+            }
+        else:
+            self.db_config = None
+
+        self.min_size = int(os.getenv("DB_POOL_MIN_SIZE", 2))
+        self.max_size = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+        self.acquire_timeout = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", 5))
+        self.statement_timeout = float(os.getenv("DB_STATEMENT_TIMEOUT", 30))
+        self.maintenance_timeout = float(os.getenv("DB_MAINTENANCE_TIMEOUT", 3600))
+
+        self._pool: Optional[asyncpg.Pool] = None
+        self._open_lock: Optional[asyncio.Lock] = None
+
+        # name -> SQL of every registered prepared statement
+        self._statement_sql: Dict[str, str] = {}
+        self._statements_prepared = 0
+
+        # Saturation counters
+        self._waiting = 0
+        self._in_use = 0
+        self._acquired_total = 0
+        self._acquire_timeouts = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    async def open(self) -> None:
+        """Create the underlying pool if it does not exist yet."""
+        if self._pool is not None:
+            return
+
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+
+        async with self._open_lock:
+            if self._pool is not None:
+                return
+
+            connect_kwargs: Dict[str, Any] = {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "init": self._init_connection,
+                **self._connection_settings(),
+            }
+            if self.database_url:
+                self._pool = await asyncpg.create_pool(self.database_url, **connect_kwargs)
+            else:
+                self._pool = await asyncpg.create_pool(**self.db_config, **connect_kwargs)
+
+            print(f"Database pool opened (min={self.min_size}, max={self.max_size})")
+
+    def _connection_settings(self) -> Dict[str, Any]:
+        return {
+            "command_timeout": self.statement_timeout,
+            "server_settings": {
+                "statement_timeout": str(int(self.statement_timeout * 1000))
+            },
+        }
+
+    async def use_maintenance_timeout(self, conn: asyncpg.Connection) -> float:
+        """
+        Raise the statement timeout for the rest of conn's current transaction.
+
+        Migrations and full rollup builds can run far longer than the
+        request-sized DB_STATEMENT_TIMEOUT. The server-side limit is lifted
+        with SET LOCAL, so it reverts at commit; asyncpg's client-side
+        command_timeout still applies, so pass the returned value as
+        timeout= to every long statement.
+
+        Args:
+            conn: Connection inside a transaction
+
+        Returns:
+            Timeout in seconds for conn.execute(..., timeout=)
+        """
+        await conn.execute(
+            f"SET LOCAL statement_timeout = {int(self.maintenance_timeout * 1000)}",
+            timeout=self.maintenance_timeout,
+        )
+        return self.maintenance_timeout
+
+    async def connect(self) -> asyncpg.Connection:
+        """
+        Open a dedicated connection outside the pool, with the pool's settings.
+
+        For long-lived sessions such as LISTEN, which the pool would reset
+        (UNLISTEN *) on release. The caller closes it.
+        """
+        if self.database_url:
+            return await asyncpg.connect(self.database_url, **self._connection_settings())
+        return await asyncpg.connect(**self.db_config, **self._connection_settings())
+
+    async def close(self) -> None:
+        """Close the pool and release all connections."""
+        if self._pool is None:
+            return
+        pool, self._pool = self._pool, None
+        await pool.close()
+        print("Database pool closed")
+
+    def prepared(self, name: str, sql: str) -> str:
+        """
+        Register a hot query as a prepared statement on every connection.
+
+        asyncpg keeps a per-connection cache of named prepared statements
+        keyed by query text, and the pool does not clear it on release, so
+        running the returned SQL with conn.fetch() reuses the connection's
+        statement instead of parsing and planning it again.
+
+        Args:
+            name: Statement name for stats, e.g. 'sales_rows'
+            sql: Statement text (must be identical on every call)
+
+        Returns:
+            sql, for conn.fetch()/fetchrow()
+        """
+        self._statement_sql[name] = sql
+        return sql
+
+    async def _init_connection(self, conn: asyncpg.Connection) -> None:
+        """Pool init callback: prepare every registered statement on a new connection."""
+        for name, sql in list(self._statement_sql.items()):
+            try:
+                # executemany with no rows parses, describes and caches without executing
+                await conn.executemany(sql, [])
+                self._statements_prepared += 1
+            except Exception as e:
+                # Prepared again on first use; a bad statement must not block the pool
+                print(f"Could not prepare statement {name}: {e}")
+
+    @asynccontextmanager
+    async def acquire(self):
+        """
+        Acquire a pooled connection.
+
+        Opens the pool lazily so CLI tools and tests work without the app
+        lifespan. Raises asyncio.TimeoutError if no connection frees up
+        within the acquire timeout.
+        """
+        if self._pool is None:
+            await self.open()
+
+        self._waiting += 1
+        started = time.perf_counter()
+        try:
+            conn = await self._pool.acquire(timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self._acquire_timeouts += 1
+            raise
+        finally:
+            self._waiting -= 1
+            waited = time.perf_counter() - started
+            self._wait_seconds_total += waited
+            self._wait_seconds_max = max(self._wait_seconds_max, waited)
+
+        self._acquired_total += 1
+        self._in_use += 1
+        try:
+            yield conn
+        finally:
+            self._in_use -= 1
+            await self._pool.release(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Pool saturation statistics for capacity planning.
+
+        Returns:
+            Dict with size, idle and in-use connections, waiters and
+            acquire wait times.
+        """
+        size = self._pool.get_size() if self._pool is not None else 0
+        idle = self._pool.get_idle_size() if self._pool is not None else 0
+        acquired = self._acquired_total
+
+        return {
+            "open": self._pool is not None,
+            "minSize": self.min_size,
+            "maxSize": self.max_size,
+            "size": size,
+            "idle": idle,
+            "inUse": self._in_use,
+            "waiting": self._waiting,
+            "utilization": round(self._in_use / self.max_size, 3) if self.max_size else 0.0,
+            "acquiredTotal": acquired,
+            "acquireTimeouts": self._acquire_timeouts,
+            "avgWaitMs": round(self._wait_seconds_total / acquired * 1000, 3) if acquired else 0.0,
+            "maxWaitMs": round(self._wait_seconds_max * 1000, 3),
+            "acquireTimeoutSeconds": self.acquire_timeout,
+            "statementTimeoutSeconds": self.statement_timeout,
+            "preparedStatements": sorted(self._statement_sql),
+            "statementsPrepared": self._statements_prepared,
+        }
+
+
+# Process-wide pool shared by every ForecastModel / DataLoader
+db_pool = DatabasePool()
@@ -0,0 +1,204 @@
+import os
+import asyncio
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+from .metrics import metrics, run_with_metrics, reset_worker_metrics
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when the fit queue is full and the caller asked not to wait."""
+
+
+class FitExecutor:
+    """
+    Bounded worker pool for CPU-bound model fitting.
+
+    Keeps SARIMAX fits off the event loop so one slow fit cannot stall
+    other requests (including /health). At most `max_workers` fits run at
+    once and at most `max_queue` more may wait; beyond that, interactive
+    callers are rejected immediately instead of piling up.
+
+    Environment variables:
+        FORECAST_EXECUTOR: 'process' (default) or 'thread'
+        FORECAST_WORKERS: Number of workers (default: CPU count)
+        FORECAST_MAX_QUEUE: Fits allowed to wait for a worker (default: 4 x workers)
+    """
+
+    def __init__(self):
+        self.kind = os.getenv("FORECAST_EXECUTOR", "process").lower()
+        self.max_workers = int(os.getenv("FORECAST_WORKERS", os.cpu_count() or 1))
+        self.max_queue = int(os.getenv("FORECAST_MAX_QUEUE", 4 * self.max_workers))
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._background_slots: Optional[asyncio.Semaphore] = None
+
+        # Autoscaling counters
+        self._outstanding = 0
+        self._submitted_total = 0
+        self._completed_total = 0
+        self._failed_total = 0
+        self._rejected_total = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="forecast-fit")
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=reset_worker_metrics)
+            print(f"Fit executor started with {self.max_workers} {self.kind} workers (queue={self.max_queue})")
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue)
+        return self._slots
+
+    def _get_background_slots(self) -> asyncio.Semaphore:
+        # Waiting (batch) jobs may occupy at most max_workers slots, so the
+        # queue always has room left for interactive requests
+        if self._background_slots is None:
+            self._background_slots = asyncio.Semaphore(self.max_workers)
+        return self._background_slots
+
+    async def run(self, fn: Callable[..., Any], *args: Any, wait: bool = False) -> Any:
+        """
+        Run a picklable function in the worker pool and await its result.
+
+        Args:
+            fn: Module-level function to execute
+            *args: Positional arguments for fn
+            wait: If True, wait for queue space (batch jobs; at most
+                max_workers of these run at once). If False, raise
+                ExecutorSaturatedError when the queue is full.
+        """
+        slots = self._get_slots()
+        if not wait and slots.locked():
+            self._rejected_total += 1
+            raise ExecutorSaturatedError(
+                f"Forecast queue is full ({self.max_workers} running, {self.max_queue} queued)"
+            )
+
+        background = self._get_background_slots() if wait else None
+        if background is not None:
+            await background.acquire()
+        try:
+            await slots.acquire()
+        except BaseException:
+            if background is not None:
+                background.release()
+            raise
+
+        # From here the slots belong to the job, not to this caller: they
+        # are released when the job itself ends (_finish), so a caller that
+        # times out cannot free a worker that is still fitting
+        self._outstanding += 1
+        self._submitted_total += 1
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            if self.kind == "thread":
+                job = executor.submit(fn, *args)
+            else:
+                # Worker processes have their own metrics registry; fold it into ours
+                job = executor.submit(run_with_metrics, fn, *args)
+        except BaseException as e:
+            self._finish_submit_failure(e, executor, slots, background)
+            raise
+
+        job.add_done_callback(
+            lambda done: self._call_soon(loop, self._finish, done, executor, slots, background)
+        )
+        try:
+            result = await asyncio.shield(asyncio.wrap_future(job))
+        except asyncio.CancelledError:
+            # A job still waiting for a worker is dropped (its slot frees
+            # now); a running one keeps its slot until it finishes
+            job.cancel()
+            raise
+        return result if self.kind == "thread" else result[0]
+
+    @staticmethod
+    def _call_soon(loop: asyncio.AbstractEventLoop, callback: Callable[..., Any], *args: Any) -> None:
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # Event loop already closed (shutdown); nothing left to account for
+            pass
+
+    def _finish(
+        self,
+        job: Future,
+        executor: Executor,
+        slots: asyncio.Semaphore,
+        background: Optional[asyncio.Semaphore]
+    ) -> None:
+        """Release a job's slots and record its outcome (runs on the event loop)."""
+        self._outstanding -= 1
+        slots.release()
+        if background is not None:
+            background.release()
+
+        if job.cancelled():
+            return
+        error = job.exception()
+        if error is None:
+            self._completed_total += 1
+            if self.kind != "thread":
+                metrics.merge(job.result()[1])
+            return
+        self._failed_total += 1
+        if isinstance(error, BrokenProcessPool) and self._executor is executor:
+            # A worker died; drop the pool so the next job starts a fresh one
+            self._executor = None
+
+    def _finish_submit_failure(
+        self,
+        error: BaseException,
+        executor: Executor,
+        slots: asyncio.Semaphore,
+        background: Optional[asyncio.Semaphore]
+    ) -> None:
+        self._outstanding -= 1
+        self._failed_total += 1
+        slots.release()
+        if background is not None:
+            background.release()
+        if isinstance(error, BrokenProcessPool) and self._executor is executor:
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Queue depth and in-flight fit counts for autoscaling.
+
+        Returns:
+            Dict with running/queued fits, capacity and lifetime counters
+        """
+        in_flight = min(self._outstanding, self.max_workers)
+        queued = self._outstanding - in_flight
+
+        return {
+            "kind": self.kind,
+            "started": self._executor is not None,
+            "maxWorkers": self.max_workers,
+            "maxQueue": self.max_queue,
+            "inFlight": in_flight,
+            "queueDepth": queued,
+            "saturation": round(self._outstanding / (self.max_workers + self.max_queue), 3),
+            "submittedTotal": self._submitted_total,
+            "completedTotal": self._completed_total,
+            "failedTotal": self._failed_total,
+            "rejectedTotal": self._rejected_total,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, cancelling jobs that have not started."""
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        executor.shutdown(wait=False, cancel_futures=True)
+        print("Fit executor stopped")
+
+
+# Process-wide executor shared by every ForecastModel
+fit_executor = FitExecutor()
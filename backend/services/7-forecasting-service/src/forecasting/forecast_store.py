@@ -0,0 +1,112 @@
+import os
+import json
+from typing import Any, Dict, List, Optional
+from .db_pool import DatabasePool, db_pool
+
+
+class PrecomputedForecastStore:
+    """
+    Reads and writes scheduled forecasts in forecast_precomputed.
+
+    Environment variables:
+        FORECAST_PRECOMPUTE_MAX_AGE: Seconds a stored forecast may be served
+            to /forecast/predict (default 129600, i.e. 36 hours)
+    """
+
+    def __init__(self, pool: Optional[DatabasePool] = None):
+        self.pool = pool or db_pool
+        self.max_age = float(os.getenv("FORECAST_PRECOMPUTE_MAX_AGE", 129600))
+
+    async def get(
+        self,
+        product_id: str,
+        periods: int,
+        historical_months: int,
+        max_age: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a stored forecast if it is fresh enough.
+
+        Returns:
+            The stored ForecastResult dict, or None
+        """
+        max_age = self.max_age if max_age is None else max_age
+        if max_age <= 0:
+            return None
+
+        try:
+            query = """
+                SELECT result
+                FROM forecast_precomputed
+                WHERE product_id = $1
+                  AND periods = $2
+                  AND historical_months = $3
+                  AND generated_at >= NOW() - make_interval(secs => $4);
+            """
+            async with self.pool.acquire() as conn:
+                value = await conn.fetchval(query, product_id, periods, historical_months, max_age)
+            return json.loads(value) if value is not None else None
+
+        except Exception as e:
+            print(f"Error loading precomputed forecast: {e}")
+            return None
+
+    async def save_many(self, periods: int, historical_months: int, results: List[Dict[str, Any]]) -> None:
+        """
+        Upsert forecasts produced in one generation.
+
+        Args:
+            periods: Forecast horizon the results were generated for
+            historical_months: History window the results were generated from
+            results: ForecastResult dicts, each including productId
+        """
+        if not results:
+            return
+
+        try:
+            query = """
+                INSERT INTO forecast_precomputed (product_id, periods, historical_months, result, generated_at)
+                VALUES ($1, $2, $3, $4::jsonb, NOW())
+                ON CONFLICT (product_id, periods, historical_months) DO UPDATE SET
+                    result = EXCLUDED.result,
+                    generated_at = EXCLUDED.generated_at;
+            """
+            records = [
+                (
+                    result["productId"],
+                    periods,
+                    historical_months,
+                    json.dumps({k: v for k, v in result.items() if k != "productId"}),
+                )
+                for result in results
+            ]
+            async with self.pool.acquire() as conn:
+                await conn.executemany(query, records)
+
+        except Exception as e:
+            print(f"Error saving precomputed forecasts: {e}")
+
+    async def delete(self, product_ids: List[str]) -> int:
+        """
+        Drop every stored forecast for the given products (their sales changed).
+
+        Returns:
+            Number of rows deleted
+        """
+        if not product_ids:
+            return 0
+        try:
+            async with self.pool.acquire() as conn:
+                status = await conn.execute(
+                    "DELETE FROM forecast_precomputed WHERE product_id = ANY($1::text[]);",
+                    product_ids
+                )
+            return int(status.split()[-1])
+
+        except Exception as e:
+            print(f"Error deleting precomputed forecasts: {e}")
+            return 0
+
+
+# Process-wide store shared by every ForecastModel
+precomputed_store = PrecomputedForecastStore()
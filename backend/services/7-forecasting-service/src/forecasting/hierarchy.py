@@ -0,0 +1,364 @@
+import os
+import time
+import asyncio
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from .executor import fit_executor
+from .model import ForecastModel, SMOOTHING_BATCH_SIZE
+from .smoothing import Z_95, ExponentialSmoothingEngine, to_padded_matrix
+from .intermittent import IntermittentDemandEngine
+
+RECONCILIATION_METHODS = ("bottom_up", "mint")
+
+# (mean, lower, upper) arrays of length periods
+Interval = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class HierarchicalForecaster:
+    """
+    Total -> category -> product forecasting with reconciliation.
+
+    Product sales are loaded into one products-by-months matrix and summed
+    into category and total series in the same pass. Each aggregate is
+    forecast once. Head products (enough active months, and together
+    making up FORECAST_HIERARCHY_HEAD_SHARE of their category's volume)
+    get their own model; long-tail products inherit their category's
+    forecast scaled by their recent volume share, so only a small fraction
+    of the catalog needs an individual fit.
+
+    Reconciliation makes every level add up:
+        bottom_up: Categories and total are the sums of product forecasts
+        mint: MinT with a diagonal (WLS variance) weight matrix, which
+            also adjusts product forecasts towards the aggregate forecasts
+
+    Reconciled intervals keep each series' base interval width around
+    the reconciled mean.
+
+    Environment variables:
+        FORECAST_HIERARCHY_MIN_ACTIVE_MONTHS: Months with sales a product
+            needs for its own model (default 12)
+        FORECAST_HIERARCHY_HEAD_SHARE: Share of category volume covered by
+            individually modelled products (default 0.8)
+        FORECAST_HIERARCHY_SHARE_MONTHS: Months used for long-tail volume
+            shares (default 12)
+    """
+
+    def __init__(self, model: Optional[ForecastModel] = None):
+        self.model = model or ForecastModel()
+        self.min_active_months = int(os.getenv("FORECAST_HIERARCHY_MIN_ACTIVE_MONTHS", 12))
+        self.head_share = float(os.getenv("FORECAST_HIERARCHY_HEAD_SHARE", 0.8))
+        self.share_months = int(os.getenv("FORECAST_HIERARCHY_SHARE_MONTHS", 12))
+
+    async def forecast(
+        self,
+        categories: Optional[List[str]] = None,
+        product_ids: Optional[List[str]] = None,
+        periods: int = 6,
+        historical_months: int = 24,
+        reconciliation: str = "bottom_up",
+        engine: str = "auto",
+        include_products: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Forecast a product hierarchy and reconcile the levels.
+
+        Args:
+            categories: Restrict to these categories
+            product_ids: Restrict to these products
+            periods: Number of periods to forecast
+            historical_months: Months of historical data to use
+            reconciliation: 'bottom_up' or 'mint'
+            engine: 'auto', 'sarimax', 'ets' or 'intermittent' for every fitted series
+            include_products: Return product-level forecasts
+
+        Returns:
+            Dict with config, summary, total, categories and products
+        """
+        if reconciliation not in RECONCILIATION_METHODS:
+            raise ValueError(f"Unknown reconciliation method: {reconciliation}")
+
+        started = time.perf_counter()
+        loader = self.model.data_loader
+
+        # 1. Product -> category and every product's monthly sales
+        category_by_product = await loader.get_product_categories(product_ids, categories)
+        if product_ids is not None and categories is None:
+            # Only products missing from the products table; with a category
+            # filter, a missing product is one the filter excluded
+            for product_id in product_ids:
+                category_by_product.setdefault(product_id, "uncategorized")
+        ids, months, matrix, _ = await loader.get_sales_matrix(list(category_by_product), historical_months)
+        if not ids:
+            raise ValueError("No sales history for the requested products")
+
+        # 2. Category and total series, aggregated in one pass
+        category_names = sorted({category_by_product[pid] for pid in ids})
+        category_index = {name: i for i, name in enumerate(category_names)}
+        cat_idx = np.array([category_index[category_by_product[pid]] for pid in ids])
+        n_categories = len(category_names)
+
+        category_matrix = np.zeros((n_categories, matrix.shape[1]))
+        np.add.at(category_matrix, cat_idx, matrix)
+        total = category_matrix.sum(axis=0)
+
+        head = self._head_mask(matrix, cat_idx, n_categories)
+        shares = self._volume_shares(matrix, cat_idx, n_categories)
+        head_rows = np.flatnonzero(head)
+
+        # 3. One forecast per aggregate and per head product
+        stored_orders = await self.model.order_store.get_many([ids[i] for i in head_rows])
+        series = [(_trim_leading_zeros(total, months), None)]
+        series += [(_trim_leading_zeros(row, months), None) for row in category_matrix]
+        series += [
+            (_trim_leading_zeros(matrix[i], months), stored_orders.get(ids[i]))
+            for i in head_rows
+        ]
+        forecasts = await self._forecast_many(series, periods, engine)
+
+        base_mean = np.array([f[0] for f in forecasts])
+        base_lower = np.array([f[1] for f in forecasts])
+        base_upper = np.array([f[2] for f in forecasts])
+        base_var = ((base_upper - base_lower) / (2 * Z_95)) ** 2
+
+        n_aggregates = 1 + n_categories
+        agg_mean, agg_var = base_mean[:n_aggregates], base_var[:n_aggregates]
+
+        # 4. Product base forecasts: own model for head, category share for tail
+        bottom_mean = shares[:, np.newaxis] * agg_mean[1 + cat_idx]
+        bottom_var = shares[:, np.newaxis] ** 2 * agg_var[1 + cat_idx]
+        bottom_mean[head_rows] = base_mean[n_aggregates:]
+        bottom_var[head_rows] = base_var[n_aggregates:]
+
+        # 5. Reconcile
+        if reconciliation == "mint":
+            reconciled = reconcile_mint(bottom_mean, bottom_var, agg_mean, agg_var, cat_idx, n_categories)
+        else:
+            reconciled = bottom_mean
+        # Demand cannot be negative; clip before summing so levels stay coherent
+        reconciled = np.maximum(reconciled, 0.0)
+        reconciled_categories = np.zeros((n_categories, periods))
+        np.add.at(reconciled_categories, cat_idx, reconciled)
+        reconciled_total = reconciled_categories.sum(axis=0)
+
+        bottom_half_width = Z_95 * np.sqrt(bottom_var)
+        forecast_dates = pd.date_range(
+            months[-1] + pd.offsets.MonthBegin(1), periods=periods, freq='MS'
+        ).strftime('%Y-%m-%d').tolist()
+
+        category_sizes = np.bincount(cat_idx, minlength=n_categories)
+        result = {
+            "config": {
+                "periods": periods,
+                "historicalMonths": historical_months,
+                "reconciliation": reconciliation,
+                "engine": engine,
+                "forecastDates": forecast_dates,
+            },
+            "summary": {
+                "products": len(ids),
+                "categories": n_categories,
+                "headProducts": int(head.sum()),
+                "tailProducts": int(len(ids) - head.sum()),
+                "fits": len(series),
+                "durationSeconds": round(time.perf_counter() - started, 3),
+            },
+            "total": _level_entry(reconciled_total, Z_95 * np.sqrt(agg_var[0])),
+            "categories": [
+                {
+                    "category": name,
+                    "products": int(category_sizes[i]),
+                    **_level_entry(reconciled_categories[i], Z_95 * np.sqrt(agg_var[1 + i])),
+                }
+                for i, name in enumerate(category_names)
+            ],
+        }
+        if include_products:
+            result["products"] = [
+                {
+                    "productId": pid,
+                    "category": category_names[cat_idx[i]],
+                    "source": "model" if head[i] else "categoryShare",
+                    "share": round(float(shares[i]), 6),
+                    **_level_entry(reconciled[i], bottom_half_width[i]),
+                }
+                for i, pid in enumerate(ids)
+            ]
+
+        print(
+            f"Hierarchical forecast: {len(ids)} products, {n_categories} categories, "
+            f"{len(series)} fits ({reconciliation})"
+        )
+        return result
+
+    def _head_mask(self, matrix: np.ndarray, cat_idx: np.ndarray, n_categories: int) -> np.ndarray:
+        """
+        Products that get their own model: enough active months and among
+        the largest sellers covering head_share of their category's volume.
+        """
+        volume = matrix.sum(axis=1)
+        active = (matrix > 0).sum(axis=1) >= self.min_active_months
+
+        order = np.lexsort((-volume, cat_idx))
+        sorted_cats = cat_idx[order]
+        sorted_volume = volume[order]
+        cumulative = np.cumsum(sorted_volume)
+        category_start = np.searchsorted(sorted_cats, np.arange(n_categories))
+        before_category = np.concatenate([[0.0], cumulative])[category_start]
+        volume_before = cumulative - sorted_volume - before_category[sorted_cats]
+
+        category_volume = np.bincount(cat_idx, weights=volume, minlength=n_categories)
+        covered = np.zeros(len(volume), dtype=bool)
+        covered[order] = volume_before < self.head_share * category_volume[sorted_cats]
+        return active & covered
+
+    def _volume_shares(self, matrix: np.ndarray, cat_idx: np.ndarray, n_categories: int) -> np.ndarray:
+        """Each product's share of its category's recent volume."""
+        recent = matrix[:, -self.share_months:].sum(axis=1)
+        overall = matrix.sum(axis=1)
+        recent_totals = np.bincount(cat_idx, weights=recent, minlength=n_categories)
+        overall_totals = np.bincount(cat_idx, weights=overall, minlength=n_categories)
+
+        use_recent = recent_totals[cat_idx] > 0
+        numerator = np.where(use_recent, recent, overall)
+        denominator = np.where(use_recent, recent_totals[cat_idx], overall_totals[cat_idx])
+        return np.divide(numerator, denominator, out=np.zeros(len(numerator)), where=denominator > 0)
+
+    async def _forecast_many(
+        self,
+        series: List[Tuple[pd.Series, Optional[Dict[str, Any]]]],
+        periods: int,
+        engine: str
+    ) -> List[Interval]:
+        """Forecast every series in the worker pool; smoothing and intermittent series share jobs."""
+        forecasts: List[Optional[Interval]] = [None] * len(series)
+        vectorized_rows: Dict[str, List[int]] = {"ets": [], "intermittent": []}
+        jobs = []
+        sparse = self.model.intermittent_mask([time_series for time_series, _ in series])
+        for i, (time_series, model_order) in enumerate(series):
+            if len(time_series) < 3:
+                forecasts[i] = naive_interval_forecast(time_series, periods)
+                continue
+            selected = self.model.select_engine(len(time_series), engine, sparse[i])
+            if selected != "sarimax":
+                vectorized_rows[selected].append(i)
+            else:
+                jobs.append(([i], fit_executor.run(
+                    run_interval_forecast_job, [(time_series, model_order)], periods, "sarimax", wait=True
+                )))
+
+        for selected, engine_rows in vectorized_rows.items():
+            for offset in range(0, len(engine_rows), SMOOTHING_BATCH_SIZE):
+                rows = engine_rows[offset:offset + SMOOTHING_BATCH_SIZE]
+                jobs.append((rows, fit_executor.run(
+                    run_interval_forecast_job, [(series[i][0], None) for i in rows], periods, selected, wait=True
+                )))
+
+        outcomes = await asyncio.gather(*[job for _, job in jobs], return_exceptions=True)
+        for (rows, _), outcome in zip(jobs, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"Hierarchy forecast job failed: {outcome}")
+                outcome = [naive_interval_forecast(series[i][0], periods) for i in rows]
+            for i, forecast in zip(rows, outcome):
+                forecasts[i] = forecast
+        return forecasts
+
+
+def reconcile_mint(
+    bottom_mean: np.ndarray,
+    bottom_var: np.ndarray,
+    agg_mean: np.ndarray,
+    agg_var: np.ndarray,
+    cat_idx: np.ndarray,
+    n_categories: int
+) -> np.ndarray:
+    """
+    MinT reconciliation with a diagonal weight matrix for a total/category/product tree.
+
+    Uses b = b_hat + W_b A' (W_a + A W_b A')^-1 (a_hat - A b_hat), where A
+    sums products into [total, categories]. Only the small aggregate
+    system is solved, so this scales to large catalogs. Weights are the
+    one-step-ahead forecast variances.
+
+    Returns:
+        Reconciled product forecasts, same shape as bottom_mean
+    """
+    eps = 1e-6
+    w_bottom = np.maximum(bottom_var[:, 0], eps)
+    w_agg = np.maximum(agg_var[:, 0], eps)
+
+    # A W_b A' for A = [1'; category membership]
+    category_weight = np.bincount(cat_idx, weights=w_bottom, minlength=n_categories)
+    system = np.diag(w_agg).astype(float)
+    system[0, 0] += w_bottom.sum()
+    system[0, 1:] += category_weight
+    system[1:, 0] += category_weight
+    system[1:, 1:] += np.diag(category_weight)
+
+    # Coherency gap: aggregate forecasts minus sums of product forecasts
+    category_sums = np.zeros((n_categories, bottom_mean.shape[1]))
+    np.add.at(category_sums, cat_idx, bottom_mean)
+    gap = agg_mean - np.vstack([category_sums.sum(axis=0, keepdims=True), category_sums])
+
+    lam = np.linalg.solve(system, gap)
+    return bottom_mean + w_bottom[:, np.newaxis] * (lam[0] + lam[1 + cat_idx])
+
+
+def naive_interval_forecast(time_series: pd.Series, periods: int) -> Interval:
+    """Flat mean-of-last-three forecast with a +/- 1.96 std band."""
+    values = time_series.values.astype(float)
+    if len(values) == 0:
+        zeros = np.zeros(periods)
+        return zeros, zeros, zeros
+    mean = np.full(periods, values[-3:].mean())
+    half_width = Z_95 * (values.std() if len(values) > 1 else 0.0)
+    return mean, mean - half_width, mean + half_width
+
+
+def run_interval_forecast_job(
+    items: List[Tuple[pd.Series, Optional[Dict[str, Any]]]],
+    periods: int,
+    engine: str
+) -> List[Interval]:
+    """
+    Process-pool entry point: raw forecasts with 95% bounds for many series.
+
+    Returns:
+        (mean, lower, upper) per item, in order
+    """
+    if engine in ("ets", "intermittent"):
+        matrix = to_padded_matrix([s.values.astype(float) for s, _ in items])
+        fitter = ExponentialSmoothingEngine() if engine == "ets" else IntermittentDemandEngine()
+        fit = fitter.fit_forecast(matrix, periods)
+        return [(fit["mean"][i], fit["lower"][i], fit["upper"][i]) for i in range(len(items))]
+
+    model = ForecastModel()
+    forecasts = []
+    for time_series, model_order in items:
+        try:
+            forecasts.append(model.sarimax_interval_forecast(time_series, periods, model_order))
+        except Exception as e:
+            print(f"Hierarchy SARIMAX fit failed: {e}")
+            forecasts.append(naive_interval_forecast(time_series, periods))
+    return forecasts
+
+
+def _trim_leading_zeros(values: np.ndarray, months: pd.DatetimeIndex) -> pd.Series:
+    """Monthly series starting at the first month with sales."""
+    nonzero = np.flatnonzero(values)
+    start = nonzero[0] if len(nonzero) else len(values)
+    return pd.Series(values[start:], index=months[start:])
+
+
+def _level_entry(mean: np.ndarray, half_width: np.ndarray) -> Dict[str, Any]:
+    """Frontend-style demand and interval lists for one node of the hierarchy."""
+    return {
+        "forecastedDemand": [max(0, int(round(v))) for v in mean],
+        "confidenceIntervals": [
+            {
+                "lowerBound": max(0, int(round(m - w))),
+                "upperBound": max(0, int(round(m + w))),
+            }
+            for m, w in zip(mean, half_width)
+        ],
+    }
@@ -0,0 +1,251 @@
+import os
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+from .smoothing import Z_95
+
+# Syntetos-Boylan-Croston cut-offs: average inter-demand interval and
+# squared coefficient of variation of the non-zero demand sizes
+ADI_CUTOFF = float(os.getenv("FORECAST_ADI_CUTOFF", 1.32))
+CV2_CUTOFF = float(os.getenv("FORECAST_CV2_CUTOFF", 0.49))
+
+DEMAND_CLASSES = ("smooth", "erratic", "intermittent", "lumpy")
+
+# Smoothing constants searched for every series at once; intermittent
+# demand updates rarely, so the grid stays at the low end
+_ALPHAS = np.array([0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5])
+_BETAS = np.array([0.02, 0.05, 0.1, 0.2, 0.3])
+
+METHODS = ("croston", "sba", "tsb")
+
+
+def classify_demand(matrix: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    ADI / CV² demand classification of every row of a padded matrix.
+
+    ADI is observed periods per period with demand; CV² is the squared
+    coefficient of variation of the non-zero demand sizes. Rows with no
+    demand at all have an infinite ADI and classify as intermittent.
+
+    Args:
+        matrix: (n_series, n_periods) float array, NaN outside each series
+
+    Returns:
+        Dict of (n_series,) arrays: adi, cv2, demandClass ('smooth' |
+        'erratic' | 'intermittent' | 'lumpy') and intermittent (ADI at or
+        above FORECAST_ADI_CUTOFF, i.e. intermittent or lumpy)
+    """
+    y = np.asarray(matrix, dtype=float)
+    if y.ndim == 1:
+        y = y[np.newaxis, :]
+
+    observed = ~np.isnan(y)
+    demand = observed & (np.nan_to_num(y) > 0)
+    n_obs = observed.sum(axis=1)
+    n_demand = demand.sum(axis=1)
+
+    sizes = np.where(demand, y, 0.0)
+    mean = sizes.sum(axis=1) / np.maximum(n_demand, 1)
+    var = np.where(demand, (y - mean[:, np.newaxis]) ** 2, 0.0).sum(axis=1) / np.maximum(n_demand, 1)
+
+    adi = np.divide(n_obs, n_demand, out=np.full(len(y), np.inf), where=n_demand > 0)
+    cv2 = np.divide(var, mean ** 2, out=np.zeros(len(y)), where=mean > 0)
+
+    sparse = adi >= ADI_CUTOFF
+    variable = cv2 >= CV2_CUTOFF
+    index = sparse.astype(int) * 2 + variable.astype(int)
+    return {
+        "adi": adi,
+        "cv2": cv2,
+        "demandClass": np.array(DEMAND_CLASSES, dtype=object)[index],
+        "intermittent": sparse,
+    }
+
+
+class IntermittentDemandEngine:
+    """
+    Vectorized Croston-family forecasts for many sparse series at once.
+
+    Croston smooths the non-zero demand sizes and the intervals between
+    them separately and forecasts size / interval; SBA multiplies that by
+    (1 - alpha/2) to remove Croston's upward bias; TSB smooths the demand
+    probability every period instead of the interval, so demand that dies
+    out decays towards zero. All series and the whole parameter grid are
+    evaluated in one NumPy recursion, like ExponentialSmoothingEngine.
+
+    Forecasts are flat. Intervals use the in-sample one-step MSE, widened
+    with the horizon as for simple exponential smoothing, and are clipped
+    at zero.
+
+    Series of different lengths are passed left-padded with NaN.
+    """
+
+    def fit_forecast(
+        self,
+        matrix: np.ndarray,
+        periods: int,
+        method: str = "auto"
+    ) -> Dict[str, np.ndarray]:
+        """
+        Fit every row of `matrix` and forecast `periods` steps ahead.
+
+        Args:
+            matrix: (n_series, n_periods) float array, NaN before each series starts
+            periods: Forecast horizon
+            method: 'croston', 'sba', 'tsb' or 'auto' (lowest AIC per series)
+
+        Returns:
+            Dict of arrays, one row per series:
+                mean, lower, upper: (n_series, periods)
+                fitted: (n_series, n_periods) one-step-ahead in-sample fits
+                method: (n_series,) chosen method names
+                alpha, beta, sigma2, aic: (n_series,); beta is 0 except for TSB
+        """
+        y = np.asarray(matrix, dtype=float)
+        if y.ndim == 1:
+            y = y[np.newaxis, :]
+
+        methods = METHODS if method == "auto" else (method,)
+        if any(m not in METHODS for m in methods):
+            raise ValueError(f"Unknown intermittent-demand method: {method}")
+
+        best: Optional[Dict[str, np.ndarray]] = None
+        for name in methods:
+            fit = self._fit_method(y, name)
+            if best is None:
+                best = fit
+                continue
+            better = fit["aic"] < best["aic"]
+            for key in best:
+                if best[key].ndim == 1:
+                    best[key] = np.where(better, fit[key], best[key])
+                else:
+                    best[key] = np.where(better[:, np.newaxis], fit[key], best[key])
+
+        h = np.arange(1, periods + 1, dtype=float)[np.newaxis, :]
+        mean = np.repeat(best["forecast"][:, np.newaxis], periods, axis=1)
+        variance = best["sigma2"][:, np.newaxis] * (1 + (h - 1) * best["alpha"][:, np.newaxis] ** 2)
+        half_width = Z_95 * np.sqrt(variance)
+
+        return {
+            "mean": mean,
+            "lower": np.maximum(mean - half_width, 0.0),
+            "upper": mean + half_width,
+            "fitted": best["fitted"],
+            "method": np.array(METHODS, dtype=object)[best["method_index"].astype(int)],
+            "alpha": best["alpha"],
+            "beta": best["beta"],
+            "sigma2": best["sigma2"],
+            "aic": best["aic"],
+        }
+
+    def _fit_method(self, y: np.ndarray, method: str) -> Dict[str, np.ndarray]:
+        """Grid-search one method for every series simultaneously."""
+        n_series = y.shape[0]
+        rows = np.arange(n_series)
+        observed = ~np.isnan(y)
+        demand = observed & (np.nan_to_num(y) > 0)
+        n_obs = observed.sum(axis=1)
+        n_demand = demand.sum(axis=1)
+
+        # Initial states from the whole sample: mean size, mean interval, demand rate
+        size0 = np.where(demand, y, 0.0).sum(axis=1) / np.maximum(n_demand, 1)
+        interval0 = n_obs / np.maximum(n_demand, 1)
+        prob0 = n_demand / np.maximum(n_obs, 1)
+
+        if method == "tsb":
+            alpha, beta = (g.ravel() for g in np.meshgrid(_ALPHAS, _BETAS, indexing="ij"))
+        else:
+            alpha, beta = _ALPHAS, np.zeros_like(_ALPHAS)
+        debias = 1.0 if method == "sba" else 0.0
+
+        # Pass 1: SSE for every (candidate, series) pair
+        _, sse, _ = _run_recursion(
+            y, observed, demand, size0, interval0, prob0,
+            alpha[:, np.newaxis], beta[:, np.newaxis], debias, method == "tsb",
+            record_fitted=False
+        )
+        pick = np.argmin(sse, axis=0)
+        sse = sse[pick, rows]
+
+        # Pass 2: final forecast and in-sample fits for each series' best candidate
+        forecast, _, fitted = _run_recursion(
+            y, observed, demand, size0, interval0, prob0,
+            alpha[pick][np.newaxis, :], beta[pick][np.newaxis, :], debias, method == "tsb",
+            record_fitted=True
+        )
+
+        k = 2 if method == "tsb" else 1
+        n_eff = np.maximum(n_obs, 1)
+        sigma2 = sse / np.maximum(n_eff - k, 1)
+        aic = n_eff * np.log(np.maximum(sse / n_eff, 1e-12)) + 2 * k
+
+        return {
+            "forecast": forecast[0],
+            "fitted": fitted[0],
+            "alpha": alpha[pick],
+            "beta": beta[pick],
+            "sigma2": sigma2,
+            "aic": aic,
+            "method_index": np.full(n_series, float(METHODS.index(method))),
+        }
+
+
+def _run_recursion(
+    y: np.ndarray,
+    observed: np.ndarray,
+    demand: np.ndarray,
+    size0: np.ndarray,
+    interval0: np.ndarray,
+    prob0: np.ndarray,
+    alpha: np.ndarray,
+    beta: np.ndarray,
+    debias: float,
+    tsb: bool,
+    record_fitted: bool
+) -> Tuple[np.ndarray, np.ndarray, Any]:
+    """
+    Croston / SBA / TSB recursion, vectorized over (candidates, series).
+
+    alpha/beta broadcast against (n_candidates, n_series). Croston and SBA
+    update size and interval only in periods with demand; TSB updates the
+    demand probability every observed period.
+
+    Returns:
+        (final one-step forecast, SSE, one-step fits or None)
+    """
+    n_series, n_periods = y.shape
+    shape = np.broadcast_shapes(alpha.shape, (1, n_series))
+
+    size = np.broadcast_to(size0, shape).copy()
+    interval = np.broadcast_to(interval0, shape).copy()
+    prob = np.broadcast_to(prob0, shape).copy()
+    since = np.zeros(n_series)
+    sse = np.zeros(shape)
+    fitted = np.full(shape + (n_periods,), np.nan) if record_fitted else None
+
+    def predict():
+        if tsb:
+            return prob * size
+        return (1 - debias * alpha / 2) * size / np.maximum(interval, 1.0)
+
+    for t in range(n_periods):
+        active = observed[:, t]
+        if not active.any():
+            continue
+        hit = demand[:, t]
+        value = np.nan_to_num(y[:, t])
+        forecast = predict()
+        if record_fitted:
+            fitted[:, :, t] = np.where(active, forecast, np.nan)
+        sse += np.where(active, value - forecast, 0.0) ** 2
+
+        since = np.where(active, since + 1, since)
+        size = np.where(hit, size + alpha * (value - size), size)
+        if tsb:
+            prob = np.where(active, prob + beta * (hit - prob), prob)
+        else:
+            interval = np.where(hit, interval + alpha * (since - interval), interval)
+        since = np.where(hit, 0, since)
+
+    return predict(), sse, fitted
+
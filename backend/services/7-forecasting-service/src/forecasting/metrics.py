@@ -0,0 +1,240 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Latency buckets in seconds, from cache-hit scale up to slow seasonal fits
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram with fixed label names."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[LabelValues, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _drain(self) -> Dict[LabelValues, List[Any]]:
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def _merge(self, values: Dict[LabelValues, List[Any]]) -> None:
+        with self._lock:
+            for labels, (counts, total, count) in values.items():
+                entry = self._values.get(labels)
+                if entry is None:
+                    self._values[labels] = [list(counts), total, count]
+                    continue
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, [list(e[0]), e[1], e[2]]) for labels, e in self._values.items())
+        for labels, (counts, total, count) in items:
+            base = _format_labels(self.labelnames, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames + ('le',), labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{base} {total}")
+            lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter with fixed label names."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str]):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _drain(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def _merge(self, values: Dict[LabelValues, float]) -> None:
+        with self._lock:
+            for labels, amount in values.items():
+                self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus text-format registry.
+
+    Histograms and counters are recorded in-process with a lock and a
+    bisect per observation, cheap enough to leave on in production.
+    Worker processes record into their own registry; the executor drains
+    it after every job and merges the snapshot into the API process (see
+    run_with_metrics). Gauges are read from callbacks at scrape time.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, Counter] = {}
+        self._gauges: List[Tuple[str, str, str, Callable[[], Dict[str, float]]]] = []
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._histograms.setdefault(name, Histogram(name, help_text, labelnames, buckets))
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str]) -> Counter:
+        return self._counters.setdefault(name, Counter(name, help_text, labelnames))
+
+    def gauge_callback(self, prefix: str, help_text: str, fn: Callable[[], Dict[str, float]], kind: str = "gauge") -> None:
+        """
+        Register metrics read at scrape time.
+
+        Args:
+            prefix: Metric name prefix; fn's keys are appended with '_'
+            help_text: HELP text shared by the family
+            fn: Returns {suffix: value}
+            kind: 'gauge' or 'counter'
+        """
+        self._gauges.append((prefix, help_text, kind, fn))
+
+    def drain(self) -> Dict[str, Dict[str, Any]]:
+        """Take and reset everything recorded so far (used in worker processes)."""
+        return {
+            "histograms": {name: h._drain() for name, h in self._histograms.items()},
+            "counters": {name: c._drain() for name, c in self._counters.items()},
+        }
+
+    def merge(self, snapshot: Dict[str, Dict[str, Any]]) -> None:
+        """Add a drained snapshot from another process."""
+        for name, values in snapshot.get("histograms", {}).items():
+            if values and name in self._histograms:
+                self._histograms[name]._merge(values)
+        for name, values in snapshot.get("counters", {}).items():
+            if values and name in self._counters:
+                self._counters[name]._merge(values)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for histogram in self._histograms.values():
+            lines.extend(histogram.render())
+        for counter in self._counters.values():
+            lines.extend(counter.render())
+        for prefix, help_text, kind, fn in self._gauges:
+            try:
+                values = fn()
+            except Exception as e:
+                print(f"Metrics callback {prefix} failed: {e}")
+                continue
+            for suffix, value in values.items():
+                name = f"{prefix}_{suffix}"
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "forecast_stage_duration_seconds",
+    "Time spent in each forecasting pipeline stage.",
+    ["stage"],
+)
+REQUEST_SECONDS = metrics.histogram(
+    "forecast_request_duration_seconds",
+    "End-to-end single-product forecast latency by result source.",
+    ["source"],
+)
+FALLBACKS = metrics.counter(
+    "forecast_default_fallbacks_total",
+    "Forecasts answered with the default baseline, by reason.",
+    ["reason"],
+)
+TIERS = metrics.counter(
+    "forecast_model_tier_total",
+    "Forecasts produced by each tier of the degrade ladder.",
+    ["tier"],
+)
+
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """Record the duration of a pipeline stage (db_load, prepare_series, fit, ...)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage)
+
+
+def record_fallback(reason: str) -> None:
+    """Count a default-forecast fallback."""
+    FALLBACKS.inc(reason)
+
+
+def record_tier(tier: str) -> None:
+    """Count a forecast by the model tier that produced it."""
+    TIERS.inc(tier)
+
+
+def run_with_metrics(fn: Callable[..., Any], *args: Any) -> Tuple[Any, Dict[str, Dict[str, Any]]]:
+    """
+    Process-pool wrapper: run fn and return its result with the metrics
+    the worker recorded, so the API process can merge them.
+    """
+    result = fn(*args)
+    return result, metrics.drain()
+
+
+def reset_worker_metrics() -> None:
+    """
+    Process-pool initializer: forked workers inherit the parent's recorded
+    values, which must not be reported back a second time.
+    """
+    metrics.drain()
@@ -0,0 +1,41 @@
+import os
+from pathlib import Path
+from .db_pool import DatabasePool, db_pool
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+
+# Postgres advisory-lock IDs taken by the service, kept together so they
+# stay distinct: two jobs sharing an ID would wait on each other
+MIGRATION_LOCK_ID = 7_000_001   # concurrent replicas don't apply migrations at the same time
+ROLLUP_LOCK_ID = 7_000_002      # one rollup refresh at a time (src/forecasting/rollup.py)
+PRECOMPUTE_LOCK_ID = 7_000_003  # one replica precomputes at a time (src/forecasting/precompute.py)
+TRIGGER_LOCK_ID = 7_000_004     # change-trigger DDL (src/forecasting/change_feed.py)
+
+
+async def apply_migrations(pool: DatabasePool = db_pool) -> int:
+    """
+    Apply the service's SQL migrations in filename order.
+
+    Every migration is written to be idempotent (IF NOT EXISTS), so they
+    are simply re-run on each startup. Disable with FORECAST_AUTO_MIGRATE=false.
+
+    Returns:
+        Number of migration files executed
+    """
+    if os.getenv("FORECAST_AUTO_MIGRATE", "true").lower() in ("0", "false", "no"):
+        return 0
+
+    files = sorted(MIGRATIONS_DIR.glob("*.sql"))
+    if not files:
+        return 0
+
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            # Index and table builds outlast the request-sized statement timeout
+            timeout = await pool.use_maintenance_timeout(conn)
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK_ID, timeout=timeout)
+            for path in files:
+                await conn.execute(path.read_text(), timeout=timeout)
+
+    print(f"Applied {len(files)} forecasting migrations")
+    return len(files)
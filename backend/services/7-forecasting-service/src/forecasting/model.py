@@ -1,25 +1,114 @@
+import os
+import time
+import asyncio
 import pandas as pd
 import numpy as np
 import statsmodels.api as sm
-from typing import Dict, Any, List, Optional
-from .data_loader import DataLoader
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+from .data_loader import DataLoader, GRANULARITY_FREQ
 from .preprocessor import Preprocessor
+from .executor import fit_executor, ExecutorSaturatedError
+from .cache import ForecastCache, forecast_cache
+from .param_store import ParameterStore, param_store
+from .forecast_store import PrecomputedForecastStore, precomputed_store
+from .order_store import ModelOrderStore, model_order_store
+from .smoothing import ExponentialSmoothingEngine, to_padded_matrix, Z_95
+from .intermittent import IntermittentDemandEngine, classify_demand
+from .metrics import REQUEST_SECONDS, time_stage, record_fallback, record_tier
+from .singleflight import request_coalescer
+from .scenario import apply_scenarios, impulse_response
+from .model_registry import ModelRegistry, model_registry, capture_fit, forecast_state, align_entry, state_impulse_response
+
+# Optimizer budget when warm-starting from stored parameters
+WARM_START_MAXITER = int(os.getenv("FORECAST_WARM_MAXITER", 50))
+# Max new trailing months absorbed with stored parameters before re-estimating
+MAX_APPEND_MONTHS = int(os.getenv("FORECAST_MAX_APPEND_MONTHS", 3))
+# engine='auto' uses exponential smoothing for series shorter than this
+SMOOTHING_MAX_MONTHS = int(os.getenv("FORECAST_ETS_MAX_MONTHS", 24))
+# Series per vectorized exponential-smoothing call in batch runs
+SMOOTHING_BATCH_SIZE = 5000
+# engine='auto' routes sparse series (ADI at or above FORECAST_ADI_CUTOFF) to Croston/SBA/TSB
+INTERMITTENT_ROUTING = os.getenv("FORECAST_INTERMITTENT", "true").lower() != "false"
+# Fewest points before a series' demand pattern is classified
+INTERMITTENT_MIN_POINTS = int(os.getenv("FORECAST_INTERMITTENT_MIN_POINTS", 6))
+# SARIMAX fits on at most this many trailing points (bounds long daily series)
+MAX_FIT_POINTS = int(os.getenv("FORECAST_MAX_FIT_POINTS", 365))
+# Seasonal cycle length per series frequency, for seasonality detection
+SEASONAL_LAGS = {"MS": 12, "W-MON": 52, "D": 7}
+# Seasonal period SARIMAX models per frequency; the yearly cycle of weekly
+# data (s=52) makes the state space too large to fit interactively
+SARIMAX_SEASONAL_PERIODS = {"MS": 12, "W-MON": 0, "D": 7}
+# Seconds a single forecast request may spend before cheaper models answer (0 = unlimited)
+LATENCY_BUDGET = float(os.getenv("FORECAST_LATENCY_BUDGET", 3.0))
+# Share of the remaining budget the seasonal SARIMAX fit may use
+SEASONAL_BUDGET_SHARE = float(os.getenv("FORECAST_SEASONAL_BUDGET_SHARE", 0.6))
+# Extra wait for a worker to return its degraded answer after the budget
+BUDGET_GRACE_SECONDS = 0.5
+
+
+class FitTimeoutError(RuntimeError):
+    """A SARIMAX fit was abandoned because its latency budget ran out."""
 
 
 class ForecastModel:
     """
     SARIMAX-based forecasting model that returns frontend-compatible responses.
+    Short series use a vectorized exponential-smoothing fast path, and
+    intermittent (mostly zero) series a vectorized Croston/SBA/TSB engine.
+
+    SARIMAX fits are kept in the on-disk model registry (see ModelRegistry),
+    so a repeat request for a series the stored fit still covers, at any
+    horizon, is answered from the stored state without re-estimation.
+
+    Interactive forecasts run under a latency budget with a degrade ladder:
+    seasonal SARIMAX, non-seasonal SARIMAX, exponential smoothing, then
+    (seasonal) naive. A fit that overruns its share of the budget is
+    abandoned inside the worker and the next tier answers. Every result
+    reports the tier that produced it in `modelTier`.
+
+    Environment variables:
+        FORECAST_LATENCY_BUDGET: Seconds per forecast request before
+            cheaper tiers answer (default 3.0, 0 disables the budget)
+        FORECAST_SEASONAL_BUDGET_SHARE: Share of the remaining budget the
+            seasonal SARIMAX fit may use (default 0.6)
+        FORECAST_INTERMITTENT: Set to 'false' to stop routing intermittent
+            series to Croston/SBA/TSB under engine 'auto' (default true)
+        FORECAST_INTERMITTENT_MIN_POINTS: Fewest points before a series is
+            classified (default 6)
+        FORECAST_ADI_CUTOFF / FORECAST_CV2_CUTOFF: Demand classification
+            cut-offs (default 1.32 / 0.49, see classify_demand)
     """
     
-    def __init__(self):
-        self.data_loader = DataLoader()
+    def __init__(
+        self,
+        data_loader: Optional[DataLoader] = None,
+        cache: Optional[ForecastCache] = None,
+        params: Optional[ParameterStore] = None,
+        precomputed: Optional[PrecomputedForecastStore] = None,
+        orders: Optional[ModelOrderStore] = None,
+        registry: Optional[ModelRegistry] = None
+    ):
+        self.data_loader = data_loader or DataLoader()
         self.preprocessor = Preprocessor()
+        self.cache = cache or forecast_cache
+        self.param_store = params or param_store
+        self.precomputed = precomputed or precomputed_store
+        self.order_store = orders or model_order_store
+        self.registry = registry or model_registry
+        self.smoothing = ExponentialSmoothingEngine()
+        self.intermittent = IntermittentDemandEngine()
+        # Identical concurrent requests share one computation
+        self.coalescer = request_coalescer
 
     async def generate_forecast(
         self, 
         product_id: str, 
         periods: int = 6,
-        historical_months: int = 24
+        historical_months: int = 24,
+        refresh: bool = False,
+        engine: str = "auto",
+        granularity: str = "month",
+        latency_budget: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Generates a forecast for a specific product.
@@ -27,8 +116,15 @@ class ForecastModel:
         
         Args:
             product_id: Product ID to forecast
-            periods: Number of periods to forecast (forecastHorizon)
+            periods: Number of periods to forecast (forecastHorizon), in
+                units of the granularity
             historical_months: Months of historical data to use
+            refresh: Skip the cache and precomputed results and refit now
+            engine: 'auto', 'sarimax', 'ets' (exponential smoothing) or
+                'intermittent' (Croston/SBA/TSB)
+            granularity: 'day', 'week' or 'month' buckets
+            latency_budget: Seconds before cheaper models answer
+                (default FORECAST_LATENCY_BUDGET, 0 = unlimited)
             
         Returns:
             Dict matching ForecastResult interface:
@@ -38,140 +134,1108 @@ class ForecastModel:
                 confidenceIntervals: [{lowerBound, upperBound}],
                 trend?: 'increasing' | 'decreasing' | 'stable',
                 seasonality?: boolean,
-                insights?: string[]
+                insights?: string[],
+                modelTier: 'sarimax_seasonal' | 'sarimax' | 'ets' |
+                    'intermittent' | 'seasonal_naive' | 'naive' | 'default'
             }
+        
+        Concurrent calls with the same arguments share one computation
+        (see SingleFlight).
         """
+        budget = LATENCY_BUDGET if latency_budget is None else latency_budget
+        return await self.coalescer.do(
+            ("predict", product_id, periods, historical_months, refresh, engine, granularity, budget),
+            lambda: self._generate_forecast(product_id, periods, historical_months, refresh, engine, granularity, budget)
+        )
+
+    async def _generate_forecast(
+        self,
+        product_id: str,
+        periods: int,
+        historical_months: int,
+        refresh: bool,
+        engine: str,
+        granularity: str = "month",
+        budget: float = 0.0
+    ) -> Dict[str, Any]:
+        """generate_forecast without request coalescing."""
         print(f"Generating forecast for product {product_id}, periods={periods}")
+        started = time.perf_counter()
+        # Wall-clock deadline, so worker processes can check it too
+        deadline = time.time() + budget if budget > 0 else None
         
-        # 1. Load historical data
-        historical_data = await self.data_loader.get_sales_data(product_id, historical_months)
+        if refresh:
+            self.cache.invalidate_product(product_id)
         
+        # 0. Serve from cache when the product's sales have not changed
+        watermark = await self._get_watermark(product_id)
+        cache_key = None
+        if watermark is not None:
+            variant = engine if granularity == "month" else f"{engine}:{granularity}"
+            cache_key = ForecastCache.make_key(product_id, periods, historical_months, watermark, variant)
+            cached = self.cache.get(cache_key) if not refresh else None
+            if cached is not None:
+                print(f"Forecast cache hit for product {product_id}")
+                REQUEST_SECONDS.observe(time.perf_counter() - started, "cache")
+                return cached
+        
+        # 0b. Serve the scheduled (monthly) precompute while it is fresh enough
+        if not refresh and engine == "auto" and granularity == "month":
+            stored = await self.precomputed.get(product_id, periods, historical_months)
+            if stored is not None:
+                print(f"Serving precomputed forecast for product {product_id}")
+                if cache_key is not None:
+                    self.cache.set(cache_key, stored)
+                REQUEST_SECONDS.observe(time.perf_counter() - started, "precomputed")
+                return stored
+        
+        # 1. Load historical data, bucketed and gap-filled in SQL
+        with time_stage("db_load"):
+            historical_data = await self.data_loader.get_sales_series(product_id, historical_months, granularity)
+        
+        # 2. Preprocess data
+        source = "model"
+        freq = GRANULARITY_FREQ[granularity]
+        time_series = self.prepare_series_or_none(product_id, historical_data, freq)
+        registered = None
+        if time_series is not None:
+            selected = self.select_engine(len(time_series), engine, self.intermittent_mask([time_series])[0])
+            if selected == "sarimax":
+                # Stored orders are selected on monthly series
+                model_order = await self.order_store.get(product_id) if freq == "MS" else None
+                if not refresh:
+                    registered = await self.forecast_from_registry(product_id, time_series, periods, model_order)
+        if time_series is None:
+            result = self._generate_default_forecast(product_id, periods)
+            source = "default"
+        elif selected == "intermittent":
+            # 3-6. Croston/SBA/TSB is cheap enough to run inline
+            result = self.forecast_intermittent_batch([(product_id, time_series)], periods)[0]
+        elif selected == "ets":
+            # 3-6. Exponential smoothing is cheap enough to run inline
+            result = self.forecast_smoothing_batch([(product_id, time_series)], periods)[0]
+        elif registered is not None:
+            # 3-6. The registered fit still covers the series: forecast from its state
+            result = registered
+        else:
+            # 3-6. Fit, forecast and format in the worker pool (keeps the event loop free).
+            # ExecutorSaturatedError propagates so the API can answer 503.
+            fit_points = min(len(time_series), MAX_FIT_POINTS)
+            warm_state = await self.param_store.get(
+                product_id, model_spec(*self.model_orders(fit_points, model_order, freq), freq)
+            )
+            try:
+                job = fit_executor.run(
+                    run_forecast_job, product_id, time_series, periods, warm_state, model_order, deadline
+                )
+                if deadline is None:
+                    result, fit_state = await job
+                else:
+                    timeout = max(deadline - time.time(), 0.0) + BUDGET_GRACE_SECONDS
+                    result, fit_state = await asyncio.wait_for(job, timeout)
+            except ExecutorSaturatedError:
+                raise
+            except asyncio.TimeoutError:
+                # Budget spent waiting for a worker: the cheapest tier answers
+                # inline (not cached, the delay was transient). A fit already
+                # running keeps its executor slot until it ends.
+                print(f"Latency budget exhausted for product {product_id}, answering with naive forecast")
+                REQUEST_SECONDS.observe(time.perf_counter() - started, "model")
+                return self.naive_forecast(product_id, time_series, periods)
+            except Exception as e:
+                # Transient worker failures are not cached
+                print(f"Forecast worker failed: {e}")
+                record_fallback("worker_failed")
+                REQUEST_SECONDS.observe(time.perf_counter() - started, "default")
+                return self._generate_default_forecast(product_id, periods)
+
+            # The worker wrote a fresh registry entry; reload it on next use
+            self.registry.discard(product_id)
+            if fit_state is not None:
+                await self.param_store.save(product_id, fit_state)
+
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+        REQUEST_SECONDS.observe(time.perf_counter() - started, source)
+        return result
+
+    async def _get_watermark(self, product_id: str) -> Optional[str]:
+        """Product's sales watermark, memoized briefly to keep cache hits query-free."""
+        watermark = self.cache.get_watermark(product_id)
+        if watermark is None:
+            watermark = await self.data_loader.get_sales_watermark(product_id)
+            if watermark is not None:
+                self.cache.set_watermark(product_id, watermark)
+        return watermark
+
+    async def generate_scenarios(
+        self,
+        product_id: str,
+        scenarios: List[Dict[str, Any]],
+        periods: int = 6,
+        historical_months: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        What-if forecasts: shocks applied to the latest forecast, no refit.
+
+        The baseline is whatever generate_forecast serves for the same
+        arguments (cached, precomputed or fitted once), so repeated what-ifs
+        for a product cost no model fitting. Carryover shocks propagate
+        through the impulse response of the stored SARIMAX fit, itself
+        cached until the product's sales change. Every scenario is
+        evaluated in one vectorized pass (see apply_scenarios).
+
+        Args:
+            product_id: Product ID to forecast
+            scenarios: [{"name": ..., "shocks": [{"type": 'multiplicative' |
+                'additive', "value", "startPeriod", "endPeriod", "carryover"}]}]
+            periods: Forecast horizon
+            historical_months: Months of history behind the baseline
+                (default FORECAST_ETS_MAX_MONTHS, so engine='auto' fits
+                SARIMAX for series that are not intermittent)
+
+        Returns:
+            Dict with the baseline and, per scenario, forecastedDemand,
+            confidenceIntervals and totals against the baseline; warnings
+            lists carryover shocks the baseline's engine could not apply
+
+        Raises:
+            ValueError: if a shock is invalid
+        """
+        historical_months = historical_months or SMOOTHING_MAX_MONTHS
+        baseline = await self.generate_forecast(product_id, periods, historical_months)
+        psi = await self._scenario_impulse_response(product_id, baseline, periods, historical_months)
+
+        warnings = []
+        carryover_requested = any(shock.get("carryover") for scenario in scenarios for shock in scenario["shocks"])
+        if carryover_requested and psi is None:
+            warnings.append(
+                f"carryover ignored: the {baseline.get('modelTier') or 'stored'} baseline has no fitted "
+                f"SARIMAX dynamics, so shocks only change their own periods"
+            )
+
+        started = time.perf_counter()
+        mean = np.asarray(baseline["forecastedDemand"], dtype=float)
+        intervals = baseline["confidenceIntervals"]
+        with time_stage("scenarios"):
+            paths = apply_scenarios(
+                mean,
+                np.array([ci["lowerBound"] for ci in intervals], dtype=float),
+                np.array([ci["upperBound"] for ci in intervals], dtype=float),
+                scenarios,
+                psi
+            )
+        demand = np.rint(paths["mean"]).astype(int)
+        lower = np.rint(paths["lower"]).astype(int)
+        upper = np.rint(paths["upper"]).astype(int)
+
+        baseline_total = int(mean.sum())
+        results = []
+        for row, scenario in enumerate(scenarios):
+            total = int(demand[row].sum())
+            results.append({
+                "name": scenario.get("name") or f"scenario-{row + 1}",
+                "forecastedDemand": demand[row].tolist(),
+                "confidenceIntervals": [
+                    {"lowerBound": int(lo), "upperBound": int(hi)}
+                    for lo, hi in zip(lower[row], upper[row])
+                ],
+                "totalDemand": total,
+                "deltaTotal": total - baseline_total,
+                "deltaPercent": round((total - baseline_total) / baseline_total * 100, 2) if baseline_total else None,
+            })
+
+        return {
+            "productId": product_id,
+            "periods": periods,
+            "baseline": {
+                "forecastedDemand": baseline["forecastedDemand"],
+                "confidenceIntervals": intervals,
+                "totalDemand": baseline_total,
+                "modelTier": baseline.get("modelTier"),
+            },
+            "carryover": psi is not None,
+            "warnings": warnings,
+            "scenarios": results,
+            "evaluationMs": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    async def _scenario_impulse_response(
+        self,
+        product_id: str,
+        baseline: Dict[str, Any],
+        periods: int,
+        historical_months: int
+    ) -> Optional[np.ndarray]:
+        """psi weights of the fit behind a baseline, or None for non-SARIMAX tiers."""
+        spec = baseline.get("modelSpec")
+        if spec is None:
+            return None
+
+        watermark = await self._get_watermark(product_id)
+        key = None
+        if watermark is not None:
+            key = ForecastCache.make_key(product_id, periods, historical_months, watermark, f"irf:{spec}")
+            cached = self.cache.get(key)
+            if cached is not None:
+                return np.asarray(cached, dtype=float)
+
+        try:
+            entry = await self.registry.get(product_id, spec)
+            if entry is not None:
+                psi = state_impulse_response(entry, periods)
+            else:
+                state = await self.param_store.get(product_id, spec)
+                if state is None:
+                    return None
+                psi = impulse_response(state, periods)
+        except Exception as e:
+            print(f"Impulse response failed for product {product_id}: {e}")
+            return None
+        if psi is not None and key is not None:
+            self.cache.set(key, psi.tolist())
+        return psi
+
+    async def generate_batch_forecast(
+        self,
+        product_ids: List[str],
+        periods: int = 6,
+        historical_months: int = 24,
+        engine: str = "auto",
+        use_series_store: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generates forecasts for many products, yielding each as it finishes.
+
+        All series are loaded with a single gap-filled matrix query and the SARIMAX fits are
+        fanned out across the shared worker pool. Series routed to
+        exponential smoothing or to the intermittent-demand engine are
+        fitted together in vectorized chunks.
+
+        Args:
+            product_ids: Product IDs to forecast
+            periods: Number of periods to forecast (forecastHorizon)
+            historical_months: Months of historical data to use
+            engine: 'auto', 'sarimax', 'ets' or 'intermittent'
+            use_series_store: Read the series from the memory-mapped store when
+                it is fresh (interactive batches; precompute reads Postgres)
+
+        Yields:
+            Dict matching ForecastResult interface, plus productId
+        """
+        print(f"Generating batch forecast for {len(product_ids)} products, periods={periods}")
+
+        # 1. Load every series in one round trip, as one dense matrix
+        with time_stage("db_load"):
+            sales_matrix = await self.data_loader.get_sales_matrix(
+                product_ids, historical_months, use_store=use_series_store
+            )
+
+        stored_states = await self.param_store.get_many(product_ids)
+        stored_orders = await self.order_store.get_many(product_ids)
+
+        # 2. Slice every series out of the matrix; products without usable history answer immediately
+        series_by_product = self.series_from_matrix(product_ids, *sales_matrix)
+        usable = [p for p in product_ids if series_by_product[p] is not None]
+        sparse = dict(zip(usable, self.intermittent_mask([series_by_product[p] for p in usable])))
+        pending = []
+        vectorized_items: Dict[str, List[Tuple[str, pd.Series]]] = {"ets": [], "intermittent": []}
+        for product_id in product_ids:
+            time_series = series_by_product[product_id]
+            if time_series is None:
+                yield {"productId": product_id, **self._generate_default_forecast(product_id, periods)}
+                continue
+            selected = self.select_engine(len(time_series), engine, sparse[product_id])
+            if selected != "sarimax":
+                vectorized_items[selected].append((product_id, time_series))
+                continue
+            model_order = stored_orders.get(product_id)
+            registered = await self.forecast_from_registry(product_id, time_series, periods, model_order)
+            if registered is not None:
+                yield {"productId": product_id, **registered}
+                continue
+            spec = model_spec(*self.model_orders(len(time_series), model_order))
+            warm_state = stored_states.get(f"{product_id}|{spec}")
+            pending.append(self._submit_batch_job(product_id, time_series, periods, warm_state, model_order))
+
+        for selected, items in vectorized_items.items():
+            for offset in range(0, len(items), SMOOTHING_BATCH_SIZE):
+                chunk = items[offset:offset + SMOOTHING_BATCH_SIZE]
+                pending.append(self._submit_smoothing_job(chunk, periods, selected))
+
+        # 3. Stream fitted results in completion order, persisting new params in chunks
+        new_states: Dict[str, Dict[str, Any]] = {}
+        for next_results in asyncio.as_completed(pending):
+            for product_id, result, fit_state in await next_results:
+                if fit_state is not None:
+                    new_states[product_id] = fit_state
+                    if len(new_states) >= 500:
+                        await self.param_store.save_many(new_states)
+                        new_states = {}
+                yield {"productId": product_id, **result}
+
+        await self.param_store.save_many(new_states)
+
+    async def _submit_batch_job(
+        self,
+        product_id: str,
+        time_series: pd.Series,
+        periods: int,
+        warm_state: Optional[Dict[str, Any]] = None,
+        model_order: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """Run one batch fit in the worker pool, falling back to a default forecast."""
+        try:
+            result, fit_state = await fit_executor.run(
+                run_forecast_job, product_id, time_series, periods, warm_state, model_order, wait=True
+            )
+        except Exception as e:
+            print(f"Batch fit failed for {product_id}: {e}")
+            record_fallback("batch_fit_failed")
+            result, fit_state = self._generate_default_forecast(product_id, periods), None
+        self.registry.discard(product_id)
+        return [(product_id, result, fit_state)]
+
+    async def _submit_smoothing_job(
+        self,
+        items: List[Tuple[str, pd.Series]],
+        periods: int,
+        engine: str = "ets"
+    ) -> List[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """Fit a chunk of series with a vectorized engine ('ets' or 'intermittent') in one worker call."""
+        try:
+            results = await fit_executor.run(run_smoothing_job, items, periods, engine, wait=True)
+        except Exception as e:
+            print(f"Batch {engine} fit failed for {len(items)} products: {e}")
+            record_fallback("smoothing_failed" if engine == "ets" else "intermittent_failed")
+            results = [self._generate_default_forecast(product_id, periods) for product_id, _ in items]
+        return [(product_id, result, None) for (product_id, _), result in zip(items, results)]
+
+    def prepare_series_or_none(
+        self,
+        product_id: str,
+        historical_data: pd.DataFrame,
+        freq: str = "MS"
+    ) -> Optional[pd.Series]:
+        """
+        Turn loaded sales rows into a model-ready series.
+
+        Returns:
+            The monthly series, or None when a default forecast should be used
+        """
         # If no historical data, return default forecast
         if historical_data.empty:
             print(f"No historical data for {product_id}, using default forecast")
-            return self._generate_default_forecast(product_id, periods)
+            record_fallback("no_history")
+            return None
 
-        # 2. Preprocess data
         try:
-            time_series = self.preprocessor.prepare_series(historical_data)
+            with time_stage("prepare_series"):
+                time_series = self.preprocessor.prepare_series(historical_data, freq)
         except Exception as e:
             print(f"Preprocessing failed: {e}")
-            return self._generate_default_forecast(product_id, periods)
+            record_fallback("preprocessing_failed")
+            return None
         
         # Ensure we have enough data points (at least 3)
         if len(time_series) < 3:
             print(f"Insufficient data points ({len(time_series)}), using default forecast")
-            return self._generate_default_forecast(product_id, periods)
+            record_fallback("insufficient_points")
+            return None
+
+        return time_series
+
+    def prepare_series_batch(
+        self,
+        product_ids: List[str],
+        sales_by_product: Dict[str, pd.DataFrame],
+        freq: str = "MS"
+    ) -> Dict[str, Optional[pd.Series]]:
+        """
+        prepare_series_or_none for many products at once.
 
-        # 3. Train SARIMAX model
+        All rows are pivoted into one dense matrix (Preprocessor.prepare_matrix)
+        and each series is a slice of it, instead of a copy/sort/asfreq per
+        product.
+
+        Returns:
+            Dict of product_id -> series, or None when a default forecast should be used
+        """
+        frames = [
+            df.assign(product_id=product_id)
+            for product_id, df in sales_by_product.items()
+            if not df.empty
+        ]
         try:
-            # Model parameters
-            order = (1, 1, 1)  # (p, d, q)
-            
-            # Only use seasonal component if we have at least 2 years of data
-            if len(time_series) >= 24:
-                seasonal_order = (1, 1, 1, 12)  # (P, D, Q, s) - yearly seasonality
-            else:
-                seasonal_order = (0, 0, 0, 0)  # No seasonality
+            with time_stage("prepare_series"):
+                sales_matrix = self.preprocessor.prepare_matrix(
+                    pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(), freq
+                )
+        except Exception as e:
+            print(f"Batch preprocessing failed: {e}")
+            return {
+                product_id: self.prepare_series_or_none(
+                    product_id, sales_by_product.get(product_id, pd.DataFrame()), freq
+                )
+                for product_id in product_ids
+            }
+        return self.series_from_matrix(product_ids, *sales_matrix)
+
+    def series_from_matrix(
+        self,
+        product_ids: List[str],
+        ids: List[str],
+        periods: pd.DatetimeIndex,
+        matrix: np.ndarray,
+        bounds: np.ndarray
+    ) -> Dict[str, Optional[pd.Series]]:
+        """
+        Model-ready series sliced out of a dense sales matrix.
+
+        Takes the layout of Preprocessor.prepare_matrix and
+        DataLoader.get_sales_matrix: each series is its row between its
+        bounds, with no per-product copy, sort or reindex.
+
+        Returns:
+            Dict of product_id -> series, or None when a default forecast should be used
+        """
+        series_by_product: Dict[str, Optional[pd.Series]] = dict.fromkeys(product_ids)
+        for row, product_id in enumerate(ids):
+            if product_id not in series_by_product:
+                continue
+            start, end = bounds[row]
+            series_by_product[product_id] = pd.Series(
+                matrix[row, start:end].astype(int), index=periods[start:end].rename('sale_date'), name='total_quantity'
+            )
+
+        for product_id, time_series in series_by_product.items():
+            if time_series is None:
+                print(f"No historical data for {product_id}, using default forecast")
+                record_fallback("no_history")
+            elif len(time_series) < 3:
+                print(f"Insufficient data points ({len(time_series)}), using default forecast")
+                record_fallback("insufficient_points")
+                series_by_product[product_id] = None
+        return series_by_product
+
+    def forecast_series(
+        self,
+        product_id: str,
+        time_series: pd.Series,
+        periods: int = 6,
+        warm_state: Optional[Dict[str, Any]] = None,
+        model_order: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Fits SARIMAX on a prepared series and formats the forecast.
+
+        This is the CPU-bound half of generate_forecast. It does no I/O, so
+        it can run inside worker processes (see run_forecast_job).
+
+        Args:
+            product_id: Product ID being forecast
+            time_series: Monthly series from Preprocessor.prepare_series
+            periods: Number of periods to forecast
+            warm_state: Previously stored fit state (see ParameterStore)
+            model_order: Selected order for the product (see ModelOrderStore)
+
+        Returns:
+            Dict matching ForecastResult interface
+        """
+        return self.forecast_series_with_state(product_id, time_series, periods, warm_state, model_order)[0]
+
+    def forecast_series_with_state(
+        self,
+        product_id: str,
+        time_series: pd.Series,
+        periods: int = 6,
+        warm_state: Optional[Dict[str, Any]] = None,
+        model_order: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Same as forecast_series, also returning the fit state to persist.
+
+        Long series (daily history) are fitted on their last
+        FORECAST_MAX_FIT_POINTS points so fit time stays bounded.
+
+        Walks the degrade ladder: a seasonal fit that fails or overruns
+        its share of the time left before `deadline` (time.time() based)
+        falls back to a non-seasonal fit, then to exponential smoothing.
+
+        Returns:
+            (forecast result, new fit state or None if nothing was re-estimated)
+        """
+        freq = series_freq(time_series)
+        fit_series = time_series.iloc[-MAX_FIT_POINTS:]
+        order, seasonal_order = self.model_orders(len(fit_series), model_order, freq)
+        ladder = [(order, seasonal_order)]
+        if seasonal_order[3]:
+            ladder.append((order, (0, 0, 0, 0)))
+
+        for step, (tier_order, tier_seasonal_order) in enumerate(ladder):
+            tier = "sarimax_seasonal" if tier_seasonal_order[3] else "sarimax"
+            tier_deadline = deadline
+            if deadline is not None and step < len(ladder) - 1:
+                tier_deadline = time.time() + max(deadline - time.time(), 0.0) * SEASONAL_BUDGET_SHARE
+
+            # 3. Train SARIMAX model
+            try:
+                with time_stage("fit"):
+                    results, fit_state = self._fit_sarimax(
+                        fit_series, tier_order, tier_seasonal_order, warm_state, tier_deadline
+                    )
+                
+                # 4. Generate forecast
+                with time_stage("forecast"):
+                    forecast = results.get_forecast(steps=periods)
+                    forecast_ci = forecast.conf_int()
+                
+                # 5-6. Metrics and frontend formatting
+                with time_stage("accuracy"):
+                    model_accuracy = self._calculate_accuracy(results, fit_series)
+                spec = model_spec(tier_order, tier_seasonal_order, freq)
+                self._register_fit(product_id, results, fit_series, spec, tier, model_accuracy, fit_state or warm_state)
+                return self._build_result(
+                    time_series,
+                    forecast.predicted_mean,
+                    forecast_ci.iloc[:, 0].values,
+                    forecast_ci.iloc[:, 1].values,
+                    model_accuracy,
+                    tier=tier,
+                    spec=spec
+                ), fit_state
+                
+            except FitTimeoutError as e:
+                print(f"SARIMAX {tier} fit abandoned: {e}")
+            except Exception as e:
+                print(f"SARIMAX model failed: {e}")
+
+        # Cheaper tiers: exponential smoothing, (seasonal) naive if that fails too
+        return self.forecast_smoothing_batch([(product_id, time_series)], periods)[0], None
+
+    def _register_fit(
+        self,
+        product_id: str,
+        results,
+        fit_series: pd.Series,
+        spec: str,
+        tier: str,
+        model_accuracy: float,
+        estimated_state: Optional[Dict[str, Any]]
+    ) -> None:
+        """Write a fit to the model registry (runs in the worker that fitted it)."""
+        if not self.registry.enabled or estimated_state is None:
+            return
+        try:
+            with time_stage("registry_write"):
+                self.registry.write(product_id, capture_fit(
+                    results, fit_series, spec, tier, model_accuracy, estimated_state["seriesEnd"]
+                ))
+        except Exception as e:
+            print(f"Registering fit for product {product_id} failed: {e}")
+
+    async def forecast_from_registry(
+        self,
+        product_id: str,
+        time_series: pd.Series,
+        periods: int,
+        model_order: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Forecast from the registered fit of a series, without re-estimation.
+
+        The entry must cover the series (see align_entry); up to
+        FORECAST_MAX_APPEND_MONTHS periods newer than its estimation are
+        absorbed with Kalman updates and the extended state is stored back.
+
+        Returns:
+            Dict matching ForecastResult interface, or None when the series
+            needs a fit
+        """
+        if not self.registry.enabled:
+            return None
+        freq = series_freq(time_series)
+        fit_series = time_series.iloc[-MAX_FIT_POINTS:]
+        spec = model_spec(*self.model_orders(len(fit_series), model_order, freq), freq)
+        try:
+            with time_stage("registry_forecast"):
+                entry = await self.registry.get(product_id, spec)
+                if entry is None:
+                    return None
+                aligned = align_entry(entry, fit_series, MAX_APPEND_MONTHS)
+                if aligned is None:
+                    return None
+                if aligned is not entry:
+                    await self.registry.put(product_id, aligned)
+                mean, lower, upper = forecast_state(aligned, periods)
+        except Exception as e:
+            print(f"Registry forecast failed for product {product_id}: {e}")
+            return None
+
+        print(f"Forecasting product {product_id} from registered fit ({spec})")
+        forecast_index = pd.date_range(time_series.index[-1], periods=periods + 1, freq=freq)[1:]
+        return self._build_result(
+            time_series,
+            pd.Series(mean, index=forecast_index),
+            lower,
+            upper,
+            float(aligned["modelAccuracy"]),
+            tier=str(aligned["tier"]),
+            spec=spec
+        )
+
+    def sarimax_interval_forecast(
+        self,
+        time_series: pd.Series,
+        periods: int,
+        model_order: Optional[Dict[str, Any]] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Cold SARIMAX fit returning raw point forecasts and 95% bounds.
+
+        Used by backtesting, where stored parameters would leak future data,
+        and by hierarchical forecasting for aggregate series.
+
+        Returns:
+            (mean, lower, upper) arrays of length periods
+        """
+        order, seasonal_order = self.model_orders(len(time_series), model_order, series_freq(time_series))
+        results, _ = self._fit_sarimax(time_series, order, seasonal_order)
+        forecast = results.get_forecast(steps=periods)
+        forecast_ci = forecast.conf_int()
+        return (
+            np.asarray(forecast.predicted_mean, dtype=float),
+            forecast_ci.iloc[:, 0].values.astype(float),
+            forecast_ci.iloc[:, 1].values.astype(float),
+        )
+
+    def forecast_smoothing_batch(
+        self,
+        items: List[Tuple[str, pd.Series]],
+        periods: int = 6
+    ) -> List[Dict[str, Any]]:
+        """
+        Forecasts many series with the vectorized exponential-smoothing engine.
+
+        All series are fitted together in one NumPy pass (see
+        ExponentialSmoothingEngine), which is far cheaper than a SARIMAX
+        fit per product for short, non-seasonal history.
+
+        Args:
+            items: (product_id, monthly series) pairs
+            periods: Number of periods to forecast
+
+        Returns:
+            ForecastResult dicts in the same order as items
+        """
+        if not items:
+            return []
+
+        try:
+            matrix = to_padded_matrix([series.values.astype(float) for _, series in items])
+            with time_stage("ets_fit"):
+                fit = self.smoothing.fit_forecast(matrix, periods)
+        except Exception as e:
+            print(f"Exponential smoothing failed: {e}")
+            return [self.naive_forecast(product_id, time_series, periods) for product_id, time_series in items]
 
-            model = sm.tsa.statespace.SARIMAX(
+        # Insights inputs for every row at once (right-aligned rows: NaN padding is skipped)
+        with time_stage("insights"):
+            trends = self.preprocessor.trend_directions(fit["mean"])
+            seasonal = self.preprocessor.seasonal_flags(
+                matrix, SEASONAL_LAGS.get(series_freq(items[0][1]), 12)
+            )
+
+        results = []
+        width = matrix.shape[1]
+        for row, (product_id, time_series) in enumerate(items):
+            forecast_index = pd.date_range(
+                time_series.index[-1], periods=periods + 1, freq=series_freq(time_series)
+            )[1:]
+            fitted = fit["fitted"][row, width - len(time_series):]
+            model_accuracy = self._accuracy_from_fitted(time_series.values, fitted)
+            results.append(self._build_result(
                 time_series,
-                order=order,
-                seasonal_order=seasonal_order,
-                enforce_stationarity=False,
-                enforce_invertibility=False
+                pd.Series(fit["mean"][row], index=forecast_index),
+                fit["lower"][row],
+                fit["upper"][row],
+                model_accuracy,
+                trend=str(trends[row]),
+                seasonality=bool(seasonal[row]),
+                tier="ets"
+            ))
+        return results
+
+    def forecast_intermittent_batch(
+        self,
+        items: List[Tuple[str, pd.Series]],
+        periods: int = 6
+    ) -> List[Dict[str, Any]]:
+        """
+        Forecasts many sparse series with the vectorized Croston/SBA/TSB engine.
+
+        All series are fitted together in one NumPy pass (see
+        IntermittentDemandEngine). The forecast is the expected demand per
+        period, so it is flat and typically fractional; the bounds come
+        from the in-sample one-step errors and never go below zero.
+
+        Args:
+            items: (product_id, series) pairs
+            periods: Number of periods to forecast
+
+        Returns:
+            ForecastResult dicts in the same order as items
+        """
+        if not items:
+            return []
+
+        try:
+            matrix = to_padded_matrix([series.values.astype(float) for _, series in items])
+            with time_stage("intermittent_fit"):
+                fit = self.intermittent.fit_forecast(matrix, periods)
+        except Exception as e:
+            print(f"Intermittent-demand fit failed: {e}")
+            return [self.naive_forecast(product_id, time_series, periods) for product_id, time_series in items]
+
+        results = []
+        width = matrix.shape[1]
+        for row, (product_id, time_series) in enumerate(items):
+            forecast_index = pd.date_range(
+                time_series.index[-1], periods=periods + 1, freq=series_freq(time_series)
+            )[1:]
+            fitted = fit["fitted"][row, width - len(time_series):]
+            model_accuracy = self._accuracy_from_fitted(time_series.values, fitted)
+            results.append(self._build_result(
+                time_series,
+                pd.Series(fit["mean"][row], index=forecast_index),
+                fit["lower"][row],
+                fit["upper"][row],
+                model_accuracy,
+                trend="stable",
+                seasonality=False,
+                tier="intermittent"
+            ))
+        return results
+
+    def naive_forecast(self, product_id: str, time_series: pd.Series, periods: int = 6) -> Dict[str, Any]:
+        """
+        Last tier of the degrade ladder: no fitting at all.
+
+        Seasonal naive (repeat the last cycle) once two full cycles are
+        available, otherwise naive (repeat the last value). The 95% band
+        widens with the number of cycles (steps) ahead, from the in-sample
+        naive errors.
+
+        Returns:
+            Dict matching ForecastResult interface
+        """
+        try:
+            freq = series_freq(time_series)
+            values = time_series.values.astype(float)
+            lag = SEASONAL_LAGS.get(freq, 12)
+            tier = "seasonal_naive" if len(values) >= 2 * lag else "naive"
+            if tier == "naive":
+                lag = 1
+
+            steps = np.arange(periods)
+            mean = values[len(values) - lag + steps % lag]
+            errors = values[lag:] - values[:-lag]
+            sigma = errors.std() if len(errors) > 1 else 0.0
+            half_width = Z_95 * sigma * np.sqrt(steps // lag + 1)
+
+            forecast_index = pd.date_range(time_series.index[-1], periods=periods + 1, freq=freq)[1:]
+            fitted = np.concatenate([np.full(lag, np.nan), values[:-lag]])
+            return self._build_result(
+                time_series,
+                pd.Series(mean, index=forecast_index),
+                mean - half_width,
+                mean + half_width,
+                self._accuracy_from_fitted(values, fitted),
+                tier=tier
             )
-            
-            results = model.fit(disp=False, maxiter=100)
-            
-            # 4. Generate forecast
-            forecast = results.get_forecast(steps=periods)
-            forecast_ci = forecast.conf_int()
-            
-            # 5. Calculate model metrics
-            model_accuracy = self._calculate_accuracy(results, time_series)
-            trend = self._determine_trend(forecast.predicted_mean.values)
-            seasonality = self._check_seasonality(time_series)
+        except Exception as e:
+            print(f"Naive forecast failed: {e}")
+            record_fallback("model_failed")
+            return self._generate_default_forecast(product_id, periods)
+
+    def _build_result(
+        self,
+        time_series: pd.Series,
+        predicted_mean: pd.Series,
+        lower: np.ndarray,
+        upper: np.ndarray,
+        model_accuracy: float,
+        trend: Optional[str] = None,
+        seasonality: Optional[bool] = None,
+        tier: str = "sarimax",
+        spec: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Shared response formatting for every forecasting engine.
+
+        Args:
+            time_series: Historical series the model was fitted on
+            predicted_mean: Point forecasts indexed by forecast date
+            lower: Lower confidence bounds
+            upper: Upper confidence bounds
+            model_accuracy: Accuracy score (0-1)
+            trend: Precomputed trend direction (batch callers)
+            seasonality: Precomputed seasonality flag (batch callers)
+            tier: Degrade-ladder tier that produced the forecast
+            spec: SARIMAX model spec, so scenarios can find the stored fit
+
+        Returns:
+            Dict matching ForecastResult interface
+        """
+        # 5. Calculate model metrics
+        with time_stage("insights"):
+            if trend is None:
+                trend = self._determine_trend(predicted_mean.values)
+            if seasonality is None:
+                seasonality = self._check_seasonality(time_series)
             insights = self._generate_insights(
-                forecast.predicted_mean.values,
+                predicted_mean.values,
                 time_series,
                 trend,
                 seasonality
             )
-            
-            # 6. Format response for frontend
-            forecasted_demand = [
-                max(0, int(round(v))) 
-                for v in forecast.predicted_mean.values
-            ]
-            
-            confidence_intervals = [
-                {
-                    "lowerBound": max(0, int(round(forecast_ci.iloc[i, 0]))),
-                    "upperBound": int(round(forecast_ci.iloc[i, 1]))
-                }
-                for i in range(len(forecast_ci))
-            ]
-            
-            # Raw forecast data with dates (for debugging)
-            raw_forecast = [
-                {
-                    "date": forecast.predicted_mean.index[i].strftime('%Y-%m-%d'),
-                    "predictedQuantity": forecasted_demand[i],
-                    "lowerCI": confidence_intervals[i]["lowerBound"],
-                    "upperCI": confidence_intervals[i]["upperBound"],
-                }
-                for i in range(len(forecasted_demand))
-            ]
-
-            print(f"Forecast generated successfully: accuracy={model_accuracy}, trend={trend}")
-            
-            return {
-                "forecastedDemand": forecasted_demand,
-                "modelAccuracy": model_accuracy,
-                "confidenceIntervals": confidence_intervals,
-                "trend": trend,
-                "seasonality": seasonality,
-                "insights": insights,
-                "rawForecast": raw_forecast
+        
+        # 6. Format response for frontend
+        forecasted_demand = [
+            max(0, int(round(v))) 
+            for v in predicted_mean.values
+        ]
+        
+        confidence_intervals = [
+            {
+                "lowerBound": max(0, int(round(lower[i]))),
+                "upperBound": int(round(upper[i]))
             }
-            
-        except Exception as e:
-            print(f"SARIMAX model failed: {e}")
-            return self._generate_default_forecast(product_id, periods)
+            for i in range(len(forecasted_demand))
+        ]
+        
+        # Raw forecast data with dates (for debugging)
+        raw_forecast = [
+            {
+                "date": predicted_mean.index[i].strftime('%Y-%m-%d'),
+                "predictedQuantity": forecasted_demand[i],
+                "lowerCI": confidence_intervals[i]["lowerBound"],
+                "upperCI": confidence_intervals[i]["upperBound"],
+            }
+            for i in range(len(forecasted_demand))
+        ]
+
+        print(f"Forecast generated successfully: accuracy={model_accuracy}, trend={trend}, tier={tier}")
+        record_tier(tier)
+        
+        result = {
+            "forecastedDemand": forecasted_demand,
+            "modelAccuracy": model_accuracy,
+            "confidenceIntervals": confidence_intervals,
+            "trend": trend,
+            "seasonality": seasonality,
+            "insights": insights,
+            "rawForecast": raw_forecast,
+            "modelTier": tier
+        }
+        if spec is not None:
+            result["modelSpec"] = spec
+        return result
+
+    @staticmethod
+    def select_engine(n_points: int, engine: str = "auto", intermittent: bool = False) -> str:
+        """
+        Pick the forecasting engine for a series.
+
+        'auto' routes intermittent series (see intermittent_mask) to the
+        Croston/SBA/TSB engine, series shorter than FORECAST_ETS_MAX_MONTHS
+        (which SARIMAX would fit without seasonality anyway) to exponential
+        smoothing, and longer ones to SARIMAX.
+
+        Args:
+            n_points: Series length
+            engine: Requested engine
+            intermittent: Whether the series classified as intermittent
+
+        Returns:
+            'sarimax', 'ets' or 'intermittent'
+        """
+        if engine in ("sarimax", "ets", "intermittent"):
+            return engine
+        if intermittent:
+            return "intermittent"
+        return "ets" if n_points < SMOOTHING_MAX_MONTHS else "sarimax"
+
+    @staticmethod
+    def intermittent_mask(series_list: List[pd.Series]) -> np.ndarray:
+        """
+        Which series engine='auto' should forecast as intermittent demand.
+
+        Classifies every series in one vectorized pass (classify_demand);
+        series shorter than FORECAST_INTERMITTENT_MIN_POINTS, or all of them
+        when FORECAST_INTERMITTENT is off, are never intermittent.
+
+        Returns:
+            (len(series_list),) bool array
+        """
+        if not INTERMITTENT_ROUTING or not series_list:
+            return np.zeros(len(series_list), dtype=bool)
+        matrix = to_padded_matrix([np.asarray(s, dtype=float) for s in series_list])
+        lengths = np.array([len(s) for s in series_list])
+        return classify_demand(matrix)["intermittent"] & (lengths >= INTERMITTENT_MIN_POINTS)
+
+    @staticmethod
+    def model_orders(
+        n_points: int,
+        model_order: Optional[Dict[str, Any]] = None,
+        freq: str = "MS"
+    ) -> Tuple[Tuple[int, int, int], Tuple[int, int, int, int]]:
+        """
+        SARIMAX (order, seasonal_order) used for a series of the given length.
+
+        A stored per-product order (see OrderSelector) is used for monthly
+        series long enough for its seasonal part; otherwise the default
+        orders apply, seasonal once two full cycles (SARIMAX_SEASONAL_PERIODS)
+        are available.
+        """
+        if model_order is not None and freq == "MS":
+            seasonal_order = tuple(model_order["seasonalOrder"])
+            if seasonal_order[3] == 0 or n_points >= 2 * seasonal_order[3]:
+                return tuple(model_order["order"]), seasonal_order
+
+        order = (1, 1, 1)  # (p, d, q)
+        
+        # Only use seasonal component with at least two full cycles of data
+        period = SARIMAX_SEASONAL_PERIODS.get(freq, 12)
+        if period and n_points >= 2 * period:
+            seasonal_order = (1, 1, 1, period)  # (P, D, Q, s) - yearly for monthly data
+        else:
+            seasonal_order = (0, 0, 0, 0)  # No seasonality
+        
+        return order, seasonal_order
+
+    def _fit_sarimax(
+        self,
+        time_series: pd.Series,
+        order: Tuple[int, int, int],
+        seasonal_order: Tuple[int, int, int, int],
+        warm_state: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None
+    ):
+        """
+        Fit SARIMAX, reusing stored parameters when possible.
+
+        - Stored fit covers the series and at most FORECAST_MAX_APPEND_MONTHS
+          new trailing months: filter the known prefix with the stored
+          parameters and extend it via results.append (no optimization).
+        - Stored fit for the same spec but stale/diverging data: warm-start
+          the optimizer from the stored parameters.
+        - Otherwise: cold fit from default start values.
+
+        The optimizer raises FitTimeoutError once time.time() passes
+        `deadline`, so an abandoned fit frees its worker right away.
+
+        Returns:
+            (results, fit state to persist or None when params were reused)
+        """
+        spec = model_spec(order, seasonal_order, series_freq(time_series))
+
+        def build(endog: pd.Series):
+            return sm.tsa.statespace.SARIMAX(
+                endog,
+                order=order,
+                seasonal_order=seasonal_order,
+                enforce_stationarity=False,
+                enforce_invertibility=False
+            )
+
+        model = build(time_series)
+        start_params = None
+
+        if (
+            warm_state is not None
+            and warm_state.get("modelSpec") == spec
+            and len(warm_state.get("params", [])) == len(model.param_names)
+        ):
+            start_params = np.asarray(warm_state["params"], dtype=float)
+            prefix_len = _matching_prefix_length(time_series, warm_state)
+            new_months = len(time_series) - prefix_len
+
+            if prefix_len >= 3 and 0 <= new_months <= MAX_APPEND_MONTHS:
+                results = build(time_series.iloc[:prefix_len]).filter(start_params)
+                if new_months > 0:
+                    results = results.append(time_series.iloc[prefix_len:])
+                print(f"Reused stored params ({spec}), appended {new_months} new periods")
+                return results, None
+
+        def check_deadline(_params):
+            if time.time() > deadline:
+                raise FitTimeoutError(f"{spec} exceeded its latency budget")
+
+        callback = check_deadline if deadline is not None else None
+        if start_params is not None:
+            results = model.fit(start_params=start_params, disp=False, maxiter=WARM_START_MAXITER, callback=callback)
+            mode = "warm"
+        else:
+            results = model.fit(disp=False, maxiter=100, callback=callback)
+            mode = "cold"
+
+        iterations = results.mle_retvals.get("iterations") if results.mle_retvals else None
+        print(f"SARIMAX {mode} fit ({spec}) converged in {iterations} iterations")
+
+        fit_state = {
+            "modelSpec": spec,
+            "params": [float(v) for v in results.params],
+            "paramNames": list(model.param_names),
+            "seriesStart": time_series.index[0].strftime('%Y-%m-%d'),
+            "seriesEnd": time_series.index[-1].strftime('%Y-%m-%d'),
+            "seriesValues": [float(v) for v in time_series.values],
+            "iterations": iterations,
+        }
+        return results, fit_state
 
     def _calculate_accuracy(self, results, actual_series: pd.Series) -> float:
         """
         Calculate model accuracy using Mean Absolute Percentage Error (MAPE).
         
+        Uses the one-step fitted values kept from the fit, so no extra pass
+        over the model is needed. Out-of-sample accuracy is measured by the
+        backtesting engine (see backtest.py).
+        
         Returns:
             Accuracy as a float between 0 and 1
         """
         try:
-            # Get in-sample predictions
-            predictions = results.get_prediction(start=0)
-            pred_mean = predictions.predicted_mean
-            
             actual = actual_series.values
-            pred = pred_mean.values[:len(actual)]
-            
-            # Avoid division by zero
-            mask = actual != 0
-            if mask.sum() == 0:
-                return 0.85  # Default accuracy
-            
-            # Calculate MAPE
-            mape = np.mean(np.abs((actual[mask] - pred[mask]) / actual[mask]))
+            pred = np.asarray(results.fittedvalues)[:len(actual)]
             
-            # Convert to accuracy (1 - MAPE), bounded between 0 and 1
-            accuracy = max(0.0, min(1.0, 1.0 - mape))
-            
-            return round(accuracy, 2)
+            return self._accuracy_from_fitted(actual, pred)
             
         except Exception as e:
             print(f"Accuracy calculation failed: {e}")
             return 0.85  # Default accuracy
 
+    def _accuracy_from_fitted(self, actual: np.ndarray, pred: np.ndarray) -> float:
+        """
+        Accuracy (1 - MAPE) of in-sample fitted values, bounded to [0, 1].
+        """
+        actual = np.asarray(actual, dtype=float)
+        pred = np.asarray(pred, dtype=float)
+        
+        # Avoid division by zero (and skip points without a fitted value)
+        mask = (actual != 0) & ~np.isnan(pred)
+        if mask.sum() == 0:
+            return 0.85  # Default accuracy
+        
+        # Calculate MAPE
+        mape = np.mean(np.abs((actual[mask] - pred[mask]) / actual[mask]))
+        
+        # Convert to accuracy (1 - MAPE), bounded between 0 and 1
+        accuracy = max(0.0, min(1.0, 1.0 - mape))
+        
+        return round(accuracy, 2)
+
     def _determine_trend(self, forecast_values: np.ndarray) -> str:
         """
         Determine if forecast shows increasing, decreasing, or stable trend.
@@ -211,15 +1275,16 @@ class ForecastModel:
             True if seasonality is detected
         """
         try:
-            # Need at least 2 years for yearly seasonality detection
-            if len(time_series) < 24:
+            # Need at least two cycles (2 years of monthly data, 2 weeks of daily)
+            lag = SEASONAL_LAGS.get(series_freq(time_series), 12)
+            if len(time_series) < 2 * lag:
                 return False
             
-            # Check autocorrelation at lag 12 (yearly for monthly data)
-            autocorr = time_series.autocorr(lag=12)
+            # Check autocorrelation at the cycle length (lag 12 for monthly data)
+            autocorr = time_series.autocorr(lag=lag)
             
             # Significant if autocorrelation > 0.3
-            return abs(autocorr) > 0.3
+            return bool(abs(autocorr) > 0.3)
             
         except Exception as e:
             print(f"Seasonality check failed: {e}")
@@ -287,6 +1352,8 @@ class ForecastModel:
         Returns:
             Dict matching ForecastResult interface
         """
+        record_tier("default")
+        
         # Generate slightly varying predictions
         base_demand = 100
         np.random.seed(hash(product_id) % 2**32)  # Consistent results for same product
@@ -315,17 +1382,32 @@ class ForecastModel:
                 "Forecast based on baseline estimates.",
                 "Accuracy will improve as more sales data is collected."
             ],
-            "rawForecast": None
+            "rawForecast": None,
+            "modelTier": "default"
         }
 
-    async def get_historical_data(self, product_id: str, months: int = 24) -> Dict[str, Any]:
+    async def get_historical_data(self, product_id: str, months: int = 24, granularity: str = "month") -> Dict[str, Any]:
         """
         Get historical sales data for a product.
         
+        Concurrent calls for the same product and window share one query.
+        Monthly data lists months with sales; daily and weekly data is
+        dense (empty buckets are returned with zero quantity).
+        
         Returns:
             Dict with productId, data array, and totalRecords
         """
-        data = await self.data_loader.get_sales_data(product_id, months)
+        return await self.coalescer.do(
+            ("historical", product_id, months, granularity),
+            lambda: self._get_historical_data(product_id, months, granularity)
+        )
+
+    async def _get_historical_data(self, product_id: str, months: int, granularity: str = "month") -> Dict[str, Any]:
+        """get_historical_data without request coalescing."""
+        if granularity == "month":
+            data = await self.data_loader.get_sales_data(product_id, months)
+        else:
+            data = await self.data_loader.get_sales_series(product_id, months, granularity)
         
         if data.empty:
             return {
@@ -348,4 +1430,75 @@ class ForecastModel:
             "productId": product_id,
             "data": records,
             "totalRecords": len(records)
-        }
\ No newline at end of file
+        }
+
+
+def model_spec(order: Tuple[int, ...], seasonal_order: Tuple[int, ...], freq: str = "MS") -> str:
+    """
+    Stable identifier for a SARIMAX order, e.g. 'sarimax(1,1,1)(1,1,1,12)'.
+    Non-monthly series get a frequency suffix, e.g. 'sarimax(1,1,1)(1,1,1,7)@D'.
+    """
+    spec = "sarimax({})({})".format(
+        ",".join(str(v) for v in order),
+        ",".join(str(v) for v in seasonal_order)
+    )
+    return spec if freq == "MS" else f"{spec}@{freq}"
+
+
+def series_freq(time_series: pd.Series) -> str:
+    """Bucket frequency of a prepared series ('MS', 'W-MON' or 'D')."""
+    freq = getattr(time_series.index, "freqstr", None)
+    return freq if freq in SEASONAL_LAGS else "MS"
+
+
+def _matching_prefix_length(time_series: pd.Series, warm_state: Dict[str, Any]) -> int:
+    """
+    Number of leading points of time_series already covered by warm_state.
+
+    Returns -1 when the series starts before the stored fit or any
+    overlapping month's value has changed since it was stored.
+    """
+    stored_start = pd.Timestamp(warm_state["seriesStart"])
+    stored_values = warm_state["seriesValues"]
+    stored_index = pd.date_range(stored_start, periods=len(stored_values), freq=series_freq(time_series))
+
+    if time_series.index[0] < stored_start:
+        return -1
+
+    stored = pd.Series(stored_values, index=stored_index)
+    overlap = time_series[time_series.index <= stored_index[-1]]
+    if not np.array_equal(overlap.values.astype(float), stored.reindex(overlap.index).values):
+        return -1
+
+    return len(overlap)
+
+
+def run_forecast_job(
+    product_id: str,
+    time_series: pd.Series,
+    periods: int,
+    warm_state: Optional[Dict[str, Any]] = None,
+    model_order: Optional[Dict[str, Any]] = None,
+    deadline: Optional[float] = None
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Process-pool entry point: forecast one prepared series.
+
+    Module-level so it can be pickled by ProcessPoolExecutor.
+
+    Returns:
+        (forecast result, fit state to persist or None)
+    """
+    return ForecastModel().forecast_series_with_state(
+        product_id, time_series, periods, warm_state, model_order, deadline
+    )
+
+
+def run_smoothing_job(items: List[Tuple[str, pd.Series]], periods: int, engine: str = "ets") -> List[Dict[str, Any]]:
+    """
+    Process-pool entry point: a vectorized engine ('ets' or 'intermittent')
+    for a chunk of series.
+    """
+    if engine == "intermittent":
+        return ForecastModel().forecast_intermittent_batch(items, periods)
+    return ForecastModel().forecast_smoothing_batch(items, periods)
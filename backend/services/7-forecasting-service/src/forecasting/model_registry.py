@@ -0,0 +1,334 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote
+import numpy as np
+import pandas as pd
+from .smoothing import Z_95
+
+# Bump when the entry layout changes; older entries are then ignored
+FORMAT_VERSION = 1
+
+# State-space system arrays kept per entry, as named by statsmodels
+SYSTEM_MATRICES = ("design", "obs_intercept", "obs_cov", "transition", "state_intercept", "selection", "state_cov")
+
+
+class ModelRegistry:
+    """
+    On-disk registry of fitted SARIMAX models with a memory-capped LRU.
+
+    Each entry is the compact fitted state of one product's model spec:
+    estimated parameters, the predicted state vector and its covariance
+    after the last observation, the time-invariant state-space system
+    matrices and the series the fit covers. That is enough to forecast
+    any horizon, absorb a few new observations (one Kalman step each) and
+    derive impulse responses with plain NumPy, so repeat forecasts,
+    horizon changes and scenario runs skip statsmodels entirely.
+
+    Entries are written by the worker that fitted the model, one .npz
+    file per product and spec under <dir>/v<FORMAT_VERSION>/, and loaded
+    lazily by the API process into an LRU bounded by array bytes. The API
+    process reads and writes files on the default thread pool, so a batch
+    touching thousands of entries never blocks the event loop.
+
+    Environment variables:
+        FORECAST_MODEL_REGISTRY: Registry directory (unset disables the registry)
+        FORECAST_MODEL_REGISTRY_MAX_BYTES: Memory budget for loaded entries
+            in bytes (default 64 MiB)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path if path is not None else os.getenv("FORECAST_MODEL_REGISTRY", "")
+        self.max_bytes = int(os.getenv("FORECAST_MODEL_REGISTRY_MAX_BYTES", 64 * 1024 * 1024))
+
+        # (product_id, spec) -> (size_bytes, entry)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._bytes = 0
+
+        self._hits = 0
+        self._loads = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    async def get(self, product_id: str, spec: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a fitted model, loading it from disk on first use.
+
+        Returns:
+            Entry dict (see capture_fit), or None if none is stored
+        """
+        if not self.enabled:
+            return None
+
+        key = (product_id, spec)
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return cached[1]
+
+        loop = asyncio.get_running_loop()
+        entry = await loop.run_in_executor(None, self._read, product_id, spec)
+        if entry is None:
+            # Not cached: a worker may write the file at any time
+            self._misses += 1
+            return None
+        self._loads += 1
+        self._remember(key, entry)
+        return entry
+
+    async def put(self, product_id: str, entry: Dict[str, Any]) -> None:
+        """Store an entry in memory and on disk."""
+        if not self.enabled:
+            return
+        self._remember((product_id, str(entry["modelSpec"])), entry)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.write, product_id, entry)
+
+    def _read(self, product_id: str, spec: str) -> Optional[Dict[str, Any]]:
+        file_path = self._file_path(product_id, spec)
+        if not os.path.exists(file_path):
+            return None
+        try:
+            with np.load(file_path, allow_pickle=False) as data:
+                return {name: data[name] for name in data.files}
+        except Exception as e:
+            print(f"Model registry entry for {product_id} not loadable: {e}")
+            return None
+
+    def write(self, product_id: str, entry: Dict[str, Any]) -> None:
+        """
+        Write an entry to disk only (blocking; used by worker processes).
+
+        The file is replaced atomically, so concurrent readers see either
+        the old or the new fit.
+        """
+        if not self.enabled:
+            return
+        file_path = self._file_path(product_id, str(entry["modelSpec"]))
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **entry)
+            os.replace(tmp_path, file_path)
+            self._writes += 1
+        except Exception as e:
+            print(f"Error writing model registry entry for {product_id}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def discard(self, product_id: str) -> None:
+        """Forget loaded entries of a product, so the next get() re-reads its files."""
+        for key in [k for k in self._entries if k[0] == product_id]:
+            self._remove(key)
+
+    def clear(self) -> None:
+        """Drop every loaded entry (files are kept)."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _file_path(self, product_id: str, spec: str) -> str:
+        return os.path.join(
+            self.path, f"v{FORMAT_VERSION}", quote(product_id, safe=""), quote(spec, safe="") + ".npz"
+        )
+
+    def _remember(self, key: Tuple[str, str], entry: Dict[str, Any]) -> None:
+        self._remove(key)
+        size = sum(np.asarray(v).nbytes for v in entry.values())
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (size, entry)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        cached = self._entries.pop(key, None)
+        if cached is not None:
+            self._bytes -= cached[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookup counters and memory usage of loaded entries."""
+        lookups = self._hits + self._loads + self._misses
+        return {
+            "enabled": self.enabled,
+            "path": self.path or None,
+            "formatVersion": FORMAT_VERSION,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self._hits,
+            "diskLoads": self._loads,
+            "misses": self._misses,
+            "hitRatio": round(self._hits / lookups, 3) if lookups else 0.0,
+            "writes": self._writes,
+            "evictions": self._evictions,
+        }
+
+
+def capture_fit(
+    results,
+    time_series: pd.Series,
+    spec: str,
+    tier: str,
+    model_accuracy: float,
+    estimated_through: str
+) -> Dict[str, Any]:
+    """
+    Compact registry entry for a fitted statsmodels SARIMAX result.
+
+    Args:
+        results: Fitted (or filtered/appended) SARIMAXResults
+        time_series: Series the result covers
+        spec: model_spec() of the fit
+        tier: Degrade-ladder tier the fit answers as
+        model_accuracy: In-sample accuracy reported with its forecasts
+        estimated_through: Last period ('YYYY-MM-DD') the parameters were
+            estimated on; extensions past it count against
+            FORECAST_MAX_APPEND_MONTHS
+
+    Returns:
+        Dict of NumPy arrays (strings as 0-d arrays), ready for np.savez
+    """
+    filtered = results.filter_results
+    entry = {
+        "formatVersion": np.array(FORMAT_VERSION),
+        "modelSpec": np.array(spec),
+        "tier": np.array(tier),
+        "modelAccuracy": np.array(float(model_accuracy)),
+        "params": np.asarray(results.params, dtype=float),
+        "state": np.asarray(filtered.predicted_state[:, -1], dtype=float),
+        "stateCov": np.asarray(filtered.predicted_state_cov[:, :, -1], dtype=float),
+        "seriesStart": np.array(time_series.index[0].strftime('%Y-%m-%d')),
+        "seriesValues": time_series.values.astype(float),
+        "estimatedThrough": np.array(estimated_through),
+        "fittedAt": np.array(time.time()),
+    }
+    for name in SYSTEM_MATRICES:
+        matrix = np.asarray(getattr(filtered, name), dtype=float)
+        # Time-invariant models keep a trailing time axis of length 1
+        entry[name] = matrix[..., 0] if matrix.ndim == (1 if name.endswith("intercept") else 2) + 1 else matrix
+    return entry
+
+
+def forecast_state(entry: Dict[str, Any], periods: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Point forecasts and 95% bounds from a stored state.
+
+    Runs the Kalman prediction recursion forward, which is what
+    SARIMAXResults.get_forecast computes for a time-invariant model.
+
+    Returns:
+        (mean, lower, upper) arrays of length periods
+    """
+    design, transition = entry["design"], entry["transition"]
+    disturbance = entry["selection"] @ entry["state_cov"] @ entry["selection"].T
+    state, state_cov = entry["state"], entry["stateCov"]
+
+    mean = np.empty(periods)
+    variance = np.empty(periods)
+    for h in range(periods):
+        mean[h] = (design @ state + entry["obs_intercept"])[0]
+        variance[h] = (design @ state_cov @ design.T + entry["obs_cov"])[0, 0]
+        state = transition @ state + entry["state_intercept"]
+        state_cov = transition @ state_cov @ transition.T + disturbance
+
+    half_width = Z_95 * np.sqrt(np.maximum(variance, 0.0))
+    return mean, mean - half_width, mean + half_width
+
+
+def extend_state(entry: Dict[str, Any], values: np.ndarray) -> Dict[str, Any]:
+    """
+    Absorb new trailing observations with the stored parameters.
+
+    One Kalman filter step per value, the NumPy equivalent of
+    SARIMAXResults.append without refitting.
+
+    Returns:
+        A new entry covering the longer series
+    """
+    design, transition = entry["design"], entry["transition"]
+    disturbance = entry["selection"] @ entry["state_cov"] @ entry["selection"].T
+    state, state_cov = entry["state"].copy(), entry["stateCov"].copy()
+
+    for value in np.asarray(values, dtype=float):
+        innovation = value - (design @ state + entry["obs_intercept"])[0]
+        variance = (design @ state_cov @ design.T + entry["obs_cov"])[0, 0]
+        gain = state_cov @ design.T[:, 0] / variance if variance > 0 else np.zeros_like(state)
+        state = transition @ (state + gain * innovation) + entry["state_intercept"]
+        state_cov = transition @ (state_cov - np.outer(gain, design @ state_cov)) @ transition.T + disturbance
+
+    extended = dict(entry)
+    extended["state"] = state
+    extended["stateCov"] = state_cov
+    extended["seriesValues"] = np.concatenate([entry["seriesValues"], np.asarray(values, dtype=float)])
+    return extended
+
+
+def state_impulse_response(entry: Dict[str, Any], periods: int) -> np.ndarray:
+    """
+    psi weights of a stored model (see scenario.impulse_response).
+
+    Returns:
+        Array of length periods, the response to a unit innovation
+    """
+    design, transition = entry["design"], entry["transition"]
+    impulse = entry["selection"][:, 0]
+    psi = np.empty(periods)
+    for h in range(periods):
+        psi[h] = (design @ impulse)[0]
+        impulse = transition @ impulse
+    return psi
+
+
+def align_entry(
+    entry: Dict[str, Any],
+    time_series: pd.Series,
+    max_new_periods: int
+) -> Optional[Dict[str, Any]]:
+    """
+    The entry brought up to the end of time_series, if it still applies.
+
+    The stored series must agree with time_series on every overlapping
+    period, and the periods since the parameters were estimated must not
+    exceed max_new_periods.
+
+    Returns:
+        The entry (extended when new periods arrived), or None
+    """
+    if int(entry["formatVersion"]) != FORMAT_VERSION:
+        return None
+    freq = time_series.index.freqstr or "MS"
+    stored_values = entry["seriesValues"]
+    stored_index = pd.date_range(str(entry["seriesStart"]), periods=len(stored_values), freq=freq)
+    if time_series.index[0] < stored_index[0] or time_series.index[-1] < stored_index[-1]:
+        return None
+
+    overlap = time_series[time_series.index <= stored_index[-1]]
+    stored = pd.Series(stored_values, index=stored_index).reindex(overlap.index).values
+    if len(overlap) < 3 or not np.array_equal(overlap.values.astype(float), stored):
+        return None
+
+    estimated_through = pd.Timestamp(str(entry["estimatedThrough"]))
+    if int((time_series.index > estimated_through).sum()) > max_new_periods:
+        return None
+
+    new_values = time_series.values[len(overlap):]
+    if len(new_values) == 0:
+        return entry
+    return extend_state(entry, new_values)
+
+
+# Process-wide registry shared by every ForecastModel (and each worker process)
+model_registry = ModelRegistry()
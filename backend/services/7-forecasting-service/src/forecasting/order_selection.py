@@ -0,0 +1,284 @@
+import os
+import time
+import asyncio
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+from statsmodels.tsa.stattools import kpss
+from typing import Any, Dict, List, Optional, Tuple
+from .db_pool import db_pool
+from .executor import fit_executor
+from .model import ForecastModel
+from .order_store import ModelOrderStore, model_order_store
+
+Order = Tuple[int, int, int]
+SeasonalOrder = Tuple[int, int, int, int]
+
+
+class OrderSelector:
+    """
+    Automatic SARIMAX order selection by AIC.
+
+    Candidates from a bounded (p,d,q)(P,D,Q) grid are evaluated in waves of
+    increasing complexity; every candidate in a wave is fitted in parallel
+    in the shared worker pool. The search stops early when a wave fails to
+    improve the best AIC by at least FORECAST_ORDER_MIN_IMPROVEMENT, or once
+    FORECAST_ORDER_MAX_CANDIDATES have been fitted.
+
+    The differencing orders are fixed up front (KPSS test for d, D=1 once
+    two seasonal cycles are available), so AICs within one search are
+    comparable. Selected orders are stored per product and reused by every
+    forecast until the next re-selection run.
+
+    Environment variables:
+        FORECAST_ORDER_MAX_CANDIDATES: Max fits per product (default 24)
+        FORECAST_ORDER_MIN_IMPROVEMENT: AIC gain a wave must deliver to
+            continue the search (default 2.0)
+        FORECAST_ORDER_MAXITER: Optimizer iterations per candidate (default 50)
+        FORECAST_ORDER_MAX_AGE: Seconds before a stored order is re-selected
+            by scheduled runs (default 604800, i.e. 7 days)
+        FORECAST_ORDER_MIN_MONTHS: Shortest series worth searching (default 12)
+    """
+
+    def __init__(
+        self,
+        model: Optional[ForecastModel] = None,
+        store: Optional[ModelOrderStore] = None
+    ):
+        self.model = model or ForecastModel()
+        self.store = store or model_order_store
+        self.max_candidates = int(os.getenv("FORECAST_ORDER_MAX_CANDIDATES", 24))
+        self.min_improvement = float(os.getenv("FORECAST_ORDER_MIN_IMPROVEMENT", 2.0))
+        self.maxiter = int(os.getenv("FORECAST_ORDER_MAXITER", 50))
+        self.max_age = float(os.getenv("FORECAST_ORDER_MAX_AGE", 604800))
+        self.min_months = int(os.getenv("FORECAST_ORDER_MIN_MONTHS", 12))
+        self.chunk_size = 200
+        self._last_run: Dict[str, Any] = {}
+
+    async def select(self, time_series: pd.Series) -> Optional[Dict[str, Any]]:
+        """
+        Search the candidate grid for one series.
+
+        Returns:
+            Order dict (order, seasonalOrder, aic, candidatesEvaluated,
+            seriesLength), or None if no candidate could be fitted
+        """
+        best: Optional[Tuple[float, Order, SeasonalOrder]] = None
+        evaluated = 0
+
+        for wave in candidate_waves(time_series):
+            wave = wave[:self.max_candidates - evaluated]
+            if not wave:
+                break
+
+            aics = await asyncio.gather(*[
+                fit_executor.run(run_order_candidate_job, time_series, order, seasonal_order, self.maxiter, wait=True)
+                for order, seasonal_order in wave
+            ], return_exceptions=True)
+            evaluated += len(wave)
+
+            wave_best = None
+            for (order, seasonal_order), aic in zip(wave, aics):
+                if isinstance(aic, Exception) or aic is None:
+                    continue
+                if wave_best is None or aic < wave_best[0]:
+                    wave_best = (aic, order, seasonal_order)
+
+            if wave_best is None:
+                continue
+            if best is not None and wave_best[0] > best[0] - self.min_improvement:
+                # No meaningful gain from more complex models: stop here
+                break
+            best = wave_best
+
+        if best is None:
+            return None
+
+        aic, order, seasonal_order = best
+        return {
+            "order": list(order),
+            "seasonalOrder": list(seasonal_order),
+            "aic": round(aic, 4),
+            "candidatesEvaluated": evaluated,
+            "seriesLength": len(time_series),
+        }
+
+    async def run(
+        self,
+        product_ids: Optional[List[str]] = None,
+        historical_months: int = 36,
+        stale_only: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Select and store orders for many products.
+
+        Args:
+            product_ids: Products to process; default is every product
+                with sales in the history window
+            historical_months: Months of history to search on
+            stale_only: Skip products whose stored order is younger
+                than FORECAST_ORDER_MAX_AGE
+
+        Returns:
+            Run summary (selected, skipped, candidates, duration)
+        """
+        started = time.perf_counter()
+        if product_ids is None:
+            product_ids = await self.model.data_loader.get_products_with_sales(historical_months)
+
+        if stale_only:
+            fresh = await self.store.get_many(product_ids, max_age=self.max_age)
+            product_ids = [pid for pid in product_ids if pid not in fresh]
+        print(f"Selecting SARIMAX orders for {len(product_ids)} products")
+
+        selected = 0
+        candidates = 0
+        for offset in range(0, len(product_ids), self.chunk_size):
+            chunk = product_ids[offset:offset + self.chunk_size]
+            series_by_product = self.model.series_from_matrix(
+                chunk, *await self.model.data_loader.get_sales_matrix(chunk, historical_months)
+            )
+
+            searches = {}
+            for product_id in chunk:
+                time_series = series_by_product[product_id]
+                if time_series is not None and len(time_series) >= self.min_months:
+                    searches[product_id] = self.select(time_series)
+
+            results = await asyncio.gather(*searches.values())
+            orders = {pid: order for pid, order in zip(searches, results) if order is not None}
+            await self.store.save_many(orders)
+
+            selected += len(orders)
+            candidates += sum(order["candidatesEvaluated"] for order in orders.values())
+            print(f"Selected orders for {selected} products ({offset + len(chunk)}/{len(product_ids)} processed)")
+
+        self._last_run = {
+            "products": len(product_ids),
+            "selected": selected,
+            "candidatesEvaluated": candidates,
+            "durationSeconds": round(time.perf_counter() - started, 3),
+        }
+        return self._last_run
+
+    def stats(self) -> Dict[str, Any]:
+        """Search limits and the last run summary."""
+        return {
+            "maxCandidates": self.max_candidates,
+            "minImprovement": self.min_improvement,
+            "maxAgeSeconds": self.max_age,
+            "lastRun": self._last_run or None,
+        }
+
+
+def differencing_orders(time_series: pd.Series) -> Tuple[int, int, int]:
+    """
+    (d, D, s) for a series: KPSS level-stationarity test for d, seasonal
+    differencing once two yearly cycles are available.
+    """
+    seasonal_period = 12 if len(time_series) >= 24 else 0
+    seasonal_diff = 1 if seasonal_period else 0
+
+    values = time_series.values.astype(float)
+    if seasonal_diff:
+        values = values[seasonal_period:] - values[:-seasonal_period]
+
+    d = 1
+    if np.ptp(values) > 0:
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                p_value = kpss(values, regression="c", nlags="auto")[1]
+            d = 1 if p_value < 0.05 else 0
+        except Exception:
+            d = 1
+
+    return d, seasonal_diff, seasonal_period
+
+
+def candidate_waves(time_series: pd.Series) -> List[List[Tuple[Order, SeasonalOrder]]]:
+    """
+    Bounded candidate grid grouped by number of ARMA terms (p+q+P+Q).
+
+    The first wave holds the simplest models and the default (1,d,1)
+    specification, so the search never does worse than the fixed orders.
+    """
+    d, seasonal_diff, seasonal_period = differencing_orders(time_series)
+    seasonal_terms = [(0, 0), (0, 1), (1, 0), (1, 1)] if seasonal_period else [(0, 0)]
+
+    by_size: Dict[int, List[Tuple[Order, SeasonalOrder]]] = {}
+    for p in range(3):
+        for q in range(3):
+            for P, Q in seasonal_terms:
+                seasonal_order = (P, seasonal_diff, Q, seasonal_period) if seasonal_period else (0, 0, 0, 0)
+                by_size.setdefault(p + q + P + Q, []).append(((p, d, q), seasonal_order))
+
+    sizes = sorted(by_size)
+    waves = [by_size[size] for size in sizes]
+
+    # Seed the first wave with the default specification
+    default = ((1, d, 1), (1, seasonal_diff, 1, seasonal_period) if seasonal_period else (0, 0, 0, 0))
+    for wave in waves[1:]:
+        if default in wave:
+            wave.remove(default)
+    waves[0] = waves[0] + [default]
+    return waves
+
+
+def run_order_candidate_job(
+    time_series: pd.Series,
+    order: Order,
+    seasonal_order: SeasonalOrder,
+    maxiter: int = 50
+) -> Optional[float]:
+    """
+    Process-pool entry point: fit one candidate order.
+
+    Returns:
+        The candidate's AIC, or None if the fit failed
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results = sm.tsa.statespace.SARIMAX(
+                time_series,
+                order=order,
+                seasonal_order=seasonal_order,
+                enforce_stationarity=False,
+                enforce_invertibility=False
+            ).fit(disp=False, maxiter=maxiter)
+        aic = float(results.aic)
+        return aic if np.isfinite(aic) else None
+    except Exception as e:
+        print(f"Order candidate {order}{seasonal_order} failed: {e}")
+        return None
+
+
+# Process-wide selector used by the precompute scheduler
+order_selector = OrderSelector()
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Select SARIMAX orders per product")
+    parser.add_argument("--products", nargs="*", help="Only these product IDs")
+    parser.add_argument("--history", type=int, default=36, help="Months of history to search on")
+    parser.add_argument("--all", action="store_true", help="Re-select even fresh stored orders")
+    args = parser.parse_args()
+
+    from .migrations import apply_migrations
+    from .rollup import sales_rollup
+
+    try:
+        await apply_migrations()
+        await sales_rollup.ensure_ready()
+        summary = await order_selector.run(args.products or None, args.history, stale_only=not args.all)
+        print(summary)
+    finally:
+        fit_executor.shutdown()
+        await db_pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,104 @@
+from typing import Any, Dict, List, Optional
+from .db_pool import DatabasePool, db_pool
+
+
+class ModelOrderStore:
+    """
+    Persists the SARIMAX order selected for each product.
+
+    Orders are written by periodic re-selection runs (see OrderSelector)
+    and read on every forecast, so interactive requests never pay the
+    search cost. All methods degrade to no-ops if the database is unavailable.
+    """
+
+    def __init__(self, pool: Optional[DatabasePool] = None):
+        self.pool = pool or db_pool
+
+    async def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the stored order for one product.
+
+        Returns:
+            Order dict (order, seasonalOrder, aic, selectedAt), or None
+        """
+        orders = await self.get_many([product_id])
+        return orders.get(product_id)
+
+    async def get_many(self, product_ids: List[str], max_age: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Load stored orders for many products in one query.
+
+        Args:
+            product_ids: Products to look up
+            max_age: Only return orders selected within this many seconds
+
+        Returns:
+            Dict of product_id -> order dict
+        """
+        if not product_ids:
+            return {}
+
+        try:
+            query = """
+                SELECT product_id, model_order, seasonal_order, aic, selected_at
+                FROM forecast_model_orders
+                WHERE product_id = ANY($1::text[])
+                  AND ($2::float8 IS NULL OR selected_at >= NOW() - make_interval(secs => $2));
+            """
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(query, product_ids, max_age)
+
+            return {
+                row['product_id']: {
+                    "order": list(row['model_order']),
+                    "seasonalOrder": list(row['seasonal_order']),
+                    "aic": row['aic'],
+                    "selectedAt": row['selected_at'].isoformat(),
+                }
+                for row in rows
+            }
+
+        except Exception as e:
+            print(f"Error loading stored model orders: {e}")
+            return {}
+
+    async def save_many(self, orders: Dict[str, Dict[str, Any]]) -> None:
+        """Upsert selected orders in one round trip."""
+        if not orders:
+            return
+
+        try:
+            query = """
+                INSERT INTO forecast_model_orders (
+                    product_id, model_order, seasonal_order, aic,
+                    candidates_evaluated, series_length, selected_at
+                )
+                VALUES ($1, $2, $3, $4, $5, $6, NOW())
+                ON CONFLICT (product_id) DO UPDATE SET
+                    model_order = EXCLUDED.model_order,
+                    seasonal_order = EXCLUDED.seasonal_order,
+                    aic = EXCLUDED.aic,
+                    candidates_evaluated = EXCLUDED.candidates_evaluated,
+                    series_length = EXCLUDED.series_length,
+                    selected_at = EXCLUDED.selected_at;
+            """
+            records = [
+                (
+                    product_id,
+                    list(order["order"]),
+                    list(order["seasonalOrder"]),
+                    order.get("aic"),
+                    order.get("candidatesEvaluated"),
+                    order.get("seriesLength"),
+                )
+                for product_id, order in orders.items()
+            ]
+            async with self.pool.acquire() as conn:
+                await conn.executemany(query, records)
+
+        except Exception as e:
+            print(f"Error saving model orders: {e}")
+
+
+# Process-wide store shared by every ForecastModel
+model_order_store = ModelOrderStore()
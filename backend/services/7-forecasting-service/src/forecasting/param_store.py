@@ -0,0 +1,117 @@
+from datetime import date
+from typing import Any, Dict, List, Optional
+from .db_pool import DatabasePool, db_pool
+
+
+class ParameterStore:
+    """
+    Persists fitted SARIMAX parameter vectors per product and model spec.
+
+    Stored state is used to warm-start the optimizer (start_params) and to
+    extend a previous fit with new trailing months without re-estimation.
+    All methods degrade to no-ops if the database is unavailable.
+    """
+
+    def __init__(self, pool: Optional[DatabasePool] = None):
+        self.pool = pool or db_pool
+
+    async def get(self, product_id: str, model_spec: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the stored fit state for one product.
+
+        Returns:
+            Fit state dict (see ForecastModel.forecast_series), or None
+        """
+        states = await self.get_many([product_id], model_spec)
+        return states.get(product_id)
+
+    async def get_many(self, product_ids: List[str], model_spec: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Load stored fit states for many products in one query.
+
+        Args:
+            product_ids: Products to look up
+            model_spec: Restrict to one spec; otherwise every spec is
+                returned keyed as "product_id|model_spec"
+
+        Returns:
+            Dict of product_id (or product_id|model_spec) -> fit state
+        """
+        if not product_ids:
+            return {}
+
+        try:
+            query = """
+                SELECT product_id, model_spec, params, param_names,
+                       series_start, series_end, series_values
+                FROM forecast_model_params
+                WHERE product_id = ANY($1::text[])
+                  AND ($2::text IS NULL OR model_spec = $2);
+            """
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(query, product_ids, model_spec)
+
+            states = {}
+            for row in rows:
+                key = row['product_id'] if model_spec else f"{row['product_id']}|{row['model_spec']}"
+                states[key] = {
+                    "modelSpec": row['model_spec'],
+                    "params": list(row['params']),
+                    "paramNames": list(row['param_names']),
+                    "seriesStart": row['series_start'].isoformat(),
+                    "seriesEnd": row['series_end'].isoformat(),
+                    "seriesValues": list(row['series_values']),
+                }
+            return states
+
+        except Exception as e:
+            print(f"Error loading stored model params: {e}")
+            return {}
+
+    async def save(self, product_id: str, state: Dict[str, Any]) -> None:
+        """Upsert the fit state produced by a full (cold or warm) optimization."""
+        await self.save_many({product_id: state})
+
+    async def save_many(self, states: Dict[str, Dict[str, Any]]) -> None:
+        """Upsert many fit states in one round trip."""
+        if not states:
+            return
+
+        try:
+            query = """
+                INSERT INTO forecast_model_params (
+                    product_id, model_spec, params, param_names,
+                    series_start, series_end, series_values, iterations, fitted_at
+                )
+                VALUES ($1, $2, $3, $4, $5::date, $6::date, $7, $8, NOW())
+                ON CONFLICT (product_id, model_spec) DO UPDATE SET
+                    params = EXCLUDED.params,
+                    param_names = EXCLUDED.param_names,
+                    series_start = EXCLUDED.series_start,
+                    series_end = EXCLUDED.series_end,
+                    series_values = EXCLUDED.series_values,
+                    iterations = EXCLUDED.iterations,
+                    fitted_at = EXCLUDED.fitted_at;
+            """
+            records = [
+                (
+                    product_id,
+                    state["modelSpec"],
+                    state["params"],
+                    state["paramNames"],
+                    date.fromisoformat(state["seriesStart"]),
+                    date.fromisoformat(state["seriesEnd"]),
+                    state["seriesValues"],
+                    state.get("iterations"),
+                )
+                for product_id, state in states.items()
+            ]
+            async with self.pool.acquire() as conn:
+                await conn.executemany(query, records)
+
+        except Exception as e:
+            print(f"Error saving model params: {e}")
+
+
+# Process-wide store shared by every ForecastModel
+param_store = ParameterStore()
@@ -0,0 +1,186 @@
+import os
+import time
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from .db_pool import db_pool
+from .model import ForecastModel
+from .forecast_store import PrecomputedForecastStore, precomputed_store
+from .order_selection import OrderSelector, order_selector
+from .migrations import PRECOMPUTE_LOCK_ID
+
+
+class ForecastPrecomputer:
+    """
+    Precomputes forecasts for every product with sales history.
+
+    Products are processed in chunks through ForecastModel.generate_batch_forecast,
+    so each chunk is loaded in one query and fitted in parallel across the
+    worker pool. Results are stored with their generation timestamp and
+    served by /forecast/predict while fresh. When order selection is
+    enabled, products whose stored SARIMAX order is missing or stale are
+    re-searched first, so interactive requests never pay that cost.
+
+    Environment variables:
+        FORECAST_PRECOMPUTE_INTERVAL: Seconds between scheduled runs (default 86400, 0 disables)
+        FORECAST_PRECOMPUTE_HORIZON: Periods to forecast (default 6)
+        FORECAST_PRECOMPUTE_HISTORY: Months of history to use (default 24)
+        FORECAST_PRECOMPUTE_CHUNK: Products per batch (default 500)
+        FORECAST_ORDER_SELECTION: Re-select stale SARIMAX orders before
+            each run (default true)
+    """
+
+    def __init__(
+        self,
+        model: Optional[ForecastModel] = None,
+        store: Optional[PrecomputedForecastStore] = None,
+        selector: Optional[OrderSelector] = None
+    ):
+        self.model = model or ForecastModel()
+        self.store = store or precomputed_store
+        self.selector = selector or order_selector
+        self.select_orders = os.getenv("FORECAST_ORDER_SELECTION", "true").lower() == "true"
+        self.interval = float(os.getenv("FORECAST_PRECOMPUTE_INTERVAL", 86400))
+        self.periods = int(os.getenv("FORECAST_PRECOMPUTE_HORIZON", 6))
+        self.historical_months = int(os.getenv("FORECAST_PRECOMPUTE_HISTORY", 24))
+        self.chunk_size = int(os.getenv("FORECAST_PRECOMPUTE_CHUNK", 500))
+        self._task: Optional[asyncio.Task] = None
+        self._last_run: Dict[str, Any] = {}
+
+    async def run(self, product_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Precompute and store forecasts.
+
+        Args:
+            product_ids: Restrict to these products; default is every
+                product with sales in the history window
+
+        Returns:
+            Run summary (products, duration, generation timestamp)
+        """
+        started = time.perf_counter()
+        generated_at = datetime.now(timezone.utc)
+
+        if product_ids is None:
+            product_ids = await self.model.data_loader.get_products_with_sales(self.historical_months)
+
+        order_summary = None
+        if self.select_orders:
+            order_summary = await self.selector.run(product_ids, self.historical_months)
+
+        print(f"Precomputing forecasts for {len(product_ids)} products")
+
+        stored = 0
+        for offset in range(0, len(product_ids), self.chunk_size):
+            chunk = product_ids[offset:offset + self.chunk_size]
+            results = [
+                result async for result in self.model.generate_batch_forecast(
+                    chunk, self.periods, self.historical_months
+                )
+            ]
+            await self.store.save_many(self.periods, self.historical_months, results)
+            stored += len(results)
+            print(f"Precomputed {stored}/{len(product_ids)} forecasts")
+
+        self._last_run = {
+            "generatedAt": generated_at.isoformat(),
+            "products": stored,
+            "durationSeconds": round(time.perf_counter() - started, 3),
+            "periods": self.periods,
+            "historicalMonths": self.historical_months,
+            "orderSelection": order_summary,
+        }
+        return self._last_run
+
+    async def run_exclusive(self) -> Optional[Dict[str, Any]]:
+        """
+        Scheduled run: skipped if another replica holds the precompute lock
+        or the latest generation is younger than the interval (e.g. right
+        after a redeploy).
+        """
+        async with db_pool.acquire() as conn:
+            locked = await conn.fetchval("SELECT pg_try_advisory_lock($1)", PRECOMPUTE_LOCK_ID)
+            if not locked:
+                print("Precompute already running elsewhere, skipping")
+                return None
+            try:
+                age = await conn.fetchval("""
+                    SELECT EXTRACT(EPOCH FROM NOW() - MAX(generated_at))
+                    FROM forecast_precomputed
+                    WHERE periods = $1 AND historical_months = $2;
+                """, self.periods, self.historical_months)
+                if age is not None and float(age) < self.interval:
+                    print(f"Precomputed forecasts are {int(age)}s old, skipping scheduled run")
+                    return None
+                return await self.run()
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", PRECOMPUTE_LOCK_ID)
+
+    def start(self) -> None:
+        """Start the scheduler (called from the app lifespan)."""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        """Stop the scheduler."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                await self.run_exclusive()
+            except Exception as e:
+                print(f"Scheduled precompute failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        """Scheduler configuration and the last run summary."""
+        return {
+            "scheduled": self._task is not None,
+            "intervalSeconds": self.interval,
+            "maxAgeSeconds": self.store.max_age,
+            "orderSelection": self.selector.stats() if self.select_orders else None,
+            "lastRun": self._last_run or None,
+        }
+
+
+# Process-wide scheduler started by the app lifespan
+forecast_precomputer = ForecastPrecomputer()
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Precompute forecasts for the whole catalog")
+    parser.add_argument("--products", nargs="*", help="Only these product IDs")
+    parser.add_argument("--horizon", type=int, help="Periods to forecast")
+    parser.add_argument("--history", type=int, help="Months of history to use")
+    args = parser.parse_args()
+
+    from .executor import fit_executor
+    from .migrations import apply_migrations
+    from .rollup import sales_rollup
+
+    if args.horizon:
+        forecast_precomputer.periods = args.horizon
+    if args.history:
+        forecast_precomputer.historical_months = args.history
+
+    try:
+        await apply_migrations()
+        await sales_rollup.ensure_ready()
+        summary = await forecast_precomputer.run(args.products or None)
+        print(summary)
+    finally:
+        fit_executor.shutdown()
+        await db_pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -1,22 +1,28 @@
 import pandas as pd
 import numpy as np
-from typing import Optional
+from typing import List, Optional, Tuple
 
 
 class Preprocessor:
     """
     Preprocesses time series data for forecasting models.
+
+    Single-series methods work on pd.Series. The batch methods work on a
+    products-by-periods matrix (see prepare_matrix) and compute the same
+    statistics for every row at once with NumPy; cells before a row's
+    first period (its `bounds` start) are ignored.
     """
     
-    def prepare_series(self, df: pd.DataFrame) -> pd.Series:
+    def prepare_series(self, df: pd.DataFrame, freq: str = 'MS') -> pd.Series:
         """
         Converts a DataFrame into a clean, indexed time series.
         
         Args:
             df: DataFrame with columns 'sale_date' and 'total_quantity'
+            freq: Bucket frequency of the rows ('MS', 'W-MON' or 'D')
             
         Returns:
-            pd.Series indexed by month with total_quantity values
+            pd.Series indexed by bucket with total_quantity values
         """
         if df.empty:
             raise ValueError("Cannot prepare series from empty DataFrame")
@@ -29,8 +35,9 @@ class Preprocessor:
         df = df.set_index('sale_date')
         df = df.sort_index()
         
-        # Resample to monthly frequency, filling gaps with 0
-        time_series = df['total_quantity'].asfreq('MS', fill_value=0)
+        # Resample to the bucket frequency, filling gaps with 0
+        # (a no-op for the dense rows of DataLoader.get_sales_series)
+        time_series = df['total_quantity'].asfreq(freq, fill_value=0)
         
         # Handle any NaN values
         time_series = time_series.fillna(0)
@@ -125,4 +132,183 @@ class Preprocessor:
         if len(growth_rates) == 0:
             return 0.0
         
-        return float(growth_rates.mean())
\ No newline at end of file
+        return float(growth_rates.mean())
+
+    # ------------------------------------------------------------------
+    # Batch (products x periods) API
+    # ------------------------------------------------------------------
+
+    def prepare_matrix(
+        self,
+        df: pd.DataFrame,
+        freq: str = 'MS'
+    ) -> Tuple[List[str], pd.DatetimeIndex, np.ndarray, np.ndarray]:
+        """
+        Pivots a long-format multi-product frame into an aligned dense matrix.
+
+        Args:
+            df: DataFrame with columns 'product_id', 'sale_date' and
+                'total_quantity', with dates on bucket starts for freq
+                (as DataLoader returns them); duplicate rows are summed
+            freq: Bucket frequency ('MS', 'W-MON' or 'D')
+
+        Returns:
+            (product IDs sorted as strings, shared period index,
+            products x periods float matrix with zero-filled gaps,
+            bounds: int array (products x 2) of each product's first and
+            one-past-last period with data, i.e. prepare_series' span)
+        """
+        if df.empty:
+            return [], pd.DatetimeIndex([]), np.zeros((0, 0)), np.zeros((0, 2), dtype=int)
+
+        # Sorted like DataLoader.get_sales_matrix, so either can feed series_from_matrix
+        rows, product_ids = pd.factorize(df['product_id'].astype(str), sort=True)
+        dates = pd.DatetimeIndex(pd.to_datetime(df['sale_date']))
+        periods = pd.date_range(dates.min(), dates.max(), freq=freq)
+        cols = periods.get_indexer(dates)
+        if (cols < 0).any():
+            raise ValueError(f"sale_date values are not aligned to {freq} buckets")
+
+        matrix = np.zeros((len(product_ids), len(periods)))
+        np.add.at(matrix, (rows, cols), df['total_quantity'].to_numpy(dtype=float))
+
+        bounds = np.empty((len(product_ids), 2), dtype=int)
+        bounds[:, 0] = len(periods)
+        bounds[:, 1] = 0
+        np.minimum.at(bounds[:, 0], rows, cols)
+        np.maximum.at(bounds[:, 1], rows, cols + 1)
+
+        return [str(pid) for pid in product_ids], periods, matrix, bounds
+
+    @staticmethod
+    def _valid_mask(matrix: np.ndarray, bounds: Optional[np.ndarray]) -> np.ndarray:
+        """Cells inside each row's span (and not NaN padding)."""
+        mask = ~np.isnan(matrix)
+        if bounds is not None:
+            cols = np.arange(matrix.shape[1])
+            mask &= (cols >= bounds[:, :1]) & (cols < bounds[:, 1:2])
+        return mask
+
+    def trend_slopes(self, matrix: np.ndarray, bounds: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Least-squares slope per row (units per period), like np.polyfit(x, y, 1)[0].
+
+        Returns:
+            Slopes, 0 for rows with fewer than 2 points
+        """
+        mask = self._valid_mask(matrix, bounds)
+        x = np.where(mask, np.arange(matrix.shape[1], dtype=float), 0.0)
+        y = np.where(mask, matrix, 0.0)
+        n = mask.sum(axis=1)
+
+        sx, sy = x.sum(axis=1), y.sum(axis=1)
+        sxx, sxy = (x * x).sum(axis=1), (x * y).sum(axis=1)
+        denom = n * sxx - sx * sx
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slopes = (n * sxy - sx * sy) / denom
+        return np.where((n >= 2) & (denom != 0), slopes, 0.0)
+
+    def trend_directions(self, matrix: np.ndarray, bounds: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        'increasing' / 'decreasing' / 'stable' per row: the slope compared
+        with 5% of the row mean, as ForecastModel._determine_trend does.
+        """
+        mask = self._valid_mask(matrix, bounds)
+        n = mask.sum(axis=1)
+        with np.errstate(invalid='ignore'):
+            means = np.where(mask, matrix, 0.0).sum(axis=1) / np.maximum(n, 1)
+        slopes = self.trend_slopes(matrix, bounds)
+        threshold = means * 0.05
+
+        directions = np.full(len(matrix), "stable", dtype=object)
+        usable = (n >= 2) & (means != 0)
+        directions[usable & (slopes > threshold)] = "increasing"
+        directions[usable & (slopes < -threshold)] = "decreasing"
+        return directions
+
+    def lag_autocorrelation(
+        self,
+        matrix: np.ndarray,
+        lag: int = 12,
+        bounds: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Pearson correlation of each row with itself shifted by `lag`
+        (pd.Series.autocorr semantics).
+
+        Returns:
+            Autocorrelations, NaN where undefined (too short or constant)
+        """
+        if matrix.shape[1] <= lag:
+            return np.full(len(matrix), np.nan)
+
+        mask = self._valid_mask(matrix, bounds)
+        pair = mask[:, lag:] & mask[:, :-lag]
+        a = np.where(pair, matrix[:, lag:], 0.0)
+        b = np.where(pair, matrix[:, :-lag], 0.0)
+        n = pair.sum(axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_a = a.sum(axis=1) / n
+            mean_b = b.sum(axis=1) / n
+            da = np.where(pair, a - mean_a[:, None], 0.0)
+            db = np.where(pair, b - mean_b[:, None], 0.0)
+            corr = (da * db).sum(axis=1) / np.sqrt((da * da).sum(axis=1) * (db * db).sum(axis=1))
+        return np.where(n >= 2, corr, np.nan)
+
+    def seasonal_flags(
+        self,
+        matrix: np.ndarray,
+        lag: int = 12,
+        bounds: Optional[np.ndarray] = None,
+        threshold: float = 0.3
+    ) -> np.ndarray:
+        """
+        Seasonality per row: at least two cycles of data and
+        |autocorrelation at `lag`| above threshold (ForecastModel._check_seasonality).
+        """
+        n = self._valid_mask(matrix, bounds).sum(axis=1)
+        autocorr = self.lag_autocorrelation(matrix, lag, bounds)
+        return (n >= 2 * lag) & (np.abs(np.nan_to_num(autocorr)) > threshold)
+
+    def outlier_masks(
+        self,
+        matrix: np.ndarray,
+        n_std: float = 3.0,
+        bounds: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Z-score outlier mask per cell (remove_outliers' rule, sample std).
+
+        Returns:
+            Boolean matrix, True where a value lies more than n_std
+            standard deviations from its row mean
+        """
+        mask = self._valid_mask(matrix, bounds)
+        n = mask.sum(axis=1, keepdims=True)
+        values = np.where(mask, matrix, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = values.sum(axis=1, keepdims=True) / n
+            var = (np.where(mask, values - mean, 0.0) ** 2).sum(axis=1, keepdims=True) / (n - 1)
+        std = np.sqrt(var)
+        outliers = np.abs(values - mean) > n_std * std
+        return outliers & mask & (n > 1)
+
+    def growth_rates(self, matrix: np.ndarray, bounds: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Average period-over-period growth per row (calculate_growth_rate):
+        steps from a zero value are skipped.
+
+        Returns:
+            Mean growth rates as decimals, 0 where none can be computed
+        """
+        if matrix.shape[1] < 2:
+            return np.zeros(len(matrix))
+
+        mask = self._valid_mask(matrix, bounds)
+        previous, current = matrix[:, :-1], matrix[:, 1:]
+        step = mask[:, 1:] & mask[:, :-1] & (previous != 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = np.where(step, (current - previous) / np.where(step, previous, 1.0), 0.0)
+        counts = step.sum(axis=1)
+        return np.where(counts > 0, rates.sum(axis=1) / np.maximum(counts, 1), 0.0)
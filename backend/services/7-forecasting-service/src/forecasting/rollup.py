@@ -0,0 +1,292 @@
+import os
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from .db_pool import DatabasePool, db_pool
+from .schema import sales_schema
+from .series_store import SeriesStoreExporter
+from .migrations import ROLLUP_LOCK_ID
+
+
+class SalesRollup:
+    """
+    Maintains product_sales_monthly, a product-by-month sales rollup.
+
+    The first refresh aggregates all of order_items. Later refreshes only
+    re-aggregate months from the stored watermark (latest order date seen)
+    minus a lookback window, which absorbs late edits to recent orders.
+    DataLoader reads from the rollup once it is ready and falls back to
+    live aggregation before that. Each refresh also re-summarizes the
+    touched products in product_sales_summary (history span, volume) for
+    the product listing. When FORECAST_SERIES_STORE is set, every scheduled
+    refresh is followed by a series store refresh, so the snapshot trails
+    the rollup by at most one interval.
+
+    Environment variables:
+        FORECAST_ROLLUP_INTERVAL: Seconds between background refreshes (default 300, 0 disables)
+        FORECAST_ROLLUP_LOOKBACK_DAYS: Days before the watermark to re-aggregate (default 35)
+    """
+
+    # Rebuild the cells for every month on/after $1 (NULL = everything),
+    # restricted to the products in $2 (NULL = every product)
+    DELETE_SQL = """
+        DELETE FROM product_sales_monthly
+        WHERE ($1::date IS NULL OR month >= $1::date)
+          AND ($2::text[] IS NULL OR product_id = ANY($2::text[]));
+    """
+
+    # Rendered for the detected orders / order_items columns (see SalesSchema).
+    # $2 is cast to the product column's type rather than the column to text,
+    # so per-product refreshes can use the order_items product index.
+    REFRESH_SQL = """
+        INSERT INTO product_sales_monthly (product_id, month, total_quantity, order_lines, last_order_at)
+        SELECT
+            {product}::text as product_id,
+            DATE_TRUNC('month', {order_date})::date as month,
+            SUM({quantity}) as total_quantity,
+            COUNT(*) as order_lines,
+            MAX({order_date}) as last_order_at
+        FROM order_items oi
+        {join}
+        WHERE {product} IS NOT NULL
+          AND ($1::date IS NULL OR {order_date} >= $1::date)
+          AND ($2::text[] IS NULL OR {product} = ANY($2::text[]::{product_type}[]))
+        GROUP BY 1, 2;
+    """
+
+    # Re-summarize every product whose months on/after $1 were rebuilt
+    # (NULL = everything), then drop summaries left without any month
+    SUMMARY_SQL = """
+        INSERT INTO product_sales_summary (
+            product_id, first_month, last_month, history_months, months_with_sales, total_quantity, updated_at
+        )
+        SELECT
+            product_id,
+            MIN(month),
+            MAX(month),
+            ((DATE_PART('year', MAX(month)) - DATE_PART('year', MIN(month))) * 12
+                + DATE_PART('month', MAX(month)) - DATE_PART('month', MIN(month)) + 1)::int,
+            COUNT(*),
+            SUM(total_quantity),
+            NOW()
+        FROM product_sales_monthly
+        WHERE ($1::date IS NULL OR product_id IN (
+            SELECT product_id FROM product_sales_monthly WHERE month >= $1::date
+            UNION
+            SELECT product_id FROM product_sales_summary WHERE last_month >= $1::date
+        ))
+          AND ($2::text[] IS NULL OR product_id = ANY($2::text[]))
+        GROUP BY product_id
+        ON CONFLICT (product_id) DO UPDATE SET
+            first_month = EXCLUDED.first_month,
+            last_month = EXCLUDED.last_month,
+            history_months = EXCLUDED.history_months,
+            months_with_sales = EXCLUDED.months_with_sales,
+            total_quantity = EXCLUDED.total_quantity,
+            updated_at = EXCLUDED.updated_at;
+    """
+
+    SUMMARY_PRUNE_SQL = """
+        DELETE FROM product_sales_summary s
+        WHERE ($1::date IS NULL OR s.last_month >= $1::date)
+          AND ($2::text[] IS NULL OR s.product_id = ANY($2::text[]))
+          AND NOT EXISTS (SELECT 1 FROM product_sales_monthly m WHERE m.product_id = s.product_id);
+    """
+
+    def __init__(self, pool: Optional[DatabasePool] = None):
+        self.pool = pool or db_pool
+        self.interval = float(os.getenv("FORECAST_ROLLUP_INTERVAL", 300))
+        self.lookback_days = int(os.getenv("FORECAST_ROLLUP_LOOKBACK_DAYS", 35))
+        self.ready = False
+        # When this process last finished a refresh (series store readers compare against it)
+        self.refreshed_at: Optional[datetime] = None
+        self.store_exporter = SeriesStoreExporter(pool=self.pool)
+        self._task: Optional[asyncio.Task] = None
+        self._last_result: Dict[str, Any] = {}
+
+    async def refresh(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Bring the rollup up to date.
+
+        Args:
+            full: Rebuild every month instead of only those after the watermark
+
+        Returns:
+            Dict with the recomputed-from month and rows written
+        """
+        await sales_schema.ensure_detected(self.pool)
+        refresh_sql = sales_schema.render(self.REFRESH_SQL)
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # A full build over all of order_items outlasts the request-sized
+                # statement timeout; so can waiting on another replica's build
+                timeout = await self.pool.use_maintenance_timeout(conn)
+                await conn.execute("SELECT pg_advisory_xact_lock($1)", ROLLUP_LOCK_ID, timeout=timeout)
+
+                watermark = None if full else await conn.fetchval(
+                    "SELECT watermark FROM product_sales_rollup_state WHERE id = 1"
+                )
+                since = None
+                if watermark is not None:
+                    since = await conn.fetchval(
+                        "SELECT DATE_TRUNC('month', $1::timestamp - make_interval(days => $2))::date",
+                        watermark, self.lookback_days
+                    )
+
+                rows_written = await self._rebuild(conn, refresh_sql, since, timeout=timeout)
+                # Only the rebuilt months can move the watermark forward
+                await conn.execute("""
+                    INSERT INTO product_sales_rollup_state (id, watermark, refreshed_at, rows_written)
+                    VALUES (
+                        1,
+                        GREATEST($2::timestamp, (
+                            SELECT MAX(last_order_at) FROM product_sales_monthly
+                            WHERE $3::date IS NULL OR month >= $3::date
+                        )),
+                        NOW(),
+                        $1
+                    )
+                    ON CONFLICT (id) DO UPDATE SET
+                        watermark = EXCLUDED.watermark,
+                        refreshed_at = EXCLUDED.refreshed_at,
+                        rows_written = EXCLUDED.rows_written;
+                """, rows_written, watermark, since, timeout=timeout)
+
+        self.ready = True
+        self.refreshed_at = datetime.now(timezone.utc)
+        self._last_result = {
+            "since": since.isoformat() if since else None,
+            "rowsWritten": rows_written,
+        }
+        print(f"Sales rollup refreshed from {self._last_result['since'] or 'the beginning'}: {rows_written} rows")
+        return self._last_result
+
+    async def refresh_products(self, product_ids: List[str]) -> Dict[str, Any]:
+        """
+        Re-aggregate the recent months of specific products.
+
+        Used by the change feed right after their order lines change. Covers
+        the same lookback window as a scheduled refresh, counted from now,
+        and leaves the watermark to the scheduled refreshes.
+
+        Args:
+            product_ids: Products whose order lines changed
+
+        Returns:
+            Dict with the recomputed-from month, products and rows written
+        """
+        await sales_schema.ensure_detected(self.pool)
+        refresh_sql = sales_schema.render(self.REFRESH_SQL)
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                timeout = await self.pool.use_maintenance_timeout(conn)
+                await conn.execute("SELECT pg_advisory_xact_lock($1)", ROLLUP_LOCK_ID, timeout=timeout)
+                since = await conn.fetchval(
+                    "SELECT DATE_TRUNC('month', NOW() - make_interval(days => $1))::date",
+                    self.lookback_days
+                )
+                rows_written = await self._rebuild(conn, refresh_sql, since, product_ids, timeout)
+
+        return {
+            "since": since.isoformat(),
+            "products": len(product_ids),
+            "rowsWritten": rows_written,
+        }
+
+    async def _rebuild(
+        self, conn, refresh_sql: str, since,
+        product_ids: Optional[List[str]] = None, timeout: Optional[float] = None
+    ) -> int:
+        """Rewrite monthly cells and summaries from since (inside the caller's transaction)."""
+        await conn.execute(self.DELETE_SQL, since, product_ids, timeout=timeout)
+        status = await conn.execute(refresh_sql, since, product_ids, timeout=timeout)
+        await conn.execute(self.SUMMARY_SQL, since, product_ids, timeout=timeout)
+        await conn.execute(self.SUMMARY_PRUNE_SQL, since, product_ids, timeout=timeout)
+        return int(status.split()[-1])
+
+    async def ensure_ready(self) -> None:
+        """Mark the rollup ready if it was already built, otherwise build it."""
+        async with self.pool.acquire() as conn:
+            refreshed_at = await conn.fetchval(
+                "SELECT refreshed_at FROM product_sales_rollup_state WHERE id = 1"
+            )
+        if refreshed_at is None:
+            await self.refresh(full=True)
+        else:
+            self.ready = True
+            await self.refresh()
+
+    def start(self) -> None:
+        """Start the background refresher (called from the app lifespan)."""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background refresher."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        try:
+            await self.ensure_ready()
+            await self._refresh_series_store()
+        except Exception as e:
+            print(f"Sales rollup initialisation failed: {e}")
+
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+                await self._refresh_series_store()
+            except Exception as e:
+                print(f"Sales rollup refresh failed: {e}")
+
+    async def _refresh_series_store(self) -> None:
+        """Bring the series store up to the rollup just written, if one is configured."""
+        if not self.store_exporter.path:
+            return
+        try:
+            await self.store_exporter.refresh()
+        except Exception as e:
+            # Readers skip a store older than the rollup, so a failure only costs speed
+            print(f"Series store refresh failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Rollup readiness and the outcome of the last refresh."""
+        return {
+            "ready": self.ready,
+            "intervalSeconds": self.interval,
+            "lookbackDays": self.lookback_days,
+            "refreshedAt": self.refreshed_at.isoformat() if self.refreshed_at else None,
+            "lastRefresh": self._last_result or None,
+        }
+
+
+# Process-wide rollup used by DataLoader
+sales_rollup = SalesRollup()
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Refresh the product_sales_monthly rollup")
+    parser.add_argument("--full", action="store_true", help="Rebuild all months")
+    args = parser.parse_args()
+
+    from .migrations import apply_migrations
+    await apply_migrations()
+    try:
+        await sales_rollup.refresh(full=args.full)
+    finally:
+        await db_pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
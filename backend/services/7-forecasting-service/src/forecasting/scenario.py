@@ -0,0 +1,148 @@
+import re
+import numpy as np
+import statsmodels.api as sm
+from typing import Any, Dict, List, Optional, Tuple
+
+SHOCK_TYPES = ("multiplicative", "additive")
+
+# model_spec() format, e.g. 'sarimax(1,1,1)(1,1,1,12)' or 'sarimax(1,1,1)(0,0,0,0)@D'
+_SPEC_PATTERN = re.compile(r"^sarimax\((\d+),(\d+),(\d+)\)\((\d+),(\d+),(\d+),(\d+)\)")
+
+
+def impulse_response(state: Dict[str, Any], periods: int) -> Optional[np.ndarray]:
+    """
+    Response of the forecast path to a unit surprise, from a stored fit.
+
+    Builds the SARIMAX state space from the stored parameters without
+    filtering the data, which takes a few milliseconds.
+
+    Args:
+        state: Fit state from ParameterStore
+        periods: Forecast horizon
+
+    Returns:
+        psi weights of length periods (psi[0] = 1), or None if the spec
+        is not a SARIMAX spec
+    """
+    match = _SPEC_PATTERN.match(state.get("modelSpec", ""))
+    if match is None:
+        return None
+    values = [int(v) for v in match.groups()]
+    model = sm.tsa.statespace.SARIMAX(
+        np.asarray(state["seriesValues"], dtype=float),
+        order=tuple(values[:3]),
+        seasonal_order=tuple(values[3:]),
+        enforce_stationarity=False,
+        enforce_invertibility=False
+    )
+    psi = model.impulse_responses(np.asarray(state["params"], dtype=float), steps=periods - 1)
+    return np.asarray(psi, dtype=float).reshape(-1)[:periods]
+
+
+def shock_matrices(scenarios: List[Dict[str, Any]], periods: int) -> Tuple[np.ndarray, ...]:
+    """
+    Scenario-by-period multiplier and offset matrices.
+
+    Each shock covers startPeriod..endPeriod (1-based, inclusive; endPeriod
+    defaults to startPeriod). Overlapping multiplicative shocks compound,
+    additive ones add up.
+
+    Returns:
+        (multipliers, offsets, carryover multipliers, carryover offsets),
+        each scenarios x periods; the carryover pair holds only shocks
+        flagged carryover
+
+    Raises:
+        ValueError: on an unknown shock type, a period outside the horizon
+            or a negative multiplier
+    """
+    n = len(scenarios)
+    rows, kinds, starts, ends, values, carry = [], [], [], [], [], []
+    for row, scenario in enumerate(scenarios):
+        for shock in scenario.get("shocks", []):
+            kind = shock["type"]
+            start = int(shock["startPeriod"])
+            end = int(shock.get("endPeriod") or start)
+            value = float(shock["value"])
+            if kind not in SHOCK_TYPES:
+                raise ValueError(f"Unknown shock type: {kind}")
+            if not 1 <= start <= end <= periods:
+                raise ValueError(f"Shock periods {start}-{end} are outside the {periods}-period horizon")
+            if kind == "multiplicative" and value < 0:
+                raise ValueError("Multiplicative shocks must be >= 0")
+            rows.append(row)
+            kinds.append(kind == "multiplicative")
+            starts.append(start - 1)
+            ends.append(end - 1)
+            values.append(value)
+            carry.append(bool(shock.get("carryover", False)))
+
+    multipliers = np.ones((n, periods))
+    offsets = np.zeros((n, periods))
+    carry_multipliers = np.ones((n, periods))
+    carry_offsets = np.zeros((n, periods))
+    if not rows:
+        return multipliers, offsets, carry_multipliers, carry_offsets
+
+    # One row per shock: which periods it covers, then scatter into its scenario
+    rows = np.asarray(rows)
+    multiplicative = np.asarray(kinds)
+    carry = np.asarray(carry)
+    steps = np.arange(periods)
+    covers = (steps >= np.asarray(starts)[:, None]) & (steps <= np.asarray(ends)[:, None])
+    values = np.asarray(values)[:, None]
+
+    factors = np.where(covers & multiplicative[:, None], values, 1.0)
+    addends = np.where(covers & ~multiplicative[:, None], values, 0.0)
+    np.multiply.at(multipliers, rows, factors)
+    np.add.at(offsets, rows, addends)
+    np.multiply.at(carry_multipliers, rows[carry], factors[carry])
+    np.add.at(carry_offsets, rows[carry], addends[carry])
+    return multipliers, offsets, carry_multipliers, carry_offsets
+
+
+def apply_scenarios(
+    mean: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    scenarios: List[Dict[str, Any]],
+    psi: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluate every scenario against one baseline forecast in a single pass.
+
+    The shocked path is mean * multipliers + offsets. Carryover shocks are
+    also treated as if the shocked demand had been observed: their change
+    feeds through the fitted model's impulse response (psi) into every
+    later period. Interval half-widths scale with the multipliers.
+
+    Args:
+        mean: Baseline point forecast (periods,)
+        lower: Baseline lower bounds (periods,)
+        upper: Baseline upper bounds (periods,)
+        scenarios: [{"name": ..., "shocks": [{type, value, startPeriod, endPeriod, carryover}]}]
+        psi: Impulse response from impulse_response(); None disables carryover
+
+    Returns:
+        Dict with 'mean', 'lower', 'upper' (scenarios x periods, clipped at 0)
+    """
+    mean = np.asarray(mean, dtype=float)
+    periods = len(mean)
+    multipliers, offsets, carry_multipliers, carry_offsets = shock_matrices(scenarios, periods)
+
+    shocked = mean * multipliers + offsets
+    if psi is not None:
+        # T[i, j] = psi[j - i] for j > i: a change in period i moves every later period j
+        lag = np.arange(periods)[None, :] - np.arange(periods)[:, None]
+        propagation = np.where(lag > 0, psi[np.clip(lag, 0, periods - 1)], 0.0)
+        carried = mean * (carry_multipliers - 1.0) + carry_offsets
+        shocked = shocked + carried @ propagation
+
+    below = (mean - np.asarray(lower, dtype=float)) * multipliers
+    above = (np.asarray(upper, dtype=float) - mean) * multipliers
+    shocked = np.maximum(shocked, 0.0)
+    return {
+        "mean": shocked,
+        "lower": np.maximum(shocked - below, 0.0),
+        "upper": shocked + above,
+    }
@@ -0,0 +1,139 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+from .db_pool import DatabasePool, db_pool
+
+# Candidate column names, in COALESCE priority order. The backend has
+# shipped both snake_case and camelCase (Prisma-style) order tables.
+ORDER_FK_COLUMNS = ("order_id", "orderId")
+PRODUCT_COLUMNS = ("product_id", "productId")
+QUANTITY_COLUMNS = ("quantity",)
+ORDER_DATE_COLUMNS = ("order_date", "orderDate", "created_at")
+
+
+class SalesSchema:
+    """
+    Column layout of orders / order_items, detected once from information_schema.
+
+    Live sales queries are written as templates with {join}, {product},
+    {quantity} and {order_date} placeholders, plus {product_type}, the
+    product column's SQL type for casting parameters to it (so filters
+    compare the bare, indexable column). render() fills them with
+    exactly the columns that exist, so each query is one tight statement
+    instead of a catch-all (OR joins, COALESCE over absent columns) with an
+    alternative retried on failure. When both spellings of a column exist
+    they are still coalesced, matching the old primary queries.
+
+    Detection runs in the app lifespan and lazily on first use; a column
+    added later is picked up on restart.
+    """
+
+    def __init__(self):
+        self.columns: Optional[Dict[str, List[str]]] = None
+        self._fragments: Dict[str, str] = {}
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def detected(self) -> bool:
+        return self.columns is not None
+
+    async def detect(self, pool: Optional[DatabasePool] = None) -> Dict[str, List[str]]:
+        """
+        Read the orders / order_items columns and build the query fragments.
+
+        Raises:
+            RuntimeError: if a column the sales queries need is missing
+        """
+        query = """
+            SELECT table_name, column_name, udt_schema, udt_name
+            FROM information_schema.columns
+            WHERE table_schema = current_schema()
+              AND table_name IN ('orders', 'order_items');
+        """
+        async with (pool or db_pool).acquire() as conn:
+            rows = await conn.fetch(query)
+
+        present = {(row['table_name'], row['column_name']) for row in rows}
+        types = {(row['table_name'], row['column_name']): _type_name(row['udt_schema'], row['udt_name']) for row in rows}
+        columns = {
+            "orderFk": [c for c in ORDER_FK_COLUMNS if ("order_items", c) in present],
+            "product": [c for c in PRODUCT_COLUMNS if ("order_items", c) in present],
+            "quantity": [c for c in QUANTITY_COLUMNS if ("order_items", c) in present],
+            "orderDate": [c for c in ORDER_DATE_COLUMNS if ("orders", c) in present],
+        }
+        missing = [name for name in ("orderFk", "product", "orderDate") if not columns[name]]
+        if ("orders", "id") not in present:
+            missing.append("orders.id")
+        if missing:
+            raise RuntimeError(f"orders/order_items schema is missing columns for: {', '.join(missing)}")
+
+        order_fk = _coalesce("oi", columns["orderFk"])
+        self._fragments = {
+            "join": f"JOIN orders o ON {order_fk} = o.id",
+            "product": _coalesce("oi", columns["product"]),
+            "product_type": types[("order_items", columns["product"][0])],
+            "quantity": f"COALESCE({_coalesce('oi', columns['quantity'])}, 1)" if columns["quantity"] else "1",
+            "order_date": _coalesce("o", columns["orderDate"]),
+        }
+        self.columns = columns
+        print(f"Sales schema detected: {columns}")
+        return columns
+
+    async def ensure_detected(self, pool: Optional[DatabasePool] = None) -> None:
+        """Detect the schema if that has not succeeded yet (one query per process)."""
+        if self.detected:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self.detected:
+                await self.detect(pool)
+
+    def render(self, template: str) -> str:
+        """Fill a query template with the detected column expressions."""
+        if not self.detected:
+            raise RuntimeError("sales schema has not been detected yet")
+        return template.format(**self._fragments)
+
+    def column_expression(self, name: str, alias: str) -> str:
+        """
+        Expression for one detected column on any row alias (e.g. NEW in a trigger).
+
+        Args:
+            name: Column group ('orderFk', 'product', 'quantity', 'orderDate')
+            alias: Table alias or row variable to qualify the column with
+        """
+        if not self.detected:
+            raise RuntimeError("sales schema has not been detected yet")
+        return _coalesce(alias, self.columns[name])
+
+    def stats(self) -> Dict[str, Any]:
+        """Detected columns and the expressions built from them."""
+        return {
+            "detected": self.detected,
+            "columns": self.columns,
+            "expressions": dict(self._fragments),
+        }
+
+
+def _ident(name: str) -> str:
+    """Quote an identifier unless it is plain lower-case."""
+    if name.isidentifier() and name == name.lower():
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _type_name(schema: str, name: str) -> str:
+    """SQL name of a column's type, qualified unless it is a built-in."""
+    if schema == "pg_catalog":
+        return _ident(name)
+    return f"{_ident(schema)}.{_ident(name)}"
+
+
+def _coalesce(alias: str, names: List[str]) -> str:
+    """alias.col, or COALESCE over every present spelling of the column."""
+    refs = [f"{alias}.{_ident(name)}" for name in names]
+    return refs[0] if len(refs) == 1 else f"COALESCE({', '.join(refs)})"
+
+
+# Process-wide schema shared by every DataLoader and the rollup
+sales_schema = SalesSchema()
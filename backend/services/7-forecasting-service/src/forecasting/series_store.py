@@ -0,0 +1,349 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from .db_pool import DatabasePool, db_pool
+
+META_FILE = "meta.json"
+PRODUCTS_FILE = "products.json"
+QUANTITIES_FILE = "quantities.int32"
+FORMAT_VERSION = 1
+
+
+class SeriesStore:
+    """
+    Read-only, memory-mapped snapshot of every product's monthly sales.
+
+    The store is a directory with three files:
+        meta.json: format version, first month, month/product counts, timestamps
+        products.json: product IDs in column order
+        quantities.int32: contiguous int32 matrix, one row per month
+            (month-major, so a refresh appends new months at the end)
+
+    Each process maps the matrix read-only; the OS page cache backs every
+    mapping, so worker processes share the data without copying it. The
+    mapping is reopened automatically when meta.json changes. Writers only
+    ever replace files, so an open mapping never changes underneath a reader.
+
+    The scheduled rollup refresh refreshes the store right after it (see
+    SalesRollup), and DataLoader only reads from it when a caller opts in.
+
+    Environment variables:
+        FORECAST_SERIES_STORE: Store directory (unset disables the store)
+        FORECAST_SERIES_STORE_MAX_AGE: Seconds since the last export/refresh
+            before readers fall back to Postgres (default 86400)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path if path is not None else os.getenv("FORECAST_SERIES_STORE", "")
+        self.max_age = float(os.getenv("FORECAST_SERIES_STORE_MAX_AGE", 86400))
+        self._meta: Dict[str, Any] = {}
+        self._meta_mtime: Optional[float] = None
+        self._index: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._months: Optional[pd.DatetimeIndex] = None
+        self._hits = 0
+
+    @property
+    def available(self) -> bool:
+        """True when a store is configured, readable and fresh enough to serve."""
+        if not self.path or not self._load():
+            return False
+        return self.age_seconds() <= self.max_age
+
+    @property
+    def refreshed_at(self) -> Optional[datetime]:
+        """When the mapped snapshot was last exported or refreshed."""
+        refreshed_at = self._meta.get("refreshedAt")
+        return datetime.fromisoformat(refreshed_at) if refreshed_at else None
+
+    def age_seconds(self) -> float:
+        """Seconds since the store was last exported or refreshed."""
+        if self.refreshed_at is None:
+            return float("inf")
+        return (datetime.now(timezone.utc) - self.refreshed_at).total_seconds()
+
+    def _load(self) -> bool:
+        """(Re)map the store if meta.json changed. Returns False if unusable."""
+        meta_path = os.path.join(self.path, META_FILE)
+        try:
+            mtime = os.stat(meta_path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._meta_mtime and self._matrix is not None:
+            return True
+
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(os.path.join(self.path, PRODUCTS_FILE)) as f:
+                products = json.load(f)
+
+            n_months, n_products = meta["months"], meta["products"]
+            quantities_path = os.path.join(self.path, QUANTITIES_FILE)
+            if meta.get("version") != FORMAT_VERSION or len(products) != n_products:
+                raise ValueError("series store metadata does not match its product index")
+            if os.path.getsize(quantities_path) < n_months * n_products * 4:
+                raise ValueError("series store matrix is shorter than its metadata")
+
+            matrix = np.memmap(quantities_path, dtype=np.int32, mode="r", shape=(n_months, n_products))
+        except Exception as e:
+            # Mid-refresh or corrupt: keep serving the previous mapping if there is one
+            print(f"Series store not loadable: {e}")
+            return self._matrix is not None
+
+        self._meta = meta
+        self._meta_mtime = mtime
+        self._index = {product_id: i for i, product_id in enumerate(products)}
+        self._matrix = matrix
+        self._months = pd.date_range(meta["startMonth"], periods=n_months, freq="MS")
+        print(f"Series store mapped: {n_products} products x {n_months} months")
+        return True
+
+    def _window_start(self, months: int) -> int:
+        """First month row inside the history window, mirroring DataLoader's SQL."""
+        start = (pd.Timestamp.now().to_period("M") - months).to_timestamp()
+        return int(self._months.searchsorted(start))
+
+    def get_matrix(self, product_ids: List[str], months: int = 24) -> Tuple[List[str], pd.DatetimeIndex, np.ndarray]:
+        """
+        Dense slice of the store for the requested products.
+
+        Returns:
+            (product IDs present in the store, month index, products x months int32 matrix)
+        """
+        if not self._load():
+            return [], pd.DatetimeIndex([]), np.zeros((0, 0), dtype=np.int32)
+
+        found = [pid for pid in product_ids if pid in self._index]
+        columns = np.fromiter((self._index[pid] for pid in found), dtype=np.int64, count=len(found))
+        start = self._window_start(months)
+        self._hits += 1
+        return found, self._months[start:], np.ascontiguousarray(self._matrix[start:, columns].T)
+
+    def get_sales_data_batch(self, product_ids: List[str], months: int = 24) -> Dict[str, pd.DataFrame]:
+        """
+        Same contract as DataLoader.get_sales_data_batch, served from the map.
+
+        Returns:
+            Dict of product_id -> DataFrame with columns: sale_date, total_quantity.
+            Only months with sales are included; products without sales are omitted.
+        """
+        found, month_index, matrix = self.get_matrix(product_ids, months)
+        result = {}
+        for product_id, row in zip(found, matrix):
+            nonzero = np.flatnonzero(row)
+            if len(nonzero):
+                result[product_id] = pd.DataFrame({
+                    "sale_date": month_index[nonzero],
+                    "total_quantity": row[nonzero].astype(int),
+                })
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Store location, shape and freshness."""
+        loaded = bool(self.path) and self._load()
+        return {
+            "configured": bool(self.path),
+            "available": loaded and self.age_seconds() <= self.max_age,
+            "path": self.path or None,
+            "products": self._meta.get("products") if loaded else None,
+            "months": self._meta.get("months") if loaded else None,
+            "startMonth": self._meta.get("startMonth") if loaded else None,
+            "refreshedAt": self._meta.get("refreshedAt") if loaded else None,
+            "maxAgeSeconds": self.max_age,
+            "reads": self._hits,
+        }
+
+
+class SeriesStoreExporter:
+    """
+    Writes the series store from the product_sales_monthly rollup.
+
+    export() rewrites the whole store. refresh() re-reads only the trailing
+    months still subject to change (FORECAST_SERIES_STORE_LOOKBACK_MONTHS)
+    and any newer months, copying the older rows over from the current
+    file; it falls back to a full export when products appear that are not
+    in the index yet. Both write a new matrix file and rename it into
+    place, so readers keep their old mapping until meta.json changes.
+    """
+
+    def __init__(self, path: Optional[str] = None, pool: Optional[DatabasePool] = None):
+        self.path = path if path is not None else os.getenv("FORECAST_SERIES_STORE", "")
+        self.pool = pool or db_pool
+        self.lookback_months = int(os.getenv("FORECAST_SERIES_STORE_LOOKBACK_MONTHS", 1))
+
+    async def _fetch_rows(self, since: Optional[pd.Timestamp] = None):
+        query = """
+            SELECT product_id, month, total_quantity
+            FROM product_sales_monthly
+            WHERE $1::date IS NULL OR month >= $1::date;
+        """
+        async with self.pool.acquire() as conn:
+            return await conn.fetch(query, since.date() if since is not None else None)
+
+    async def export(self) -> Dict[str, Any]:
+        """Write a complete snapshot of every product's monthly series."""
+        if not self.path:
+            raise ValueError("FORECAST_SERIES_STORE is not set")
+        started = time.perf_counter()
+
+        rows = await self._fetch_rows()
+        products = sorted({row['product_id'] for row in rows})
+        index = {product_id: i for i, product_id in enumerate(products)}
+
+        current_month = pd.Timestamp.now().to_period("M").to_timestamp()
+        row_months = [pd.Timestamp(row['month']) for row in rows]
+        first_month = min(row_months, default=current_month)
+        months = pd.date_range(first_month, max(row_months + [current_month]), freq="MS")
+
+        matrix = np.zeros((len(months), len(products)), dtype=np.int32)
+        if rows:
+            month_rows = months.get_indexer(row_months)
+            product_cols = np.array([index[row['product_id']] for row in rows])
+            matrix[month_rows, product_cols] = [row['total_quantity'] for row in rows]
+
+        os.makedirs(self.path, exist_ok=True)
+        # Replace files rather than overwrite them so existing mappings stay valid
+        matrix_tmp = os.path.join(self.path, QUANTITIES_FILE + ".tmp")
+        matrix.tofile(matrix_tmp)
+        os.replace(matrix_tmp, os.path.join(self.path, QUANTITIES_FILE))
+        _write_json(os.path.join(self.path, PRODUCTS_FILE), products)
+
+        now = datetime.now(timezone.utc).isoformat()
+        meta = {
+            "version": FORMAT_VERSION,
+            "layout": "month-major",
+            "dtype": "int32",
+            "startMonth": months[0].strftime("%Y-%m-%d"),
+            "months": len(months),
+            "products": len(products),
+            "exportedAt": now,
+            "refreshedAt": now,
+        }
+        _write_json(os.path.join(self.path, META_FILE), meta)
+
+        summary = {
+            "mode": "export",
+            "products": len(products),
+            "months": len(months),
+            "durationSeconds": round(time.perf_counter() - started, 3),
+        }
+        print(f"Series store exported: {summary}")
+        return summary
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Rewrite the trailing months and append newer ones."""
+        if not self.path:
+            raise ValueError("FORECAST_SERIES_STORE is not set")
+        meta_path = os.path.join(self.path, META_FILE)
+        if not os.path.exists(meta_path):
+            return await self.export()
+        started = time.perf_counter()
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        with open(os.path.join(self.path, PRODUCTS_FILE)) as f:
+            products = json.load(f)
+        index = {product_id: i for i, product_id in enumerate(products)}
+
+        start_month = pd.Timestamp(meta["startMonth"])
+        stored_months = pd.date_range(start_month, periods=meta["months"], freq="MS")
+        since = stored_months[-1] - pd.DateOffset(months=self.lookback_months)
+        since = max(since, start_month)
+
+        rows = await self._fetch_rows(since)
+        if any(row['product_id'] not in index for row in rows):
+            print("New products since the last export, rewriting the series store")
+            return await self.export()
+
+        current_month = pd.Timestamp.now().to_period("M").to_timestamp()
+        last_month = max([current_month, stored_months[-1]] + [pd.Timestamp(row['month']) for row in rows])
+        months = pd.date_range(start_month, last_month, freq="MS")
+        first_row = int(months.get_loc(since))
+
+        block = np.zeros((len(months) - first_row, len(products)), dtype=np.int32)
+        if rows:
+            month_rows = months.get_indexer([pd.Timestamp(row['month']) for row in rows]) - first_row
+            product_cols = np.array([index[row['product_id']] for row in rows])
+            block[month_rows, product_cols] = [row['total_quantity'] for row in rows]
+
+        # Month-major layout: the changed months are one contiguous tail, so the
+        # new file is the old file's head plus the block. Written beside the
+        # old one and renamed, as in export(), so live mappings stay intact.
+        quantities_path = os.path.join(self.path, QUANTITIES_FILE)
+        matrix_tmp = quantities_path + ".tmp"
+        with open(quantities_path, "rb") as src, open(matrix_tmp, "wb") as dst:
+            _copy_bytes(src, dst, first_row * len(products) * 4)
+            dst.write(block.tobytes())
+        os.replace(matrix_tmp, quantities_path)
+
+        meta.update({
+            "months": len(months),
+            "refreshedAt": datetime.now(timezone.utc).isoformat(),
+        })
+        _write_json(meta_path, meta)
+
+        summary = {
+            "mode": "refresh",
+            "products": len(products),
+            "months": len(months),
+            "rewrittenFrom": since.strftime("%Y-%m-%d"),
+            "appendedMonths": len(months) - len(stored_months),
+            "durationSeconds": round(time.perf_counter() - started, 3),
+        }
+        print(f"Series store refreshed: {summary}")
+        return summary
+
+
+def _copy_bytes(src, dst, length: int) -> None:
+    """Copy the first length bytes of src to dst."""
+    remaining = length
+    while remaining > 0:
+        chunk = src.read(min(remaining, 1 << 20))
+        if not chunk:
+            raise ValueError("series store matrix is shorter than its metadata")
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def _write_json(path: str, value: Any) -> None:
+    """Write JSON atomically (temp file + rename)."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(value, f)
+    os.replace(tmp, path)
+
+
+# Process-wide reader used by DataLoader (each worker process maps its own view)
+series_store = SeriesStore()
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Export or refresh the memory-mapped series store")
+    parser.add_argument("command", choices=["export", "refresh"])
+    parser.add_argument("--path", help="Store directory (default: FORECAST_SERIES_STORE)")
+    args = parser.parse_args()
+
+    from .migrations import apply_migrations
+    from .rollup import sales_rollup
+
+    exporter = SeriesStoreExporter(args.path)
+    try:
+        await apply_migrations()
+        await sales_rollup.ensure_ready()
+        if args.command == "export":
+            await exporter.export()
+        else:
+            await exporter.refresh()
+    finally:
+        await db_pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,76 @@
+import os
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from .metrics import metrics
+
+COALESCED = metrics.counter(
+    "forecast_coalesced_requests_total",
+    "Requests that joined an identical in-flight computation, by operation.",
+    ["operation"],
+)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one in-flight computation.
+
+    The first caller for a key starts the work; callers arriving while it
+    runs await the same task and share its result (or exception). Nothing
+    is kept once the task finishes; repeat traffic after that is the
+    forecast cache's job.
+
+    Waiters are shielded from each other: a client that disconnects
+    cancels only its own wait, never the shared computation.
+
+    Environment variables:
+        FORECAST_COALESCE: Set to 'false' to run every call independently
+            (default true)
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("FORECAST_COALESCE", "true").lower() != "false"
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._leaders = 0
+        self._followers = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() once per key at a time.
+
+        Args:
+            key: Identity of the computation; key[0] names the operation
+                for metrics, e.g. ("predict", product_id, periods, ...)
+            fn: Coroutine factory doing the work
+
+        Returns:
+            fn's result, shared by every concurrent caller with the same key
+        """
+        if not self.enabled:
+            return await fn()
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            self._leaders += 1
+        else:
+            self._followers += 1
+            COALESCED.inc(str(key[0]))
+
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        """Coalescing counters and current in-flight keys."""
+        total = self._leaders + self._followers
+        return {
+            "enabled": self.enabled,
+            "inFlight": len(self._in_flight),
+            "computations": self._leaders,
+            "coalesced": self._followers,
+            "coalescedRatio": round(self._followers / total, 3) if total else 0.0,
+        }
+
+
+# Process-wide coalescer shared by every ForecastModel
+request_coalescer = SingleFlight()
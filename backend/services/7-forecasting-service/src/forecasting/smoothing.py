@@ -0,0 +1,258 @@
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+# Two-sided 95% normal quantile, matching SARIMAX conf_int() defaults
+Z_95 = 1.959963984540054
+
+# Smoothing-parameter grid searched for every series at once
+_ALPHAS = np.array([0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.95])
+_BETA_FRACTIONS = np.array([0.05, 0.15, 0.3, 0.5])
+_PHIS = np.array([0.8, 0.9, 0.98])
+
+METHODS = ("ses", "holt", "damped")
+
+
+def _candidate_grid(method: str) -> np.ndarray:
+    """
+    Parameter candidates as an (n, 3) array of (alpha, beta, phi).
+
+    beta is expressed in error-correction form (beta <= alpha).
+    """
+    if method == "ses":
+        return np.column_stack([_ALPHAS, np.zeros_like(_ALPHAS), np.ones_like(_ALPHAS)])
+
+    alpha, frac = np.meshgrid(_ALPHAS, _BETA_FRACTIONS, indexing="ij")
+    holt = np.column_stack([alpha.ravel(), (alpha * frac).ravel(), np.ones(alpha.size)])
+    if method == "holt":
+        return holt
+
+    return np.vstack([
+        np.column_stack([holt[:, 0], holt[:, 1], np.full(len(holt), phi)])
+        for phi in _PHIS
+    ])
+
+
+class ExponentialSmoothingEngine:
+    """
+    Vectorized exponential smoothing for many short series at once.
+
+    Fits simple (SES), Holt linear-trend and damped-trend models in
+    additive error-correction form over a products-by-months matrix. The
+    parameter grid and all series are evaluated together, so one call
+    replaces thousands of per-product state-space fits. Prediction
+    intervals use the analytic ETS(A,N,N) / (A,A,N) / (A,Ad,N) variances.
+
+    Series of different lengths are passed left-padded with NaN.
+    """
+
+    def fit_forecast(
+        self,
+        matrix: np.ndarray,
+        periods: int,
+        method: str = "auto"
+    ) -> Dict[str, np.ndarray]:
+        """
+        Fit every row of `matrix` and forecast `periods` steps ahead.
+
+        Args:
+            matrix: (n_series, n_periods) float array, NaN before each series starts
+            periods: Forecast horizon
+            method: 'ses', 'holt', 'damped' or 'auto' (lowest AICc per series)
+
+        Returns:
+            Dict of arrays, one row per series:
+                mean, lower, upper: (n_series, periods)
+                fitted: (n_series, n_periods) one-step-ahead in-sample fits
+                method: (n_series,) chosen method names
+                alpha, beta, phi, sigma2, aicc: (n_series,)
+        """
+        y = np.asarray(matrix, dtype=float)
+        if y.ndim == 1:
+            y = y[np.newaxis, :]
+
+        methods = METHODS if method == "auto" else (method,)
+        if any(m not in METHODS for m in methods):
+            raise ValueError(f"Unknown smoothing method: {method}")
+
+        best: Optional[Dict[str, np.ndarray]] = None
+        for name in methods:
+            fit = self._fit_method(y, name)
+            if best is None:
+                best = fit
+                continue
+            better = fit["aicc"] < best["aicc"]
+            for key in best:
+                if best[key].ndim == 1:
+                    best[key] = np.where(better, fit[key], best[key])
+                else:
+                    best[key] = np.where(better[:, np.newaxis], fit[key], best[key])
+
+        mean, variance = self._forecast(best, periods)
+        half_width = Z_95 * np.sqrt(variance)
+
+        return {
+            "mean": mean,
+            "lower": mean - half_width,
+            "upper": mean + half_width,
+            "fitted": best["fitted"],
+            "method": np.array(METHODS, dtype=object)[best["method_index"].astype(int)],
+            "alpha": best["alpha"],
+            "beta": best["beta"],
+            "phi": best["phi"],
+            "sigma2": best["sigma2"],
+            "aicc": best["aicc"],
+        }
+
+    def _fit_method(self, y: np.ndarray, method: str) -> Dict[str, np.ndarray]:
+        """Grid-search one model family for every series simultaneously."""
+        n_series, n_periods = y.shape
+        grid = _candidate_grid(method)
+
+        observed = ~np.isnan(y)
+        n_obs = observed.sum(axis=1)
+        start = np.argmax(observed, axis=1)
+        rows = np.arange(n_series)
+
+        # Initial states: first observation, mean of up to three first differences
+        first = y[rows, start]
+        level0 = np.where(n_obs > 0, first, 0.0)
+        if method == "ses" or n_periods < 2:
+            trend0 = np.zeros(n_series)
+        else:
+            offsets = start[:, np.newaxis] + np.arange(3)[np.newaxis, :]
+            diffs = np.diff(y, axis=1)[rows[:, np.newaxis], np.minimum(offsets, n_periods - 2)]
+            in_range = offsets <= n_periods - 2
+            diffs = np.where(in_range & ~np.isnan(diffs), diffs, 0.0)
+            counts = in_range.sum(axis=1)
+            trend0 = np.where(counts > 0, diffs.sum(axis=1) / np.maximum(counts, 1), 0.0)
+
+        # Pass 1: SSE for every (candidate, series) pair
+        _, _, sse, _ = _run_recursion(
+            y, observed, start, level0, trend0,
+            grid[:, 0][:, np.newaxis], grid[:, 1][:, np.newaxis], grid[:, 2][:, np.newaxis],
+            record_fitted=False
+        )
+        pick = np.argmin(sse, axis=0)
+        sse = sse[pick, rows]
+
+        # Pass 2: final states and in-sample fits for each series' best candidate
+        level, trend, _, fitted = _run_recursion(
+            y, observed, start, level0, trend0,
+            grid[pick, 0][np.newaxis, :], grid[pick, 1][np.newaxis, :], grid[pick, 2][np.newaxis, :],
+            record_fitted=True
+        )
+
+        # Information criterion on one-step errors (k = smoothing params + initial states)
+        k = {"ses": 2, "holt": 4, "damped": 5}[method]
+        n_eff = np.maximum(n_obs - 1, 1)
+        sigma2 = sse / np.maximum(n_eff - k + 1, 1)
+        mse = np.maximum(sse / n_eff, 1e-12)
+        aicc = n_eff * np.log(mse) + 2 * k + np.where(
+            n_eff - k - 1 > 0, 2 * k * (k + 1) / np.maximum(n_eff - k - 1, 1), np.inf
+        )
+
+        return {
+            "level": level[0],
+            "trend": trend[0],
+            "fitted": fitted[0],
+            "alpha": grid[pick, 0],
+            "beta": grid[pick, 1],
+            "phi": grid[pick, 2],
+            "sigma2": sigma2,
+            "aicc": aicc,
+            "method_index": np.full(n_series, float(METHODS.index(method))),
+        }
+
+    @staticmethod
+    def _forecast(fit: Dict[str, np.ndarray], periods: int):
+        """Point forecasts and analytic forecast variances for h = 1..periods."""
+        h = np.arange(1, periods + 1, dtype=float)[np.newaxis, :]
+        alpha = fit["alpha"][:, np.newaxis]
+        beta = fit["beta"][:, np.newaxis]
+        phi = fit["phi"][:, np.newaxis]
+        sigma2 = fit["sigma2"][:, np.newaxis]
+
+        damped = phi < 1.0
+        safe_phi = np.where(damped, phi, 0.5)
+
+        # Sum of phi^1..phi^h (equals h when phi == 1)
+        phi_sum = np.where(damped, safe_phi * (1 - safe_phi ** h) / (1 - safe_phi), h)
+        mean = fit["level"][:, np.newaxis] + phi_sum * fit["trend"][:, np.newaxis]
+
+        # ETS(A,A,N) / ETS(A,N,N) when beta == 0
+        linear = 1 + (h - 1) * (alpha ** 2 + alpha * beta * h + beta ** 2 * h * (2 * h - 1) / 6)
+
+        # ETS(A,Ad,N), Hyndman et al. (2008), Table 6.1
+        one_minus = 1 - safe_phi
+        damped_var = (
+            1 + alpha ** 2 * (h - 1)
+            + beta * safe_phi * h / one_minus ** 2 * (2 * alpha * one_minus + beta * safe_phi)
+            - beta * safe_phi * (1 - safe_phi ** h) / (one_minus ** 2 * (1 - safe_phi ** 2))
+            * (2 * alpha * (1 - safe_phi ** 2) + beta * safe_phi * (1 + 2 * safe_phi - safe_phi ** h))
+        )
+
+        variance = sigma2 * np.where(damped, damped_var, linear)
+        return mean, np.maximum(variance, 0.0)
+
+
+def _run_recursion(
+    y: np.ndarray,
+    observed: np.ndarray,
+    start: np.ndarray,
+    level0: np.ndarray,
+    trend0: np.ndarray,
+    alpha: np.ndarray,
+    beta: np.ndarray,
+    phi: np.ndarray,
+    record_fitted: bool
+):
+    """
+    Error-correction recursion, vectorized over (candidates, series).
+
+    alpha/beta/phi broadcast against (n_candidates, n_series).
+
+    Returns:
+        (final level, final trend, SSE, one-step fits or None)
+    """
+    n_series, n_periods = y.shape
+    shape = np.broadcast_shapes(alpha.shape, (1, n_series))
+
+    level = np.broadcast_to(level0, shape).copy()
+    trend = np.broadcast_to(trend0, shape).copy()
+    sse = np.zeros(shape)
+    fitted = np.full(shape + (n_periods,), np.nan) if record_fitted else None
+
+    for t in range(n_periods):
+        # Rows whose series started before t get a one-step-ahead update
+        active = observed[:, t] & (start < t)
+        if not active.any():
+            continue
+        forecast = level + phi * trend
+        error = np.where(active, y[:, t] - forecast, 0.0)
+        if record_fitted:
+            fitted[:, :, t] = np.where(active, forecast, np.nan)
+        sse += error ** 2
+        level = np.where(active, forecast + alpha * error, level)
+        trend = np.where(active, phi * trend + beta * error, trend)
+
+    return level, trend, sse, fitted
+
+
+def to_padded_matrix(series_list: List[np.ndarray]) -> np.ndarray:
+    """Stack 1-D series of varying length into a right-aligned NaN-padded matrix."""
+    width = max((len(s) for s in series_list), default=0)
+    matrix = np.full((len(series_list), width), np.nan)
+    for i, values in enumerate(series_list):
+        if len(values):
+            matrix[i, width - len(values):] = values
+    return matrix
+
+
+def smoothing_summary(fit: Dict[str, Any], row: int) -> Dict[str, Any]:
+    """Chosen method and parameters for one row of a fit_forecast result."""
+    return {
+        "method": str(fit["method"][row]),
+        "alpha": float(fit["alpha"][row]),
+        "beta": float(fit["beta"][row]),
+        "phi": float(fit["phi"][row]),
+    }
@@ -1,6 +1,52 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from .api.endpoints import router as forecast_router
+from .forecasting.db_pool import db_pool
+from .forecasting.executor import fit_executor
+from .forecasting.cache import forecast_cache
+from .forecasting.metrics import metrics
+from .forecasting.migrations import apply_migrations
+from .forecasting.rollup import sales_rollup
+from .forecasting.schema import sales_schema
+from .forecasting.data_loader import DataLoader
+from .forecasting.precompute import forecast_precomputer
+from .forecasting.change_feed import sales_change_listener
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan: open shared resources on startup, release on shutdown.
+    """
+    try:
+        await db_pool.open()
+        await apply_migrations(db_pool)
+        # Pick the orders/order_items column names once for every live query
+        await sales_schema.detect(db_pool)
+        DataLoader(db_pool).register_live_statements()
+        # Installs the order_items change trigger, or drops it when the feed is off
+        await sales_change_listener.sync_trigger()
+    except Exception as e:
+        # Keep serving (default forecasts); the pool is retried lazily on first use
+        print(f"Database startup failed: {e}")
+
+    # Builds/refreshes the monthly sales rollup in the background
+    sales_rollup.start()
+    # Catalog-wide forecast precompute (FORECAST_PRECOMPUTE_INTERVAL > 0)
+    forecast_precomputer.start()
+    # Order-change notifications drive targeted refreshes (FORECAST_CHANGE_FEED)
+    sales_change_listener.start()
+
+    yield
+
+    await sales_change_listener.stop()
+    await forecast_precomputer.stop()
+    await sales_rollup.stop()
+    fit_executor.shutdown()
+    await db_pool.close()
+
 
 app = FastAPI(
     title="Forecasting Service",
@@ -15,8 +61,23 @@ app = FastAPI(
     
     ## Endpoints
     - `POST /api/forecast/predict` - Generate demand forecast (frontend compatible)
+    - `POST /api/forecast/batch` - Stream forecasts for many products (NDJSON)
+    - `POST /api/forecast/backtest` - Rolling-origin accuracy backtest
+    - `POST /api/forecast/hierarchy` - Reconciled total/category/product forecasts
+    - `POST /api/forecast/scenario` - What-if shocks on the latest forecast, no refit
     - `POST /api/forecast` - Legacy forecast endpoint
     - `GET /api/forecast/historical/{product_id}` - Get historical sales data
+    - `GET /api/forecast/products` - Forecastable products, keyset-paginated, top sellers first
+    - `GET /api/forecast/stats/pool` - Database connection pool saturation
+    - `GET /api/forecast/stats/workers` - Model-fitting queue depth and in-flight fits
+    - `GET /api/forecast/stats/cache` - Forecast cache hit/miss/eviction counters
+    - `GET /api/forecast/stats/rollup` - Monthly sales rollup freshness
+    - `GET /api/forecast/stats/precompute` - Scheduled catalog precompute status
+    - `GET /api/forecast/stats/series-store` - Memory-mapped series store freshness
+    - `GET /api/forecast/stats/coalescing` - Identical concurrent requests sharing one fit
+    - `GET /api/forecast/stats/change-feed` - Order-change notifications and debounced refreshes
+    - `GET /api/forecast/stats/model-registry` - Stored fitted models served without re-estimation
+    - `GET /metrics` - Prometheus metrics (per-stage latency, fallbacks, saturation)
     
     ## Frontend Integration
     This service is designed to work with the Supply Chain frontend's 
@@ -24,7 +85,8 @@ app = FastAPI(
     """,
     version="1.0.0",
     docs_url="/api-docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -45,6 +107,35 @@ app.add_middleware(
 app.include_router(forecast_router, prefix="/api", tags=["forecasting"])
 
 
+def _pick(stats_fn, keys):
+    """Metric callback exposing selected stats() fields under Prometheus names."""
+    def read():
+        stats = stats_fn()
+        return {name: stats[key] for name, key in keys.items()}
+    return read
+
+
+# Saturation gauges, read from the existing stats() at scrape time
+metrics.gauge_callback("forecast_cache", "Forecast cache size.", _pick(forecast_cache.stats, {
+    "entries": "entries", "bytes": "bytes",
+}))
+metrics.gauge_callback("forecast_cache", "Forecast cache lookups and evictions.", _pick(forecast_cache.stats, {
+    "hits_total": "hits", "misses_total": "misses", "evictions_total": "evictions",
+}), kind="counter")
+metrics.gauge_callback("forecast_db_pool", "Database connection pool usage.", _pick(db_pool.stats, {
+    "size": "size", "idle": "idle", "in_use": "inUse", "waiting": "waiting",
+}))
+metrics.gauge_callback("forecast_db_pool", "Database connection acquire timeouts.", _pick(db_pool.stats, {
+    "acquire_timeouts_total": "acquireTimeouts",
+}), kind="counter")
+metrics.gauge_callback("forecast_workers", "Model-fitting worker pool load.", _pick(fit_executor.stats, {
+    "in_flight": "inFlight", "queue_depth": "queueDepth",
+}))
+metrics.gauge_callback("forecast_workers", "Model-fitting jobs rejected or failed.", _pick(fit_executor.stats, {
+    "rejected_total": "rejectedTotal", "failed_total": "failedTotal",
+}), kind="counter")
+
+
 @app.get("/health", tags=["Health"])
 def health_check():
     """
@@ -57,6 +148,15 @@ def health_check():
     }
 
 
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+def prometheus_metrics():
+    """
+    Prometheus scrape endpoint: per-stage latency histograms, default-forecast
+    fallbacks, and cache/pool/worker saturation.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/", tags=["Health"])
 def root():
     """
@@ -67,9 +167,15 @@ def root():
         "version": "1.0.0",
         "docs": "/api-docs",
         "health": "/health",
+        "metrics": "/metrics",
         "endpoints": {
             "predict": "POST /api/forecast/predict",
+            "batch": "POST /api/forecast/batch",
+            "backtest": "POST /api/forecast/backtest",
+            "hierarchy": "POST /api/forecast/hierarchy",
+            "scenario": "POST /api/forecast/scenario",
             "historical": "GET /api/forecast/historical/{product_id}",
+            "products": "GET /api/forecast/products",
             "legacy": "POST /api/forecast"
         }
     }
\ No newline at end of file
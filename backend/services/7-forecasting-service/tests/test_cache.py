@@ -0,0 +1,107 @@
+import json
+import pytest
+from src.forecasting import cache as cache_module
+from src.forecasting.cache import ForecastCache
+
+RESULT = {"forecastedDemand": [10, 11, 12], "trend": "increasing"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def make_cache(monkeypatch, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+    return ForecastCache()
+
+
+def test_hit_returns_an_independent_copy(monkeypatch):
+    cache = make_cache(monkeypatch)
+    key = ForecastCache.make_key("P1", 3, 24, "w1")
+    cache.set(key, RESULT)
+
+    hit = cache.get(key)
+    hit["forecastedDemand"].append(99)
+    assert cache.get(key) == RESULT
+    assert cache.get(ForecastCache.make_key("P1", 3, 24, "w1", "ets")) is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (2, 1)
+
+
+def test_new_watermark_supersedes_the_old_entry(monkeypatch):
+    cache = make_cache(monkeypatch)
+    cache.set(ForecastCache.make_key("P1", 3, 24, "w1"), RESULT)
+    cache.set(ForecastCache.make_key("P1", 6, 24, "w1"), RESULT)
+    cache.set(ForecastCache.make_key("P1", 3, 24, "w2"), RESULT)
+
+    assert cache.get(ForecastCache.make_key("P1", 3, 24, "w1")) is None
+    assert sorted(cache.keys_for_product("P1")) == [("P1", 3, 24, "auto", "w2"), ("P1", 6, 24, "auto", "w1")]
+
+
+def test_entries_expire_after_the_ttl(monkeypatch, clock):
+    cache = make_cache(monkeypatch, FORECAST_CACHE_TTL=60)
+    key = ForecastCache.make_key("P1", 3, 24, "w1")
+    cache.set(key, RESULT)
+
+    clock.now += 59
+    assert cache.get(key) == RESULT
+    clock.now += 2
+    assert cache.get(key) is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted_over_budget(monkeypatch):
+    size = len(json.dumps(RESULT))
+    cache = make_cache(monkeypatch, FORECAST_CACHE_MAX_BYTES=2 * size)
+    keys = [ForecastCache.make_key(pid, 3, 24, "w1") for pid in ("P1", "P2", "P3")]
+    cache.set(keys[0], RESULT)
+    cache.set(keys[1], RESULT)
+    cache.get(keys[0])
+    cache.set(keys[2], RESULT)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == RESULT
+    assert cache.get(keys[2]) == RESULT
+    assert cache.stats()["bytes"] == 2 * size
+    assert cache.stats()["evictions"] == 1
+
+
+def test_oversized_entry_is_not_cached(monkeypatch):
+    cache = make_cache(monkeypatch, FORECAST_CACHE_MAX_BYTES=10)
+    key = ForecastCache.make_key("P1", 3, 24, "w1")
+    cache.set(key, RESULT)
+    assert cache.get(key) is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_watermark_is_trusted_for_its_ttl(monkeypatch, clock):
+    cache = make_cache(monkeypatch, FORECAST_WATERMARK_TTL=60)
+    cache.set_watermark("P1", "w1")
+    assert cache.get_watermark("P1") == "w1"
+    clock.now += 61
+    assert cache.get_watermark("P1") is None
+
+
+def test_invalidate_product(monkeypatch):
+    cache = make_cache(monkeypatch)
+    cache.set(ForecastCache.make_key("P1", 3, 24, "w1"), RESULT)
+    cache.set(ForecastCache.make_key("P1", 3, 24, "w1", "ets"), RESULT)
+    cache.set(ForecastCache.make_key("P2", 3, 24, "w1"), RESULT)
+    cache.set_watermark("P1", "w1")
+
+    assert cache.invalidate_product("P1") == 2
+    assert cache.keys_for_product("P1") == []
+    assert cache.get_watermark("P1") is None
+    assert cache.stats()["entries"] == 1
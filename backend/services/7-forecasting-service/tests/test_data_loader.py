@@ -0,0 +1,206 @@
+import json
+import base64
+import struct
+from datetime import date
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from src.main import app
+from src.forecasting.data_loader import (
+    COPY_SIGNATURE, _decode_quantity_arrays, _parse_copy_rows, _encode_cursor, _decode_cursor
+)
+
+# array_send() output captured from PostgreSQL 16
+EMPTY_ARRAY = bytes.fromhex("000000000000000000000017")  # '{}'::int[]
+ARRAY_WITH_NULL = bytes.fromhex(  # '{1,NULL}'::int[]
+    "00000001000000010000001700000002000000010000000400000001ffffffff"
+)
+ARRAY_3_0_7 = bytes.fromhex(  # '{3,0,7}'::int[]
+    "00000001000000000000001700000003000000010000000400000003"
+    "000000040000000000000004" "00000007"
+)
+ARRAY_0_5_1 = bytes.fromhex(
+    "00000001000000000000001700000003000000010000000400000000"
+    "000000040000000500000004" "00000001"
+)
+
+# COPY (VALUES ('P1', DATE '2024-01-01', array_send('{3,0,7}'::int[])),
+#              ('P2', DATE '2024-01-01', array_send('{0,5,1}'::int[])))
+# TO STDOUT (FORMAT binary), captured from PostgreSQL 16
+TWO_ROW_COPY = bytes.fromhex(
+    "5047434f50590aff0d0a00" "00000000" "00000000"
+    "0003" "00000002" "5031" "00000004" "0000223e" "0000002c" + ARRAY_3_0_7.hex()
+    + "0003" "00000002" "5032" "00000004" "0000223e" "0000002c" + ARRAY_0_5_1.hex()
+    + "ffff"
+)
+EMPTY_COPY = bytes.fromhex("5047434f50590aff0d0a00" "00000000" "00000000" "ffff")
+
+
+def copy_stream(rows, flags=0, extension=b""):
+    """Binary COPY stream with the given header flags and extension area."""
+    parts = [COPY_SIGNATURE, struct.pack("!ii", flags, len(extension)), extension]
+    for row in rows:
+        parts.append(struct.pack("!h", len(row)))
+        for value in row:
+            if value is None:
+                parts.append(struct.pack("!i", -1))
+            else:
+                parts.append(struct.pack("!i", len(value)) + value)
+    parts.append(struct.pack("!h", -1))
+    return b"".join(parts)
+
+
+def row(product_id, quantities):
+    return (product_id.encode(), struct.pack("!i", 8766), quantities)
+
+
+class TestDecodeQuantityArrays:
+    def test_multiple_rows(self):
+        matrix = _decode_quantity_arrays([ARRAY_3_0_7, ARRAY_0_5_1])
+        assert matrix.dtype == np.int32
+        np.testing.assert_array_equal(matrix, [[3, 0, 7], [0, 5, 1]])
+
+    def test_no_rows(self):
+        assert _decode_quantity_arrays([]).shape == (0, 0)
+
+    def test_empty_arrays(self):
+        assert _decode_quantity_arrays([EMPTY_ARRAY, EMPTY_ARRAY]).shape == (2, 0)
+
+    def test_null_element_is_rejected(self):
+        with pytest.raises(ValueError, match="NULL"):
+            _decode_quantity_arrays([ARRAY_WITH_NULL])
+
+    def test_unequal_lengths_are_rejected(self):
+        with pytest.raises(ValueError, match="equal-length"):
+            _decode_quantity_arrays([ARRAY_3_0_7, EMPTY_ARRAY])
+
+    def test_truncated_array_is_rejected(self):
+        with pytest.raises(ValueError, match="equal-length"):
+            _decode_quantity_arrays([ARRAY_3_0_7[:-4]])
+
+    def test_odd_byte_length_is_rejected(self):
+        with pytest.raises(ValueError, match="equal-length"):
+            _decode_quantity_arrays([ARRAY_3_0_7 + b"\x00"])
+
+    def test_other_element_type_is_rejected(self):
+        int8_array = ARRAY_3_0_7[:8] + struct.pack("!i", 20) + ARRAY_3_0_7[12:]
+        with pytest.raises(ValueError, match="int4"):
+            _decode_quantity_arrays([int8_array])
+
+    def test_two_dimensional_array_is_rejected(self):
+        # '{{1},{2}}'::int[]: two dimensions of length 2 and 1
+        matrix = struct.pack("!9i", 2, 0, 23, 2, 1, 1, 1, 4, 1) + struct.pack("!2i", 4, 2)
+        with pytest.raises(ValueError, match="one-dimensional"):
+            _decode_quantity_arrays([matrix])
+
+
+class TestParseCopyRows:
+    def test_captured_stream(self):
+        ids, first_month, blobs = _parse_copy_rows(memoryview(TWO_ROW_COPY))
+        assert ids == ["P1", "P2"]
+        assert first_month == date(2024, 1, 1)
+        assert blobs == [ARRAY_3_0_7, ARRAY_0_5_1]
+
+    def test_empty_stream(self):
+        assert _parse_copy_rows(memoryview(EMPTY_COPY)) == ([], None, [])
+
+    def test_header_extension_is_skipped(self):
+        stream = copy_stream([row("P1", ARRAY_3_0_7)], extension=b"\x01\x02\x03\x04\x05")
+        ids, first_month, blobs = _parse_copy_rows(memoryview(stream))
+        assert ids == ["P1"]
+        assert first_month == date(2024, 1, 1)
+        assert blobs == [ARRAY_3_0_7]
+
+    def test_non_critical_flags_are_ignored(self):
+        stream = copy_stream([row("P1", ARRAY_3_0_7)], flags=1 << 20)
+        assert _parse_copy_rows(memoryview(stream))[0] == ["P1"]
+
+    @pytest.mark.parametrize("flags", [1, 1 << 16])
+    def test_critical_flags_are_rejected(self, flags):
+        with pytest.raises(ValueError, match="flags"):
+            _parse_copy_rows(memoryview(copy_stream([row("P1", ARRAY_3_0_7)], flags=flags)))
+
+    def test_bad_signature_is_rejected(self):
+        with pytest.raises(ValueError, match="not a binary COPY stream"):
+            _parse_copy_rows(memoryview(b"P1\t2024-01-01\t{3,0,7}\n"))
+
+    def test_missing_trailer_is_rejected(self):
+        with pytest.raises(ValueError, match="truncated"):
+            _parse_copy_rows(memoryview(TWO_ROW_COPY[:-2]))
+
+    def test_truncated_field_is_rejected(self):
+        with pytest.raises(ValueError, match="truncated"):
+            _parse_copy_rows(memoryview(TWO_ROW_COPY[:60]))
+
+    def test_trailing_data_is_rejected(self):
+        with pytest.raises(ValueError, match="trailing data"):
+            _parse_copy_rows(memoryview(TWO_ROW_COPY + b"\x00"))
+
+    def test_wrong_field_count_is_rejected(self):
+        stream = copy_stream([(b"P1", ARRAY_3_0_7)])
+        with pytest.raises(ValueError, match="3 fields"):
+            _parse_copy_rows(memoryview(stream))
+
+    def test_null_field_is_rejected(self):
+        stream = copy_stream([(b"P1", struct.pack("!i", 8766), None)])
+        with pytest.raises(ValueError, match="NULL"):
+            _parse_copy_rows(memoryview(stream))
+
+    def test_negative_extension_length_is_rejected(self):
+        stream = COPY_SIGNATURE + struct.pack("!ii", 0, -4) + struct.pack("!h", -1)
+        with pytest.raises(ValueError, match="extension"):
+            _parse_copy_rows(memoryview(stream))
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+class TestCursors:
+    @pytest.mark.parametrize("sort, key", [
+        ("volume", [1520, "P0042"]),
+        ("volume", [0, ""]),
+        ("volume", [2 ** 63 - 1, "prod/é ✓"]),
+        ("product", ["P0042"]),
+        ("product", ["prod/é ✓"]),
+    ])
+    def test_round_trip(self, sort, key):
+        assert _decode_cursor(_encode_cursor(sort, key), sort) == key
+
+    @pytest.mark.parametrize("made_for, used_with, key", [
+        ("volume", "product", [1520, "P0042"]),
+        ("product", "volume", ["P0042"]),
+    ])
+    def test_cursor_of_other_sort_is_rejected(self, made_for, used_with, key):
+        with pytest.raises(ValueError, match="sort order"):
+            _decode_cursor(_encode_cursor(made_for, key), used_with)
+
+    @pytest.mark.parametrize("cursor", [
+        "not base64!",
+        base64.urlsafe_b64encode(b"{not json").decode(),
+        raw_cursor({"sort": "volume"}),
+        raw_cursor([]),
+        raw_cursor(["price", 10, "P1"]),
+        raw_cursor(["volume"]),
+        raw_cursor(["volume", "10", "P1"]),
+        raw_cursor(["volume", 10.5, "P1"]),
+        raw_cursor(["volume", True, "P1"]),
+        raw_cursor(["volume", 2 ** 63, "P1"]),
+        raw_cursor(["volume", 10, None]),
+        raw_cursor(["volume", 10, "P1", "extra"]),
+        raw_cursor(["volume", 10, "P\x001"]),
+    ])
+    def test_tampered_cursor_is_rejected(self, cursor):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            _decode_cursor(cursor, "volume")
+
+    @pytest.mark.parametrize("sort, cursor", [
+        ("volume", raw_cursor(["volume", True, "P1"])),
+        ("volume", raw_cursor(["volume", 2 ** 64, "P1"])),
+        ("product", _encode_cursor("volume", [10, "P1"])),
+        ("product", "%%%"),
+    ])
+    def test_endpoint_answers_400(self, sort, cursor):
+        # The cursor is checked before any query, so no database is needed
+        response = TestClient(app).get("/api/forecast/products", params={"sort": sort, "cursor": cursor})
+        assert response.status_code == 400
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from src.main import app
+from src.api.endpoints import get_forecast_model
+from src.forecasting.executor import FitExecutor, ExecutorSaturatedError
+
+
+def make_executor(monkeypatch, workers=1, queue=0):
+    monkeypatch.setenv("FORECAST_EXECUTOR", "thread")
+    monkeypatch.setenv("FORECAST_WORKERS", str(workers))
+    monkeypatch.setenv("FORECAST_MAX_QUEUE", str(queue))
+    return FitExecutor()
+
+
+def blocked(release: threading.Event, value):
+    """A fit that runs until the test releases it."""
+    release.wait(5)
+    return value
+
+
+def test_timed_out_caller_keeps_its_slot_until_the_job_ends(monkeypatch):
+    executor = make_executor(monkeypatch)
+    release = threading.Event()
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(executor.run(blocked, release, "slow"), 0.05)
+
+        # The abandoned fit still occupies the only worker
+        stats = executor.stats()
+        assert (stats["inFlight"], stats["queueDepth"]) == (1, 0)
+        for _ in range(2):
+            with pytest.raises(ExecutorSaturatedError):
+                await executor.run(blocked, release, "rejected")
+
+        release.set()
+        for _ in range(100):
+            if executor.stats()["inFlight"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        return await executor.run(blocked, release, "next")
+
+    try:
+        assert asyncio.run(scenario()) == "next"
+    finally:
+        release.set()
+        executor.shutdown()
+
+    stats = executor.stats()
+    assert stats["submittedTotal"] == 2
+    assert stats["completedTotal"] == 2
+    assert stats["failedTotal"] == 0
+    assert stats["rejectedTotal"] == 2
+    assert (stats["inFlight"], stats["queueDepth"], stats["saturation"]) == (0, 0, 0)
+
+
+def test_full_queue_rejects_interactive_calls_and_queues_batch_jobs(monkeypatch):
+    executor = make_executor(monkeypatch, workers=1, queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(blocked, release, "running"))
+        queued = asyncio.ensure_future(executor.run(blocked, release, "queued"))
+        await asyncio.sleep(0.05)
+        assert (executor.stats()["inFlight"], executor.stats()["queueDepth"]) == (1, 1)
+
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(blocked, release, "interactive")
+        batch = asyncio.ensure_future(executor.run(blocked, release, "batch", wait=True))
+        await asyncio.sleep(0.05)
+        assert not batch.done()
+
+        release.set()
+        return await asyncio.gather(running, queued, batch)
+
+    try:
+        assert asyncio.run(scenario()) == ["running", "queued", "batch"]
+    finally:
+        release.set()
+        executor.shutdown()
+    assert executor.stats()["rejectedTotal"] == 1
+
+
+class SaturatedModel:
+    async def generate_forecast(self, **kwargs):
+        raise ExecutorSaturatedError("Forecast queue is full (1 running, 0 queued)")
+
+
+@pytest.mark.parametrize("path", ["/api/forecast/predict", "/api/forecast"])
+def test_saturated_forecast_answers_503(path):
+    app.dependency_overrides[get_forecast_model] = SaturatedModel
+    try:
+        response = TestClient(app).post(path, json={"productId": "P1"})
+    finally:
+        app.dependency_overrides.pop(get_forecast_model)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert "queue is full" in response.json()["detail"]
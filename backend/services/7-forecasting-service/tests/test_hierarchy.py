@@ -0,0 +1,50 @@
+import asyncio
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+from src.forecasting.hierarchy import HierarchicalForecaster
+
+CATEGORIES = {"P1": "tools", "P2": "toys"}
+
+
+class CategoryLoader:
+    """Products table of CATEGORIES; records which products the sales read asks for."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.requested = None
+
+    async def get_product_categories(self, product_ids=None, categories=None):
+        if self.fail:
+            raise ConnectionError("products lookup failed")
+        return {
+            pid: category for pid, category in CATEGORIES.items()
+            if (product_ids is None or pid in product_ids) and (categories is None or category in categories)
+        }
+
+    async def get_sales_matrix(self, product_ids, months=24, use_store=False):
+        self.requested = sorted(product_ids)
+        return [], pd.DatetimeIndex([]), np.zeros((0, 0)), np.zeros((0, 2), dtype=int)
+
+
+def requested_products(loader, **kwargs):
+    forecaster = HierarchicalForecaster(SimpleNamespace(data_loader=loader))
+    with pytest.raises(ValueError, match="No sales history"):
+        asyncio.run(forecaster.forecast(**kwargs))
+    return loader.requested
+
+
+def test_unknown_products_default_to_uncategorized():
+    assert requested_products(CategoryLoader(), product_ids=["P1", "P9"]) == ["P1", "P9"]
+
+
+def test_category_filter_is_not_undone():
+    loader = CategoryLoader()
+    assert requested_products(loader, product_ids=["P1", "P2", "P9"], categories=["tools"]) == ["P1"]
+
+
+def test_category_lookup_failure_is_raised():
+    forecaster = HierarchicalForecaster(SimpleNamespace(data_loader=CategoryLoader(fail=True)))
+    with pytest.raises(ConnectionError):
+        asyncio.run(forecaster.forecast(product_ids=["P1"]))
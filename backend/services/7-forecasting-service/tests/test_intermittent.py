@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+from src.forecasting.smoothing import Z_95, to_padded_matrix
+from src.forecasting.intermittent import IntermittentDemandEngine, classify_demand, _ALPHAS, _BETAS
+
+
+def reference(values, method, alpha, beta=0.0):
+    """Plain-Python Croston / SBA / TSB recursion: (final forecast, SSE, one-step fits)."""
+    demands = [v for v in values if v > 0]
+    size = sum(demands) / max(len(demands), 1)
+    interval = len(values) / max(len(demands), 1)
+    prob = len(demands) / max(len(values), 1)
+    since = 0
+
+    def predict():
+        if method == "tsb":
+            return prob * size
+        debias = 1 - alpha / 2 if method == "sba" else 1.0
+        return debias * size / max(interval, 1.0)
+
+    sse, fitted = 0.0, []
+    for value in values:
+        forecast = predict()
+        fitted.append(forecast)
+        sse += (value - forecast) ** 2
+        since += 1
+        if value > 0:
+            size += alpha * (value - size)
+            if method != "tsb":
+                interval += alpha * (since - interval)
+            since = 0
+        if method == "tsb":
+            prob += beta * ((value > 0) - prob)
+    return predict(), sse, fitted
+
+
+def best_reference(values, method):
+    """Grid search over the engine's candidates: (alpha, beta, forecast, SSE, fits)."""
+    candidates = [(a, b) for a in _ALPHAS for b in _BETAS] if method == "tsb" else [(a, 0.0) for a in _ALPHAS]
+    runs = [(a, b) + reference(values, method, a, b) for a, b in candidates]
+    return min(runs, key=lambda run: run[3])
+
+
+SERIES = [
+    [0, 0, 0, 6, 0, 0, 0, 0],
+    [0, 3, 0, 0, 5, 0, 1, 0, 0, 4],
+    [2, 0, 0, 0, 7, 0, 0, 9, 0, 0, 0, 1],
+]
+
+
+class TestIntermittentDemandEngine:
+    @pytest.mark.parametrize("method", ["croston", "sba", "tsb"])
+    @pytest.mark.parametrize("values", SERIES)
+    def test_matches_reference_recursion(self, method, values):
+        fit = IntermittentDemandEngine().fit_forecast(np.array([values], dtype=float), 3, method=method)
+        alpha, beta, forecast, sse, fitted = best_reference(values, method)
+
+        k = 2 if method == "tsb" else 1
+        sigma2 = sse / (len(values) - k)
+        half_width = Z_95 * np.sqrt(sigma2 * (1 + np.arange(3) * alpha ** 2))
+
+        assert fit["alpha"][0] == pytest.approx(alpha)
+        assert fit["beta"][0] == pytest.approx(beta)
+        np.testing.assert_allclose(fit["mean"][0], forecast)
+        np.testing.assert_allclose(fit["fitted"][0], fitted)
+        np.testing.assert_allclose(fit["sigma2"][0], sigma2)
+        np.testing.assert_allclose(fit["upper"][0], forecast + half_width)
+        np.testing.assert_allclose(fit["lower"][0], np.maximum(forecast - half_width, 0.0))
+
+    def test_single_demand_croston(self):
+        # size 6, interval 8 until the demand at t=3 (4 periods since start):
+        # interval -> 8 + alpha * (4 - 8); the smallest alpha has the lowest SSE
+        fit = IntermittentDemandEngine().fit_forecast(np.array([SERIES[0]], dtype=float), 2, method="croston")
+        assert fit["alpha"][0] == _ALPHAS[0]
+        np.testing.assert_allclose(fit["mean"][0], 6 / (8 - 4 * _ALPHAS[0]))
+        np.testing.assert_allclose(fit["fitted"][0, :4], 0.75)
+
+    def test_lower_bounds_are_clipped_at_zero(self):
+        matrix = to_padded_matrix([np.array(values, dtype=float) for values in SERIES])
+        fit = IntermittentDemandEngine().fit_forecast(matrix, 4)
+        half_width = fit["upper"] - fit["mean"]
+        assert (fit["mean"] - half_width < 0).any()
+        np.testing.assert_array_equal(fit["lower"], np.maximum(fit["mean"] - half_width, 0.0))
+        assert (fit["lower"] >= 0).all()
+
+    def test_flat_series(self):
+        # Demand every period: Croston and TSB fit exactly, Croston wins on AIC
+        fit = IntermittentDemandEngine().fit_forecast(np.full((1, 8), 5.0), 3)
+        assert fit["method"][0] == "croston"
+        for key in ("mean", "lower", "upper"):
+            np.testing.assert_allclose(fit[key][0], 5.0)
+
+    def test_all_zero_series(self):
+        fit = IntermittentDemandEngine().fit_forecast(np.zeros((1, 8)), 3)
+        for key in ("mean", "lower", "upper"):
+            np.testing.assert_array_equal(fit[key][0], 0.0)
+
+    def test_padding_does_not_change_a_row(self):
+        short = [0.0, 3.0, 0.0, 0.0, 5.0]
+        engine = IntermittentDemandEngine()
+        padded = engine.fit_forecast(to_padded_matrix([np.array(SERIES[2], dtype=float), np.array(short)]), 3)
+        alone = engine.fit_forecast(np.array([short]), 3)
+        for key in ("mean", "lower", "upper", "alpha", "beta", "sigma2"):
+            np.testing.assert_allclose(padded[key][1], alone[key][0])
+        assert padded["method"][1] == alone["method"][0]
+        np.testing.assert_allclose(padded["fitted"][1, -len(short):], alone["fitted"][0])
+        assert np.isnan(padded["fitted"][1, :-len(short)]).all()
+
+    def test_unknown_method_is_rejected(self):
+        with pytest.raises(ValueError):
+            IntermittentDemandEngine().fit_forecast(np.zeros((1, 4)), 2, method="ets")
+
+
+class TestClassifyDemand:
+    def test_classes(self):
+        matrix = np.array([
+            [5, 5, 5, 5, 5, 5],      # every period, constant size
+            [1, 9, 1, 9, 1, 9],      # every period, variable size
+            [0, 4, 0, 0, 4, 0],      # sparse, constant size
+            [0, 1, 0, 0, 9, 0],      # sparse, variable size
+            [0, 0, 0, 0, 0, 0],      # no demand
+        ], dtype=float)
+        result = classify_demand(matrix)
+        assert list(result["demandClass"]) == ["smooth", "erratic", "intermittent", "lumpy", "intermittent"]
+        assert list(result["intermittent"]) == [False, False, True, True, True]
+        assert result["adi"][2] == pytest.approx(3.0)
+        assert np.isinf(result["adi"][4])
+
+    def test_padding_is_not_counted(self):
+        padded = to_padded_matrix([np.array([0.0, 4.0, 0.0, 4.0]), np.array([4.0, 4.0])])
+        result = classify_demand(padded)
+        np.testing.assert_allclose(result["adi"], [2.0, 1.0])
@@ -0,0 +1,7 @@
+from src.forecasting import migrations
+
+
+def test_advisory_lock_ids_are_distinct():
+    ids = {name: value for name, value in vars(migrations).items() if name.endswith("_LOCK_ID")}
+    assert len(ids) >= 4
+    assert len(set(ids.values())) == len(ids), ids
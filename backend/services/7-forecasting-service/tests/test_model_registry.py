@@ -0,0 +1,128 @@
+import asyncio
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+from src.forecasting.model import model_spec
+from src.forecasting.model_registry import (
+    ModelRegistry, align_entry, capture_fit, forecast_state, state_impulse_response
+)
+from src.forecasting.scenario import impulse_response
+from src.forecasting.smoothing import Z_95
+
+ORDER = (1, 1, 1)
+SEASONAL_ORDER = (0, 0, 0, 0)
+SPEC = model_spec(ORDER, SEASONAL_ORDER)
+
+
+def monthly(values, start="2022-01-01"):
+    return pd.Series(np.asarray(values, dtype=float), index=pd.date_range(start, periods=len(values), freq="MS"))
+
+
+SERIES = monthly(
+    [12, 15, 14, 18, 21, 19, 24, 26, 25, 29, 31, 30, 34, 37, 35, 39, 42, 41, 45, 47, 46, 50, 53, 52]
+)
+
+
+def fit(time_series):
+    model = sm.tsa.statespace.SARIMAX(
+        time_series, order=ORDER, seasonal_order=SEASONAL_ORDER,
+        enforce_stationarity=False, enforce_invertibility=False
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return model.fit(disp=False)
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    results = fit(SERIES)
+    entry = capture_fit(results, SERIES, SPEC, "sarimax", 0.9, SERIES.index[-1].strftime("%Y-%m-%d"))
+    return results, entry
+
+
+def assert_matches_statsmodels(forecast, mean, lower, upper):
+    interval = forecast.conf_int(alpha=0.05)
+    np.testing.assert_allclose(mean, forecast.predicted_mean, rtol=1e-8)
+    # conf_int uses the exact normal quantile, the registry Z_95 = 1.96
+    half_width = (interval.iloc[:, 1] - interval.iloc[:, 0]).values / 2
+    np.testing.assert_allclose(upper - mean, half_width * Z_95 / 1.959963984540054, rtol=1e-6)
+    np.testing.assert_allclose(mean - lower, upper - mean)
+
+
+class TestStoredState:
+    def test_forecast_matches_statsmodels(self, fitted):
+        results, entry = fitted
+        assert_matches_statsmodels(results.get_forecast(6), *forecast_state(entry, 6))
+
+    def test_extension_matches_append(self, fitted):
+        results, entry = fitted
+        new_values = monthly([55, 54], start="2024-01-01")
+        appended = results.append(new_values)
+
+        extended = align_entry(entry, pd.concat([SERIES, new_values]), max_new_periods=3)
+        assert len(extended["seriesValues"]) == len(SERIES) + 2
+        assert_matches_statsmodels(appended.get_forecast(4), *forecast_state(extended, 4))
+
+    def test_impulse_response_matches_scenario_engine(self, fitted):
+        results, entry = fitted
+        state = {"modelSpec": SPEC, "params": results.params.tolist(), "seriesValues": SERIES.tolist()}
+        np.testing.assert_allclose(state_impulse_response(entry, 6), impulse_response(state, 6), atol=1e-10)
+
+    def test_alignment_rules(self, fitted):
+        _, entry = fitted
+        assert align_entry(entry, SERIES, max_new_periods=0) is entry
+        # History rewritten inside the stored window
+        edited = SERIES.copy()
+        edited.iloc[5] += 1
+        assert align_entry(entry, edited, max_new_periods=3) is None
+        # Too many periods since the parameters were estimated
+        longer = pd.concat([SERIES, monthly([55, 54, 56, 58], start="2024-01-01")])
+        assert align_entry(entry, longer, max_new_periods=3) is None
+        # Series ends before the stored fit
+        assert align_entry(entry, SERIES.iloc[:-1], max_new_periods=3) is None
+
+
+class TestModelRegistry:
+    def test_entries_round_trip_through_disk(self, fitted, tmp_path):
+        _, entry = fitted
+        writer = ModelRegistry(str(tmp_path))
+        asyncio.run(writer.put("P/1", entry))
+        assert writer.stats()["writes"] == 1
+
+        reader = ModelRegistry(str(tmp_path))
+        loaded = asyncio.run(reader.get("P/1", SPEC))
+        assert set(loaded) == set(entry)
+        for name, value in entry.items():
+            np.testing.assert_array_equal(loaded[name], value)
+        asyncio.run(reader.get("P/1", SPEC))
+        assert asyncio.run(reader.get("P2", SPEC)) is None
+
+        stats = reader.stats()
+        assert (stats["diskLoads"], stats["hits"], stats["misses"]) == (1, 1, 1)
+
+    def test_memory_budget_evicts_least_recently_used(self, fitted, tmp_path):
+        _, entry = fitted
+        size = sum(np.asarray(value).nbytes for value in entry.values())
+        registry = ModelRegistry(str(tmp_path))
+        registry.max_bytes = 2 * size
+
+        async def scenario():
+            for product_id in ("P1", "P2"):
+                await registry.put(product_id, entry)
+            await registry.get("P1", SPEC)
+            await registry.put("P3", entry)
+
+        asyncio.run(scenario())
+        assert [key[0] for key in registry._entries] == ["P1", "P3"]
+        assert registry.stats()["evictions"] == 1
+        # Evicted entries are still on disk
+        assert asyncio.run(registry.get("P2", SPEC)) is not None
+
+    def test_disabled_registry_stores_nothing(self, fitted, tmp_path):
+        _, entry = fitted
+        registry = ModelRegistry("")
+        asyncio.run(registry.put("P1", entry))
+        assert asyncio.run(registry.get("P1", SPEC)) is None
+        assert registry.stats()["entries"] == 0
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+from src.forecasting.data_loader import _trim_matrix
+from src.forecasting.preprocessor import Preprocessor
+
+MONTHS = pd.date_range("2024-01-01", periods=4, freq="MS")
+# Rows in neither sorted nor reverse order; P0 has no sales
+QUANTITIES = {"P3": [0, 4, 0, 2], "P0": [0, 0, 0, 0], "P10": [5, 0, 0, 0], "P1": [0, 0, 3, 0]}
+
+
+def long_frame():
+    return pd.DataFrame([
+        {"product_id": pid, "sale_date": month, "total_quantity": quantity}
+        for pid, row in QUANTITIES.items()
+        for month, quantity in zip(MONTHS, row)
+        if quantity
+    ])
+
+
+def test_prepare_matrix_sorts_products():
+    ids, periods, matrix, bounds = Preprocessor().prepare_matrix(long_frame())
+    assert ids == ["P1", "P10", "P3"]
+    np.testing.assert_array_equal(matrix, [QUANTITIES[pid] for pid in ids])
+    np.testing.assert_array_equal(bounds, [[2, 3], [0, 1], [1, 4]])
+    assert list(periods) == list(MONTHS)
+
+
+def test_prepare_matrix_matches_the_loader_layout():
+    from_frame = Preprocessor().prepare_matrix(long_frame())
+    from_loader = _trim_matrix(list(QUANTITIES), MONTHS, np.array(list(QUANTITIES.values()), dtype=np.int32))
+
+    assert from_frame[0] == from_loader[0]
+    assert list(from_frame[1]) == list(from_loader[1])
+    np.testing.assert_array_equal(from_frame[2], from_loader[2])
+    np.testing.assert_array_equal(from_frame[3], from_loader[3])
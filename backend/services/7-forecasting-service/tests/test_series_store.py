@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from src.forecasting.data_loader import DataLoader
+from src.forecasting.rollup import SalesRollup
+from src.forecasting.series_store import SeriesStore, SeriesStoreExporter
+
+
+class RowsExporter(SeriesStoreExporter):
+    """Exporter fed from a list instead of product_sales_monthly."""
+
+    def __init__(self, path, rows):
+        super().__init__(path, pool=object())
+        self.rows = rows
+
+    async def _fetch_rows(self, since=None):
+        return [row for row in self.rows if since is None or pd.Timestamp(row["month"]) >= since]
+
+
+def month(offset):
+    return (pd.Timestamp.now().to_period("M") - offset).to_timestamp().date()
+
+
+def test_refresh_replaces_the_matrix_and_keeps_old_mappings(tmp_path):
+    rows = [
+        {"product_id": "P1", "month": month(2), "total_quantity": 3},
+        {"product_id": "P2", "month": month(1), "total_quantity": 5},
+    ]
+    exporter = RowsExporter(str(tmp_path), rows)
+    asyncio.run(exporter.export())
+
+    store = SeriesStore(str(tmp_path))
+    assert store.available
+    old_mapping = store._matrix
+    before = np.array(old_mapping)
+
+    rows.append({"product_id": "P1", "month": month(0), "total_quantity": 7})
+    asyncio.run(exporter.refresh())
+
+    # The open mapping still sees the snapshot it was opened on
+    np.testing.assert_array_equal(np.array(old_mapping), before)
+
+    store._meta_mtime = None
+    ids, months, matrix = store.get_matrix(["P1", "P2"], months=24)
+    assert ids == ["P1", "P2"]
+    np.testing.assert_array_equal(matrix[:, -3:], [[3, 0, 7], [0, 5, 0]])
+
+
+def test_store_older_than_the_rollup_is_skipped(tmp_path):
+    asyncio.run(RowsExporter(str(tmp_path), [
+        {"product_id": "P1", "month": month(1), "total_quantity": 3},
+    ]).export())
+    store = SeriesStore(str(tmp_path))
+    rollup = SalesRollup(pool=object())
+    loader = DataLoader(pool=object(), rollup=rollup, store=store)
+    assert loader._store_usable()
+
+    rollup.refreshed_at = datetime.now(timezone.utc) + timedelta(seconds=1)
+    assert not loader._store_usable()
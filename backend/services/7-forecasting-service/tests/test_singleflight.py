@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from src.forecasting.singleflight import SingleFlight
+
+
+class Work:
+    """Counts calls; each call blocks until released."""
+
+    def __init__(self, result="done", error=None):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.result = result
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return {"value": self.result}
+
+
+def make_flight(monkeypatch, enabled=True):
+    monkeypatch.setenv("FORECAST_COALESCE", "true" if enabled else "false")
+    return SingleFlight()
+
+
+def test_identical_calls_share_one_computation(monkeypatch):
+    flight = make_flight(monkeypatch)
+
+    async def scenario():
+        work = Work()
+        callers = [asyncio.ensure_future(flight.do(("predict", "P1", 6), work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert flight.stats()["inFlight"] == 1
+        work.release.set()
+        results = await asyncio.gather(*callers)
+        return work, results
+
+    work, results = asyncio.run(scenario())
+    assert work.calls == 1
+    assert results == [{"value": "done"}] * 3
+    assert results[0] is results[1]
+    stats = flight.stats()
+    assert (stats["inFlight"], stats["computations"], stats["coalesced"]) == (0, 1, 2)
+    assert stats["coalescedRatio"] == pytest.approx(0.667)
+
+
+def test_different_keys_and_later_calls_run_separately(monkeypatch):
+    flight = make_flight(monkeypatch)
+
+    async def scenario():
+        work = Work()
+        work.release.set()
+        await asyncio.gather(flight.do(("predict", "P1", 6), work), flight.do(("predict", "P1", 12), work))
+        await flight.do(("predict", "P1", 6), work)
+        return work
+
+    assert asyncio.run(scenario()).calls == 3
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_error_is_shared_and_not_remembered(monkeypatch):
+    flight = make_flight(monkeypatch)
+
+    async def scenario():
+        work = Work(error=ConnectionError("database down"))
+        callers = [asyncio.ensure_future(flight.do(("history", "P1"), work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        work.release.set()
+        outcomes = await asyncio.gather(*callers, return_exceptions=True)
+
+        retry = Work()
+        retry.release.set()
+        return work, outcomes, await flight.do(("history", "P1"), retry)
+
+    work, outcomes, retried = asyncio.run(scenario())
+    assert work.calls == 1
+    assert all(isinstance(outcome, ConnectionError) for outcome in outcomes)
+    assert retried == {"value": "done"}
+
+
+def test_cancelled_waiter_does_not_cancel_the_computation(monkeypatch):
+    flight = make_flight(monkeypatch)
+
+    async def scenario():
+        work = Work()
+        leader = asyncio.ensure_future(flight.do(("predict", "P1"), work))
+        follower = asyncio.ensure_future(flight.do(("predict", "P1"), work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        work.release.set()
+        return leader, await follower
+
+    leader, result = asyncio.run(scenario())
+    assert leader.cancelled()
+    assert result == {"value": "done"}
+
+
+def test_disabled_runs_every_call(monkeypatch):
+    flight = make_flight(monkeypatch, enabled=False)
+
+    async def scenario():
+        work = Work()
+        work.release.set()
+        await asyncio.gather(*(flight.do(("predict", "P1"), work) for _ in range(3)))
+        return work
+
+    assert asyncio.run(scenario()).calls == 3
+    assert flight.stats()["computations"] == 0
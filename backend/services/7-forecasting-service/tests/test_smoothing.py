@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.forecasting.model import ForecastModel
+from src.forecasting.smoothing import ExponentialSmoothingEngine, Z_95, _ALPHAS, _run_recursion, to_padded_matrix
+
+
+def ses_reference(values, alpha):
+    """Plain-Python SES error-correction recursion: (final level, SSE, one-step fits)."""
+    level, sse, fitted = values[0], 0.0, [np.nan]
+    for value in values[1:]:
+        fitted.append(level)
+        error = value - level
+        sse += error ** 2
+        level += alpha * error
+    return level, sse, fitted
+
+
+def run_single(values, alpha, beta, phi, trend0):
+    y = np.array([values], dtype=float)
+    observed = ~np.isnan(y)
+    return _run_recursion(
+        y, observed, np.zeros(1, dtype=int), y[:, 0], np.array([trend0]),
+        np.array([[alpha]]), np.array([[beta]]), np.array([[phi]]), record_fitted=True
+    )
+
+
+class TestRecursion:
+    def test_ses_steps(self):
+        # l0 = 10; errors 2, 0, 4 with alpha 0.5 -> levels 11, 11, 13
+        level, trend, sse, fitted = run_single([10, 12, 11, 15], 0.5, 0.0, 1.0, 0.0)
+        assert level[0, 0] == pytest.approx(13.0)
+        assert trend[0, 0] == 0.0
+        assert sse[0, 0] == pytest.approx(20.0)
+        np.testing.assert_allclose(fitted[0, 0], [np.nan, 10, 11, 11])
+
+    def test_holt_steps(self):
+        # l0 = 10, b0 = 1, alpha 0.5, beta 0.2:
+        # t1: f 11.0,  e  1.0,  l 11.5,   b 1.2
+        # t2: f 12.7,  e -1.7,  l 11.85,  b 0.86
+        # t3: f 12.71, e  2.29, l 13.855, b 1.318
+        level, trend, sse, fitted = run_single([10, 12, 11, 15], 0.5, 0.2, 1.0, 1.0)
+        assert level[0, 0] == pytest.approx(13.855)
+        assert trend[0, 0] == pytest.approx(1.318)
+        assert sse[0, 0] == pytest.approx(1.0 + 1.7 ** 2 + 2.29 ** 2)
+        np.testing.assert_allclose(fitted[0, 0], [np.nan, 11.0, 12.7, 12.71])
+
+    def test_damped_trend_decays(self):
+        # No errors: the trend shrinks by phi each step
+        _, trend, sse, _ = run_single([0.0, 0.9, 1.71], 0.5, 0.1, 0.9, 1.0)
+        assert sse[0, 0] == pytest.approx(0.0)
+        assert trend[0, 0] == pytest.approx(0.9 ** 2)
+
+
+class TestExponentialSmoothingEngine:
+    def test_ses_matches_reference_grid_search(self):
+        values = [10.0, 12.0, 11.0, 15.0, 14.0, 13.0]
+        fit = ExponentialSmoothingEngine().fit_forecast(np.array([values]), 3, method="ses")
+
+        sses = [ses_reference(values, alpha)[1] for alpha in _ALPHAS]
+        alpha = _ALPHAS[int(np.argmin(sses))]
+        level, sse, fitted = ses_reference(values, alpha)
+        # n_eff = 5 one-step errors, k = 2
+        sigma2 = sse / 4
+        half_width = Z_95 * np.sqrt(sigma2 * (1 + np.arange(3) * alpha ** 2))
+
+        assert fit["alpha"][0] == alpha
+        np.testing.assert_allclose(fit["mean"][0], [level] * 3)
+        np.testing.assert_allclose(fit["lower"][0], level - half_width)
+        np.testing.assert_allclose(fit["upper"][0], level + half_width)
+        np.testing.assert_allclose(fit["fitted"][0], fitted)
+
+    def test_flat_series(self):
+        fit = ExponentialSmoothingEngine().fit_forecast(np.full((1, 8), 5.0), 4)
+        assert fit["method"][0] == "ses"
+        np.testing.assert_allclose(fit["mean"][0], 5.0)
+        np.testing.assert_allclose(fit["lower"][0], 5.0)
+        np.testing.assert_allclose(fit["upper"][0], 5.0)
+        np.testing.assert_allclose(fit["fitted"][0, 1:], 5.0)
+
+    def test_all_zero_series(self):
+        fit = ExponentialSmoothingEngine().fit_forecast(np.zeros((1, 8)), 4)
+        for key in ("mean", "lower", "upper"):
+            np.testing.assert_array_equal(fit[key][0], 0.0)
+
+    def test_padding_does_not_change_a_row(self):
+        short = [3.0, 0.0, 4.0, 6.0, 2.0]
+        engine = ExponentialSmoothingEngine()
+        padded = engine.fit_forecast(to_padded_matrix([np.arange(9.0), np.array(short)]), 3)
+        alone = engine.fit_forecast(np.array([short]), 3)
+        for key in ("mean", "lower", "upper", "alpha", "beta", "phi"):
+            np.testing.assert_allclose(padded[key][1], alone[key][0])
+        np.testing.assert_allclose(padded["fitted"][1, 4:], alone["fitted"][0])
+        assert np.isnan(padded["fitted"][1, :4]).all()
+
+    def test_unknown_method_is_rejected(self):
+        with pytest.raises(ValueError):
+            ExponentialSmoothingEngine().fit_forecast(np.zeros((1, 4)), 2, method="arima")
+
+
+class TestToPaddedMatrix:
+    def test_rows_are_right_aligned(self):
+        matrix = to_padded_matrix([np.array([1.0, 2.0, 3.0]), np.array([4.0]), np.array([])])
+        np.testing.assert_array_equal(matrix[0], [1, 2, 3])
+        np.testing.assert_array_equal(matrix[1], [np.nan, np.nan, 4])
+        assert np.isnan(matrix[2]).all()
+
+    def test_no_series(self):
+        assert to_padded_matrix([]).shape == (0, 0)
+
+
+def test_response_lower_bounds_are_clipped_at_zero():
+    # A single spike: the interval around a small level reaches below zero
+    index = pd.date_range("2024-01-01", periods=8, freq="MS")
+    series = pd.Series([0, 0, 0, 9, 0, 0, 0, 0], index=index, dtype=float)
+    fit = ExponentialSmoothingEngine().fit_forecast(np.array([series.values]), 4)
+    assert (fit["lower"][0] < 0).all()
+
+    result = ForecastModel().forecast_smoothing_batch([("P1", series)], 4)[0]
+    assert result["modelTier"] == "ets"
+    assert all(ci["lowerBound"] == 0 for ci in result["confidenceIntervals"])
+    assert all(value >= 0 for value in result["forecastedDemand"])